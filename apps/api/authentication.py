@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from users.models import CustomUser
+
+from api.cache import get_shared_cache
+from api.revocation import revocation_filter
+
+
+CLAIMS_VERSION_CLAIM = 'claims_version'
+
+
+def claims_version_key(user_id):
+    return f"api:claims-version:{user_id}"
+
+
+def set_claims_version(user_id, version):
+    get_shared_cache().set(claims_version_key(user_id), version, timeout=settings.API_CACHE_TIMEOUT)
+
+
+def get_claims_version(user_id):
+    version = get_shared_cache().get(claims_version_key(user_id))
+    if version is None:
+        version = CustomUser.objects.filter(id=user_id).values_list('claims_version', flat=True).first()
+        if version is not None:
+            set_claims_version(user_id, version)
+    return version
+
+
+class RevocationAwareJWTAuthentication(JWTAuthentication):
+    """Rejects revoked tokens; see api.revocation for how that avoids a query per request."""
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        jti = token.get(api_settings.JTI_CLAIM)
+        if jti and revocation_filter.is_revoked(jti):
+            raise InvalidToken({"detail": "Token has been revoked.", "code": "token_not_valid"})
+        return token
+
+
+class ClaimsJWTAuthentication(RevocationAwareJWTAuthentication):
+    """
+    Builds request.user from the token claims instead of selecting the user.
+    The result is a CustomUser with every other field deferred: reading one of
+    them loads the rest of the row. Tokens issued before the user's claims
+    changed (role, deactivation, ...) fall back to loading the user.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = CustomUser._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+            claims = {name: validated_token[name] for name in CustomUser.TOKEN_CLAIMS}
+            version = validated_token[CLAIMS_VERSION_CLAIM]
+        except (KeyError, DjangoValidationError):
+            return super().get_user(validated_token)
+
+        current = get_claims_version(user_id)
+        if current is None:
+            raise InvalidToken({"detail": "User not found", "code": "user_not_found"})
+        if current != version:
+            return super().get_user(validated_token)
+
+        # Stale tokens of deactivated users are handled above, since deactivation bumps the version.
+        values = {'id': user_id, 'is_active': True, 'claims_version': version, **claims}
+        # from_db() expects the values in field order
+        names = [field.attname for field in CustomUser._meta.concrete_fields if field.attname in values]
+        return CustomUser.from_db(CustomUser.objects.db, names, [values[name] for name in names])
@@ -0,0 +1,342 @@
+import json
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from typing import Callable, NamedTuple, Optional, Tuple
+
+import django
+from django.db import connection, reset_queries, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.utils import percentile
+from users.generators import BENCH_PASSWORD
+from users.models import (
+    CustomUser, SkillType, Skill, ProfessionType, Profession, UserSkill, UserProfession,
+)
+from users.serializers import LoginSerializer
+
+from api.cache import bump_version, get_serializer_models
+from api.urls import router, async_router
+
+
+# Rows sent to the bulk endpoints
+BULK_ROWS = 100
+# Metrics compared against a baseline, with the smallest change that is not noise
+COMPARED_METRICS = {
+    'p50_ms': 0.5,
+    'p99_ms': 2.0,
+    'queries': 0,
+    'peak_kib': 64,
+}
+MODELS = (CustomUser, SkillType, Skill, ProfessionType, Profession, UserSkill, UserProfession)
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class Scenario(NamedTuple):
+    name: str
+    method: str
+    path: str
+    data: object = None
+    user: Optional[CustomUser] = None
+    # Run in a transaction that is rolled back, so every sample sees the same data
+    writes: bool = False
+    # Models whose cache versions are bumped before each sample, so reads miss the response cache
+    cold: Tuple = ()
+    # Called inside the sample's transaction, untimed; returns the path to request
+    prepare: Optional[Callable[[], str]] = None
+
+
+class BenchContext:
+    """
+    The rows the scenarios act on, picked once with `seed` so that runs
+    against the same data request the same objects: the admin and a member
+    of the graph generated with `prefix`, and one row of every model.
+    """
+
+    def __init__(self, seed=0, prefix='bench'):
+        self.random = random.Random(seed)
+        self.admin = CustomUser.objects.filter(username=f"{prefix}-admin", role='admin', is_active=True).first()
+        self.member = (
+            CustomUser.objects.filter(username__startswith=prefix, role='user', is_active=True)
+            .filter(pk__in=UserSkill.objects.values('user'))
+            .filter(pk__in=UserProfession.objects.values('user'))
+            .order_by('id').first()
+        )
+        if self.admin is None or self.member is None:
+            raise BenchmarkError(f"No graph generated with the prefix '{prefix}'; run generate_bench_data first.")
+        self.ids = {model: self.pick(model.objects.all()) for model in (SkillType, Skill, ProfessionType, Profession)}
+        self.ids[UserSkill] = self.pick(UserSkill.objects.filter(user=self.member))
+        self.ids[UserProfession] = self.pick(UserProfession.objects.filter(user=self.member))
+        self.free = {
+            UserSkill: ('skill', self.pick(Skill.objects.exclude(user_skills__user=self.member))),
+            UserProfession: ('profession', self.pick(Profession.objects.exclude(user_professions__user=self.member))),
+        }
+        self.required_skills = [self.pick(Skill.objects.all()) for _ in range(5)]
+
+    def pick(self, queryset):
+        count = queryset.count()
+        if not count:
+            raise BenchmarkError(f"No {queryset.model._meta.verbose_name_plural} to benchmark with.")
+        return queryset.order_by('id').values_list('id', flat=True)[self.random.randrange(count)]
+
+    def payload(self, model, number=0):
+        """A valid create/update body for the viewset of `model`."""
+        if model in self.free:
+            field, pk = self.free[model]
+            return {field: pk}
+        data = {'name': f"bench new {model._meta.model_name} {number}", 'description': "created by the benchmark"}
+        if model is Skill:
+            data['skill_type'] = self.ids[SkillType]
+        elif model is Profession:
+            data.update(profession_type=self.ids[ProfessionType], required_skills=self.required_skills)
+        return data
+
+    def create(self, model):
+        """A new row of a taxonomy model with nothing depending on it, for delete scenarios."""
+        data = self.payload(model)
+        if model is Skill:
+            data['skill_type_id'] = data.pop('skill_type')
+        elif model is Profession:
+            data['profession_type_id'] = data.pop('profession_type')
+            data.pop('required_skills')
+        return model.objects.create(**data)
+
+
+def viewset_scenarios(context):
+    """One scenario per action of every routed viewset, sync and async."""
+    scenarios = []
+    for current_router, is_async in ((router, False), (async_router, True)):
+        for _, viewset, basename in current_router.registry:
+            model = viewset.queryset.model
+            user = context.member if model in context.free else context.admin
+            detail = context.ids[model]
+            cold = tuple(get_serializer_models(viewset.OutputSerializer))
+
+            def url(name, *args, basename=basename):
+                return reverse(f"{basename}-{name}", args=args)
+
+            if is_async:
+                # Only list and retrieve run natively async; the other actions are the sync ones.
+                scenarios += [
+                    Scenario(f"{basename}:list", 'get', url('list'), user=user, cold=cold),
+                    Scenario(f"{basename}:retrieve", 'get', url('detail', detail), user=user, cold=cold),
+                ]
+                continue
+
+            if model in context.free:
+                destroy = Scenario(f"{basename}:destroy", 'delete', url('detail', detail), user=user, writes=True)
+            else:
+                destroy = Scenario(
+                    f"{basename}:destroy", 'delete', '', user=user, writes=True,
+                    prepare=lambda model=model, url=url: url('detail', context.create(model).pk),
+                )
+            scenarios += [
+                Scenario(f"{basename}:list", 'get', url('list'), user=user, cold=cold),
+                Scenario(f"{basename}:retrieve", 'get', url('detail', detail), user=user, cold=cold),
+                Scenario(f"{basename}:create", 'post', url('list'), context.payload(model), user, writes=True),
+                Scenario(f"{basename}:update", 'put', url('detail', detail), context.payload(model), user, writes=True),
+                # The last field of the payload: a relation where the model has one
+                Scenario(
+                    f"{basename}:partial_update", 'patch', url('detail', detail),
+                    dict(list(context.payload(model).items())[-1:]), user, writes=True,
+                ),
+                destroy,
+            ]
+            for extra in viewset.get_extra_actions():
+                path = url(extra.url_name, detail) if extra.detail else url(extra.url_name)
+                method = next(iter(extra.mapping))
+                data = None
+                if method != 'get':
+                    data = [context.payload(model, number) for number in range(BULK_ROWS)]
+                scenarios.append(Scenario(f"{basename}:{extra.__name__}", method, path, data, user, writes=method != 'get'))
+    return scenarios
+
+
+def endpoint_scenarios(context):
+    word = max(Skill.objects.get(pk=context.ids[Skill]).name.split(), key=len)
+    return [
+        Scenario('taxonomy-search', 'get', f"{reverse('taxonomy-search')}?q={word}"),
+        Scenario('autocomplete', 'get', f"{reverse('autocomplete', args=['skills'])}?q={word[:3]}"),
+        Scenario('auth:login', 'post', reverse('login'), {'username': context.member.username, 'password': BENCH_PASSWORD}),
+        Scenario(
+            'auth:register', 'post', reverse('register'), writes=True,
+            data={'username': "bench-new-user", 'email': "bench-new-user@example.com",
+                  'password': BENCH_PASSWORD, 'password_confirm': BENCH_PASSWORD},
+        ),
+    ]
+
+
+def get_scenarios(context):
+    """Every scenario, reads first: the writes are rolled back but still bump cache versions and indexes."""
+    scenarios = viewset_scenarios(context) + endpoint_scenarios(context)
+    return sorted(scenarios, key=lambda scenario: scenario.writes)
+
+
+class Runner:
+    """
+    Requests each scenario through Django's test client, in-process, like a
+    server would handle it: `repeat` timed samples after `warmup` untimed ones,
+    then one sample with the queries captured and one with tracemalloc on, so
+    neither instrument inflates the latencies.
+    """
+
+    def __init__(self, repeat=30, warmup=3):
+        self.repeat = repeat
+        self.warmup = warmup
+        self.client = Client(raise_request_exception=False)
+        self.tokens = {}
+
+    def headers(self, user):
+        if user is None:
+            return {}
+        if user.pk not in self.tokens:
+            self.tokens[user.pk] = str(LoginSerializer.get_token(user).access_token)
+        return {'HTTP_AUTHORIZATION': f"Bearer {self.tokens[user.pk]}"}
+
+    def request(self, scenario, instrument=None):
+        """(status, seconds) of one sample; `instrument` wraps the request alone."""
+        for model in scenario.cold:
+            bump_version(model)
+        kwargs = self.headers(scenario.user)
+        if scenario.data is not None:
+            kwargs.update(data=json.dumps(scenario.data), content_type='application/json')
+
+        with transaction.atomic() if scenario.writes else nullcontext():
+            path = scenario.prepare() if scenario.prepare else scenario.path
+            # Requests empty the query log when they start, so it must be empty before too.
+            reset_queries()
+            with nullcontext() if instrument is None else instrument:
+                started = time.perf_counter()
+                response = getattr(self.client, scenario.method)(path, **kwargs)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                seconds = time.perf_counter() - started
+            if scenario.writes:
+                transaction.set_rollback(True)
+        return response.status_code, seconds
+
+    def measure(self, scenario):
+        for _ in range(self.warmup):
+            self.request(scenario)
+        samples = sorted(self.request(scenario)[1] for _ in range(self.repeat))
+
+        queries = CaptureQueriesContext(connection)
+        status, _ = self.request(scenario, queries)
+        # Read now: the captured queries are a slice of the connection's log, which the next request resets.
+        query_count = len(queries)
+        memory = _TracedMemory()
+        self.request(scenario, memory)
+
+        return {
+            'status': status,
+            'samples': len(samples),
+            'p50_ms': round(percentile(samples, 0.5) * 1e3, 3),
+            'p90_ms': round(percentile(samples, 0.9) * 1e3, 3),
+            'p99_ms': round(percentile(samples, 0.99) * 1e3, 3),
+            'mean_ms': round(statistics.fmean(samples) * 1e3, 3),
+            'queries': query_count,
+            'peak_kib': round(memory.peak / 1024, 1),
+            'retained_kib': round(memory.retained / 1024, 1),
+        }
+
+    def run(self, scenarios, progress=None):
+        results = {}
+        # Auth throttles would start answering 429 after a few samples.
+        with override_settings(AUTH_THROTTLE_RATES={}):
+            for scenario in scenarios:
+                results[scenario.name] = self.measure(scenario)
+                if progress:
+                    progress(scenario.name, results[scenario.name])
+        return results
+
+
+class _TracedMemory:
+    def __enter__(self):
+        tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.retained, self.peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return False
+
+
+### --- BASELINES --- ###
+
+def describe_environment(seed):
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW server_version")
+        server_version, = cursor.fetchone()
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'seed': seed,
+        'rows': {model._meta.label: model.objects.count() for model in MODELS},
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': f"{connection.vendor} {server_version}",
+        'machine': platform.machine(),
+    }
+
+
+def write_results(path, results, environment):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'environment': environment, 'results': results}, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def read_results(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+class Change(NamedTuple):
+    scenario: str
+    metric: str
+    before: object
+    after: object
+    regressed: bool
+
+    @property
+    def ratio(self):
+        if not isinstance(self.before, (int, float)) or not self.before or not isinstance(self.after, (int, float)):
+            return None
+        return self.after / self.before
+
+
+def compare(baseline, current, threshold=0.15):
+    """
+    The changes between two results files. A metric regressed when it grew by more
+    than `threshold` and by more than its noise floor (COMPARED_METRICS); query
+    counts regress on any increase, and any change of status code is a regression.
+    A scenario missing from the current run (renamed, or it crashed) is a regression
+    too; scenarios only in the current run are reported as 'new'.
+    """
+    changes = []
+    for name, before in baseline['results'].items():
+        after = current['results'].get(name)
+        if after is None:
+            changes.append(Change(name, 'missing', before['status'], None, True))
+            continue
+        if after['status'] != before['status']:
+            changes.append(Change(name, 'status', before['status'], after['status'], True))
+        for metric, noise in COMPARED_METRICS.items():
+            old, new = before[metric], after[metric]
+            if old == new:
+                continue
+            if metric == 'queries':
+                regressed = new > old
+            else:
+                regressed = new > old * (1 + threshold) and new - old > noise
+            changes.append(Change(name, metric, old, new, regressed))
+    for name in current['results'].keys() - baseline['results'].keys():
+        changes.append(Change(name, 'new', None, current['results'][name]['status'], False))
+    return changes
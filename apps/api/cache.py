@@ -0,0 +1,135 @@
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import serializers
+
+
+def get_shared_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+class LocalLRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LocalLRUCache(settings.API_CACHE_LOCAL_SIZE)
+
+
+### --- MODEL VERSIONS --- ###
+
+def version_key(model):
+    return f"api:version:{model._meta.label_lower}"
+
+
+def modified_key(model):
+    return f"api:modified:{model._meta.label_lower}"
+
+
+def _initial_version():
+    # Start from a timestamp rather than 0, so that an evicted counter never
+    # reuses a version number that is still present in some cache.
+    return int(time.time() * 1000)
+
+
+def bump_version(model):
+    shared = get_shared_cache()
+    key = version_key(model)
+    try:
+        shared.incr(key)
+    except ValueError:
+        shared.add(key, _initial_version(), timeout=None)
+    shared.set(modified_key(model), time.time(), timeout=None)
+
+
+def bump_version_on_commit(model, using=None):
+    """
+    bump_version() once the current transaction commits (at once outside of one).
+    Bumped earlier, a concurrent read could still see the old rows and cache
+    them under the new version.
+    """
+    transaction.on_commit(lambda: bump_version(model), using=using)
+
+
+def get_versions(models):
+    shared = get_shared_cache()
+    keys = [version_key(model) for model in models]
+    versions = shared.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            shared.add(key, _initial_version(), timeout=None)
+            versions[key] = shared.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def get_last_modified(models):
+    """Time of the latest write to any of `models`, as a timestamp."""
+    shared = get_shared_cache()
+    keys = [modified_key(model) for model in models]
+    stamps = shared.get_many(keys)
+    for key in keys:
+        if key not in stamps:
+            # Unknown (e.g. evicted): claim a change now, so clients revalidate fully once.
+            shared.add(key, time.time(), timeout=None)
+            stamps[key] = shared.get(key)
+    return max(stamps.values())
+
+
+@lru_cache(maxsize=None)
+def get_serializer_models(serializer_class):
+    models = []
+
+    def collect(serializer):
+        model = serializer.Meta.model
+        if model not in models:
+            models.append(model)
+        for field in serializer.fields.values():
+            nested = field.child if isinstance(field, serializers.ListSerializer) else field
+            if isinstance(nested, serializers.ModelSerializer) and not field.write_only:
+                collect(nested)
+
+    collect(serializer_class())
+    return tuple(models)
+
+
+### --- RENDERED RESPONSES --- ###
+
+def get_response(key):
+    cached = local_cache.get(key)
+    if cached is None:
+        cached = get_shared_cache().get(key)
+        if cached is not None:
+            local_cache.set(key, cached)
+    return cached
+
+
+def set_response(key, content, content_type):
+    value = (content, content_type)
+    local_cache.set(key, value)
+    get_shared_cache().set(key, value, timeout=settings.API_CACHE_TIMEOUT)
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Error, register
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """The API cache holds state every worker must agree on, so it cannot be per-process."""
+    if settings.DEBUG:
+        return []
+    backend = caches[settings.API_CACHE_ALIAS]
+    if not isinstance(backend, (LocMemCache, DummyCache)):
+        return []
+    return [Error(
+        f"The cache '{settings.API_CACHE_ALIAS}' (API_CACHE_ALIAS) is {type(backend).__name__}, "
+        "which each worker process keeps for itself.",
+        hint="Set CACHE_URL to a Redis or Memcached server shared by every worker.",
+        id='api.E001',
+    )]
@@ -0,0 +1,74 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+
+from core.utils import format_latencies
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares an endpoint served by sync views through the WSGI handler with its async "
+        "counterpart (under /api/async/) through the ASGI handler, at the same concurrency. "
+        "Requests go through Django's test clients in-process, so no server is needed; run "
+        "against a populated database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/user-skills/', help="Sync endpoint to compare.")
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=200, help="Requests in flight at once.")
+        parser.add_argument('--threads', type=int, default=8, help="WSGI worker threads.")
+
+    def handle(self, *args, **options):
+        sync_path = options['path']
+        async_path = sync_path.replace('/api/', '/api/async/', 1)
+        runs = [
+            ("wsgi, sync views", self.run_wsgi(sync_path, options)),
+            ("asgi, sync views", self.run_asgi(sync_path, options)),
+            ("asgi, async views", self.run_asgi(async_path, options)),
+        ]
+        for label, stats in runs:
+            self.stdout.write(
+                f"{label}: {stats['per_second']:.1f} req/s errors={stats['errors']} "
+                f"{format_latencies(stats['latencies'], 'ms')}"
+            )
+
+    @staticmethod
+    def summarize(started, results):
+        latencies = [latency for ok, latency in results if ok]
+        return {
+            'per_second': len(results) / (time.perf_counter() - started),
+            'errors': len(results) - len(latencies),
+            'latencies': latencies or [0.0],
+        }
+
+    def run_wsgi(self, path, options):
+        def get(client):
+            started = time.perf_counter()
+            ok = client.get(path).status_code == 200
+            return ok, time.perf_counter() - started
+
+        clients = [Client() for _ in range(options['concurrency'])]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['threads']) as pool:
+            results = list(pool.map(get, (clients[i % len(clients)] for i in range(options['requests']))))
+        return self.summarize(started, results)
+
+    def run_asgi(self, path, options):
+        async def run():
+            client, limit = AsyncClient(), asyncio.Semaphore(options['concurrency'])
+
+            async def get():
+                async with limit:
+                    started = time.perf_counter()
+                    ok = (await client.get(path)).status_code == 200
+                    return ok, time.perf_counter() - started
+
+            started = time.perf_counter()
+            results = await asyncio.gather(*(get() for _ in range(options['requests'])))
+            return self.summarize(started, results)
+
+        return asyncio.run(run())
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import compare, read_results
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares a bench_suite results file with a baseline and fails when a scenario "
+        "regressed: latency or memory grew past the threshold, more queries, another status, "
+        "or the scenario is missing from the current run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('baseline')
+        parser.add_argument('current')
+        parser.add_argument('--threshold', type=float, default=0.15, help="Tolerated relative growth.")
+        parser.add_argument('--all', action='store_true', help="Also list the changes that are not regressions.")
+
+    def handle(self, *args, **options):
+        baseline, current = read_results(options['baseline']), read_results(options['current'])
+        if baseline['environment']['rows'] != current['environment']['rows']:
+            self.stderr.write("The runs used different data; the comparison may not be meaningful.")
+        changes = compare(baseline, current, options['threshold'])
+        for change in changes:
+            if not (change.regressed or options['all'] or change.metric == 'new'):
+                continue
+            ratio = f" ({change.ratio:.2f}x)" if change.ratio is not None else ""
+            label = "REGRESSED" if change.regressed else "new" if change.metric == 'new' else "changed"
+            self.stdout.write(f"{label:<9} {change.scenario:<36} {change.metric}: {change.before} -> {change.after}{ratio}")
+
+        regressions = sum(change.regressed for change in changes)
+        if regressions:
+            raise CommandError(f"{regressions} regressions (threshold {options['threshold']:.0%}).")
+        self.stdout.write(self.style.SUCCESS(f"No regressions in {len(current['results'])} scenarios."))
@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+
+from core.hashing import HashingPool, HashingSaturated
+from core.utils import format_latencies
+
+
+class Command(BaseCommand):
+    help = "Measures password-check throughput inline and through hashing pools of different sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', default='1,2,4,8', help="Comma-separated pool sizes to compare.")
+        parser.add_argument('--logins', type=int, default=200, help="Password checks per run.")
+        parser.add_argument('--concurrency', type=int, default=32, help="Checks in flight at once.")
+        parser.add_argument('--max-pending', type=int, default=None, help="Pool bound (default: no shedding).")
+
+    def handle(self, *args, **options):
+        encoded = make_password("benchmark-password")
+
+        started = time.perf_counter()
+        for _ in range(min(options['logins'], 20)):
+            check_password("benchmark-password", encoded)
+        inline = min(options['logins'], 20) / (time.perf_counter() - started)
+        self.stdout.write(f"inline: {inline:.1f} logins/s (one thread, blocks the worker)")
+
+        for workers in [int(value) for value in options['workers'].split(',')]:
+            pool = HashingPool(workers, options['max_pending'] or options['logins'])
+            pool.executor.submit(int).result()  # start the processes outside the measurement
+            try:
+                stats = asyncio.run(self.run(pool, encoded, options['logins'], options['concurrency']))
+            finally:
+                pool.shutdown()
+            self.stdout.write(
+                f"workers={workers}: {stats['per_second']:.1f} logins/s shed={stats['shed']} "
+                f"{format_latencies(stats['latencies'], 'ms')}"
+            )
+
+    @staticmethod
+    async def run(pool, encoded, logins, concurrency):
+        limit = asyncio.Semaphore(concurrency)
+        latencies, shed = [], 0
+
+        async def login():
+            nonlocal shed
+            async with limit:
+                started = time.perf_counter()
+                try:
+                    await pool.check_password("benchmark-password", encoded)
+                except HashingSaturated:
+                    shed += 1
+                    return
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        seconds = time.perf_counter() - started
+        return {'per_second': len(latencies) / seconds, 'shed': shed, 'latencies': latencies or [0.0]}
@@ -0,0 +1,54 @@
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from core.bloom import BloomFilter
+from core.utils import format_latencies
+
+
+class Command(BaseCommand):
+    help = "Measures the revocation check with a filter of N revoked tokens against a blacklist query."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tokens', type=int, default=1_000_000, help="Revoked tokens in the filter.")
+        parser.add_argument('--checks', type=int, default=100_000, help="Filter lookups to time.")
+        parser.add_argument('--queries', type=int, default=500, help="Blacklist queries to time.")
+
+    def handle(self, *args, **options):
+        revoked = [uuid.uuid4().hex for _ in range(options['tokens'])]
+        started = time.perf_counter()
+        bloom = BloomFilter(options['tokens'], settings.TOKEN_REVOCATION_ERROR_RATE)
+        for jti in revoked:
+            bloom.add(jti)
+        self.stdout.write(
+            f"built filter: tokens={len(bloom)} bytes={len(bloom.bits)} hashes={bloom.hash_count} "
+            f"seconds={time.perf_counter() - started:.2f}"
+        )
+
+        misses, false_positives = [], 0
+        for _ in range(options['checks']):
+            jti = uuid.uuid4().hex
+            started = time.perf_counter()
+            hit = jti in bloom
+            misses.append(time.perf_counter() - started)
+            false_positives += hit
+        self.stdout.write(f"filter, valid token:   {format_latencies(misses)}")
+        self.stdout.write(f"false positives: {false_positives}/{options['checks']}")
+
+        hits = []
+        for jti in random.sample(revoked, min(options['checks'], len(revoked))):
+            started = time.perf_counter()
+            jti in bloom
+            hits.append(time.perf_counter() - started)
+        self.stdout.write(f"filter, revoked token: {format_latencies(hits)}")
+
+        queries = []
+        for _ in range(options['queries']):
+            started = time.perf_counter()
+            BlacklistedToken.objects.filter(token__jti=uuid.uuid4().hex).exists()
+            queries.append(time.perf_counter() - started)
+        self.stdout.write(f"blacklist query:       {format_latencies(queries)}")
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.serializers import (
+    SkillTypeSerializer, SkillSerializer, ProfessionTypeSerializer, ProfessionSerializer,
+    UserSkillSerializer, UserProfessionSerializer,
+)
+
+from api.projections import get_compiled_serializer
+from api.querysets import optimize_queryset
+from core.utils import format_latencies
+
+
+SERIALIZERS = (
+    SkillTypeSerializer, SkillSerializer, ProfessionTypeSerializer, ProfessionSerializer,
+    UserSkillSerializer, UserProfessionSerializer,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Times one page of each list endpoint's OutputSerializer against its compiled form "
+        "(api.projections), queries included. Run against a populated database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200, help="Rows per page.")
+        parser.add_argument('--repeat', type=int, default=50, help="Pages timed per serializer.")
+
+    def handle(self, *args, **options):
+        for serializer_class in SERIALIZERS:
+            queryset = serializer_class.Meta.model.objects.order_by('-id')[:options['rows']]
+            compiled = get_compiled_serializer(serializer_class)
+
+            def serializer_page():
+                return serializer_class(optimize_queryset(queryset, serializer_class), many=True).data
+
+            def compiled_page():
+                return compiled.serialize(queryset)
+
+            if serializer_page() != compiled_page():
+                self.stderr.write(f"{serializer_class.__name__}: outputs differ, skipped.")
+                continue
+            timings = {label: self.time(page, options['repeat']) for label, page in (
+                ('serializer', serializer_page), ('compiled', compiled_page),
+            )}
+            speedup = sum(timings['serializer']) / sum(timings['compiled'])
+            self.stdout.write(f"{serializer_class.__name__} ({len(compiled_page())} rows): {speedup:.1f}x")
+            for label, samples in timings.items():
+                self.stdout.write(f"  {label:<10} {format_latencies(samples, 'ms')}")
+
+    @staticmethod
+    def time(page, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            page()
+            samples.append(time.perf_counter() - started)
+        return samples
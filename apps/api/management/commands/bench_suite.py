@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import BenchContext, BenchmarkError, Runner, describe_environment, get_scenarios, write_results
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures latency percentiles, query counts and memory of every viewset action, "
+        "search, autocomplete, register and login, and writes them to a JSON file that "
+        "bench_compare can check later runs against. Writes are rolled back. Run against "
+        "data from generate_bench_data. The bench_* commands measure single components."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='bench.json', help="Results file.")
+        parser.add_argument('--repeat', type=int, default=30, help="Timed samples per scenario.")
+        parser.add_argument('--warmup', type=int, default=3, help="Untimed samples per scenario.")
+        parser.add_argument('--seed', type=int, default=0, help="Picks the rows the scenarios act on.")
+        parser.add_argument('--prefix', default='bench', help="Prefix the data was generated with.")
+        parser.add_argument('--only', help="Comma-separated scenario name prefixes, e.g. skill:,auth:login.")
+
+    def handle(self, *args, **options):
+        try:
+            scenarios = get_scenarios(BenchContext(options['seed'], options['prefix']))
+        except BenchmarkError as e:
+            raise CommandError(str(e))
+        if options['only']:
+            prefixes = tuple(options['only'].split(','))
+            scenarios = [scenario for scenario in scenarios if scenario.name.startswith(prefixes)]
+
+        def progress(name, result):
+            self.stdout.write(
+                f"{name:<36} {result['status']} p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms "
+                f"queries={result['queries']} peak={result['peak_kib']:.0f}KiB"
+            )
+
+        results = Runner(options['repeat'], options['warmup']).run(scenarios, progress)
+        write_results(options['output'], results, describe_environment(options['seed']))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} scenarios to {options['output']}."))
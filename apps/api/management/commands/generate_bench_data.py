@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.generators import SCALES, GraphGenerator
+from users.models import CustomUser, SkillType, Skill, ProfessionType, Profession, UserSkill, UserProfession
+
+from api import signals
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a reproducible graph of users, skills, professions and the relations between them "
+        "for the benchmarks (see bench_suite). The same scale and seed always give the same data; "
+        "use a dedicated database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='10k', help="Number of users.")
+        parser.add_argument('--users', type=int, help="Exact number of users, instead of --scale.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='bench', help="Prefix of the generated names.")
+        parser.add_argument('--batch-size', type=int, default=20000, help="Users copied at once.")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if CustomUser.objects.filter(username=f"{prefix}-admin").exists():
+            raise CommandError(f"A graph with the prefix '{prefix}' was already generated in this database.")
+
+        users = options['users'] or SCALES[options['scale']]
+        generator = GraphGenerator(users, seed=options['seed'], prefix=prefix, batch_size=options['batch_size'])
+        started = time.perf_counter()
+        counts = generator.run()
+        elapsed = time.perf_counter() - started
+
+        for model in (SkillType, Skill, ProfessionType, Profession, CustomUser, UserSkill, UserProfession):
+            signals.taxonomy_bulk_written(model)
+
+        for label, count in counts.items():
+            self.stdout.write(f"{label}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {sum(counts.values())} rows in {elapsed:.2f}s; log in as {prefix}-admin."
+        ))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.importing import TaxonomyImporter, read_records
+
+from api import signals
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports skills, professions and their required skills from CSV/JSON Lines files. "
+        "skills/professions rows have name, type and description; required skills rows have profession and skill."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skills', help="File of skills.")
+        parser.add_argument('--professions', help="File of professions.")
+        parser.add_argument('--required-skills', help="File of profession -> skill edges.")
+        parser.add_argument('--format', choices=('csv', 'jsonl'), help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=10000, help="Records normalized and copied at once.")
+
+    def handle(self, *args, **options):
+        files = {kind: options[kind] for kind in ('skills', 'professions', 'required_skills') if options[kind]}
+        if not files:
+            raise CommandError("Pass at least one of --skills, --professions and --required-skills.")
+
+        importer = TaxonomyImporter(batch_size=options['batch_size'])
+        started = time.perf_counter()
+        stats = importer.run(**{kind: read_records(path, options['format']) for kind, path in files.items()})
+        elapsed = time.perf_counter() - started
+
+        for model in importer.written_models():
+            signals.taxonomy_bulk_written(model)
+
+        for kind, counters in stats.items():
+            self.stdout.write(f"{kind}: " + " ".join(f"{name}={count}" for name, count in counters.items()))
+        read = sum(counters['read'] for counters in stats.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {read} records in {elapsed:.2f}s ({read / max(elapsed, 1e-9):,.0f} rows/s)."
+        ))
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.revocation import purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = "Deletes expired tokens from the outstanding/blacklisted token tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows deleted per statement.")
+        parser.add_argument('--interval', type=float, default=None, help="Repeat every N seconds instead of exiting.")
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = purge_expired_tokens(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired tokens."))
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.throttling import get_shed_counts
+
+
+class Command(BaseCommand):
+    help = "Shows how many auth requests each throttle has shed."
+
+    def handle(self, *args, **options):
+        for (scope, identity), count in sorted(get_shed_counts().items()):
+            self.stdout.write(f"{scope} by {identity}: {count} shed")
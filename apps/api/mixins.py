@@ -1,4 +1,14 @@
-from rest_framework.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
+from rest_framework.validators import UniqueValidator
+from rest_framework import status
+
+from core.utils import clean_text_for_unique_fields
+
+from api import cache, signals
 
 
 class AdminPermissionMixin:
@@ -13,3 +23,187 @@ class UserPermissionMixin:
     def check_user_permissions(self, instance_user):
         if self.request.user != instance_user:
             raise PermissionDenied("You do not have the rights to perform this action.")
+
+
+class CachedReadMixin:
+    """
+    Serves list/retrieve from the rendered-response cache. Entries are keyed by
+    the versions of every model the OutputSerializer touches, so a write to any
+    of them (see api.signals) makes the old entries unreachable. Responses read
+    from a replica are not stored (see BaseViewSet.shows_current_versions).
+    """
+    cache_skip_formats = ('api',)
+
+    def get_cache_key(self, request):
+        versions = cache.get_versions(cache.get_serializer_models(self.OutputSerializer))
+        return ":".join([
+            "api:response",
+            self.__class__.__name__,
+            request.accepted_media_type,
+            request.get_full_path(),
+            ".".join(str(version) for version in versions),
+        ])
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.accepted_renderer.format in self.cache_skip_formats:
+            return handler(request, *args, **kwargs)
+
+        key = self.get_cache_key(request)
+        cached = cache.get_response(key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response.from_cache = True
+            return response
+
+        response = handler(request, *args, **kwargs)
+        cacheable = response.status_code == status.HTTP_200_OK and not response.streaming
+        if cacheable and self.shows_current_versions(response):
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()
+            response.render()
+            cache.set_response(key, response.content, response["Content-Type"])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+
+class BulkUpsertMixin:
+    """
+    POST <prefix>/bulk/ with a list of objects. Rows are validated one by one with a
+    single InputSerializer instance, valid rows are upserted on `name` with
+    bulk_create and invalid ones are reported back by their index.
+    """
+    bulk_unique_field = 'name'
+    bulk_normalized_fields = ('name', 'description')
+    bulk_batch_size = 1000
+    bulk_max_rows = 10000
+
+    def get_bulk_serializer(self):
+        serializer = self.InputSerializer(context=self.get_serializer_context())
+        # Existing names are updated instead of being rejected, so the per-row
+        # uniqueness SELECT is not needed.
+        unique_field = serializer.fields[self.bulk_unique_field]
+        unique_field.validators = [
+            validator for validator in unique_field.validators if not isinstance(validator, UniqueValidator)
+        ]
+        return serializer
+
+    def validate_bulk_rows(self, rows):
+        serializer = self.get_bulk_serializer()
+        valid_rows, errors, seen = [], [], set()
+
+        # Register the related objects of every row first, so they are loaded together.
+        if hasattr(serializer, 'collect_lookups'):
+            for row in rows:
+                if isinstance(row, dict):
+                    serializer.collect_lookups(row)
+
+        for index, row in enumerate(rows):
+            try:
+                if not isinstance(row, dict):
+                    raise ValidationError({"non_field_errors": ["Expected an object."]})
+                data = serializer.run_validation(row)
+            except ValidationError as e:
+                errors.append({"index": index, "errors": e.detail})
+                continue
+
+            for field in self.bulk_normalized_fields:
+                if data.get(field):
+                    data[field] = clean_text_for_unique_fields(data[field])
+
+            key = data[self.bulk_unique_field]
+            if key in seen:
+                errors.append({"index": index, "errors": {self.bulk_unique_field: ["Duplicated in this request."]}})
+                continue
+            seen.add(key)
+            valid_rows.append(data)
+
+        return valid_rows, errors
+
+    @transaction.atomic
+    def perform_bulk_upsert(self, rows):
+        model = self.InputSerializer.Meta.model
+        m2m_fields = [field for field in model._meta.many_to_many if field.name in self.InputSerializer.Meta.fields]
+
+        instances, relations = [], []
+        for data in rows:
+            relations.append({field.name: data.pop(field.name) for field in m2m_fields if field.name in data})
+            instances.append(model(**data))
+
+        m2m_names = {field.name for field in m2m_fields}
+        update_fields = [
+            name for name in self.InputSerializer.Meta.fields
+            if name != self.bulk_unique_field and name not in m2m_names
+        ]
+        model.objects.bulk_create(
+            instances,
+            batch_size=self.bulk_batch_size,
+            update_conflicts=True,
+            unique_fields=[self.bulk_unique_field],
+            update_fields=update_fields,
+        )
+
+        for field in m2m_fields:
+            through = field.remote_field.through
+            source, target = field.m2m_column_name(), field.m2m_reverse_name()
+            owners = [instance.pk for instance, related in zip(instances, relations) if field.name in related]
+            through.objects.filter(**{f"{source}__in": owners}).delete()
+            through.objects.bulk_create(
+                [
+                    through(**{source: instance.pk, target: target_obj.pk})
+                    for instance, related in zip(instances, relations)
+                    for target_obj in related.get(field.name, ())
+                ],
+                batch_size=self.bulk_batch_size,
+                ignore_conflicts=True,
+            )
+
+        signals.taxonomy_bulk_written(model)
+        return [instance.pk for instance in instances]
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_upsert(self, request, *args, **kwargs):
+        self.check_admin_permissions()
+
+        rows = request.data
+        if not isinstance(rows, list):
+            raise ValidationError({"detail": "Expected a list of objects."})
+        if len(rows) > self.bulk_max_rows:
+            raise ValidationError({"detail": f"At most {self.bulk_max_rows} objects can be sent at once."})
+
+        valid_rows, errors = self.validate_bulk_rows(rows)
+        ids = self.perform_bulk_upsert(valid_rows) if valid_rows else []
+
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif ids:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({"count": len(ids), "ids": ids, "errors": errors}, status=response_status)
+
+
+class PopularMixin:
+    """GET <prefix>/popular/?limit=N: the most held objects, read from the indexed holder_count counter."""
+    popular_default_limit = 10
+    popular_max_limit = 100
+    popular_fields = ('id', 'name', 'holder_count')
+
+    @action(detail=False, methods=['get'])
+    def popular(self, request, *args, **kwargs):
+        try:
+            limit = min(int(request.query_params.get('limit', self.popular_default_limit)), self.popular_max_limit)
+        except ValueError:
+            raise ValidationError({"limit": "A valid integer is required."})
+        if limit < 1:
+            raise ValidationError({"limit": "Must be at least 1."})
+
+        model = self.get_queryset().model
+        rows = model.objects.order_by('-holder_count', 'id').values(*self.popular_fields)[:limit]
+        return Response({"results": list(rows)})
@@ -0,0 +1,194 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination. The cursor holds the ordering values of the
+    last row of a page, and the next page is read with
+    `WHERE (a, b) > (x, y) ORDER BY a, b LIMIT n`, so every page costs the same
+    no matter how deep it is. The ordering comes from `view.pagination_ordering`
+    and must end with a unique field.
+    """
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = ('-id',)
+    # Above this many rows an unfiltered count is estimated from pg_class.reltuples.
+    exact_count_limit = 10000
+    invalid_cursor_message = "Invalid cursor."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = self.get_page_queryset(queryset, request, view)
+        if self.count_requested(request):
+            self.count = self.get_count(queryset)
+        return self.get_page(list(page))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() for async views, fetching the page with the async ORM."""
+        page = self.get_page_queryset(queryset, request, view)
+        if self.count_requested(request):
+            self.count = await sync_to_async(self.get_count)(queryset)
+        return self.get_page([row async for row in page.aiterator(chunk_size=self.page_size + 1)])
+
+    def paginate_compiled(self, queryset, compiled, request, view=None):
+        """paginate_queryset() for an api.projections.CompiledSerializer; returns the serialized page."""
+        page = self.get_page_queryset(queryset, request, view)
+        if self.count_requested(request):
+            self.count = self.get_count(queryset)
+        return self.get_compiled_page(compiled.fetch(page, extra=self.position_lookups()))
+
+    async def apaginate_compiled(self, queryset, compiled, request, view=None):
+        page = self.get_page_queryset(queryset, request, view)
+        if self.count_requested(request):
+            self.count = await sync_to_async(self.get_count)(queryset)
+        return self.get_compiled_page(await compiled.afetch(page, extra=self.position_lookups()))
+
+    def get_page_queryset(self, queryset, request, view):
+        self.request = request
+        self.ordering = tuple(getattr(view, 'pagination_ordering', self.ordering))
+        self.page_size = self.get_page_size(request)
+        self.fields = [queryset.model._meta.get_field(name.lstrip('-')) for name in self.ordering]
+        self.count = None
+
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor['reverse'])
+        ordering = self.reversed_ordering() if self.reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if self.cursor:
+            queryset = queryset.filter(self.position_filter(ordering, self.cursor['position']))
+        return queryset[:self.page_size + 1]
+
+    def get_page(self, rows, get_position=None):
+        get_position = get_position or self.get_position
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        has_next, has_previous = (True, has_more) if self.reverse else (has_more, self.cursor is not None)
+        self.next_position = get_position(rows[-1]) if rows and has_next else None
+        self.previous_position = get_position(rows[0]) if rows and has_previous else None
+        return rows
+
+    def get_compiled_page(self, pairs):
+        # The ordering values were fetched as the last columns of each row.
+        def get_position(pair):
+            values = pair[0][-len(self.fields):]
+            return self.get_position(SimpleNamespace(**{
+                field.attname: value for field, value in zip(self.fields, values)
+            }))
+        return [data for _, data in self.get_page(pairs, get_position)]
+
+    def get_paginated_response(self, data):
+        response = {'next': self.get_next_link(), 'previous': self.get_previous_link(), 'results': data}
+        if self.count is not None:
+            response['count'], response['count_estimated'] = self.count
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'count_estimated': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    ### --- ORDERING --- ###
+
+    def reversed_ordering(self):
+        return tuple(name[1:] if name.startswith('-') else f"-{name}" for name in self.ordering)
+
+    @staticmethod
+    def position_filter(ordering, position):
+        # (a, b) > (x, y) expanded as `a >= x AND (a > x OR (a = x AND b > y))`;
+        # the leading range lets the database start the index scan at x.
+        lookups = [(name.lstrip('-'), 'lt' if name.startswith('-') else 'gt') for name in ordering]
+
+        after, equal = Q(), {}
+        for (name, lookup), value in zip(lookups, position):
+            after |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+
+        first_name, first_lookup = lookups[0]
+        return Q(**{f"{first_name}__{first_lookup}e": position[0]}) & after
+
+    def get_position(self, instance):
+        return [field.value_to_string(instance) for field in self.fields]
+
+    def position_lookups(self):
+        return [field.attname for field in self.fields]
+
+    ### --- CURSORS --- ###
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        return urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            position = [field.to_python(value) for field, value in zip(self.fields, payload['p'], strict=True)]
+            return {'position': position, 'reverse': bool(payload['r'])}
+        except (BinasciiError, DjangoValidationError, KeyError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_link(self, position, reverse):
+        if position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position, reverse))
+
+    def get_next_link(self):
+        return self.get_link(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        return self.get_link(self.previous_position, reverse=True)
+
+    ### --- COUNT --- ###
+
+    def count_requested(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+
+    def get_count(self, queryset):
+        """Returns (count, is_estimated)."""
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] > self.exact_count_limit:
+                return row[0], True
+        return queryset.count(), False
@@ -0,0 +1,188 @@
+from collections import defaultdict
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import ForeignObjectRel
+from rest_framework import serializers
+
+from core.streaming import iter_chunks
+
+
+# Fields whose to_representation() returns database values unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.EmailField, serializers.IntegerField,
+    serializers.BooleanField, serializers.ChoiceField, serializers.ReadOnlyField,
+)
+
+
+class UnsupportedSerializer(Exception):
+    pass
+
+
+class CompiledSerializer:
+    """
+    Read-only serializer compiled from a ModelSerializer's field tree.
+
+    Every field reachable through forward relations becomes one column of a
+    single `values_list()` query, and a generated `build(row, related)`
+    function assembles the nested dicts from the row tuple. Nested
+    `many=True` serializers are fetched with one query per relation for the
+    whole page and grouped by their owner. No model instances or field
+    objects are created per row; the output is the same as `serializer.data`.
+
+    A SerializerMethodField is supported when the serializer's Meta declares
+    how to compute it from a column:
+    `projected_fields = {'<field>': ('<lookup>', function_of_the_value)}`.
+    """
+
+    def __init__(self, serializer, owner_lookup=None):
+        self.model = serializer.Meta.model
+        self.lookups = [owner_lookup] if owner_lookup else []
+        self.namespace = {}
+        # (owner column, compiled child); the child's first column is its owner
+        self.relations = []
+
+        expression = self.compile_serializer(serializer, self.model, prefix='')
+        source = f"def build(row, related):\n    return {expression}\n"
+        exec(compile(source, f"<compiled {type(serializer).__name__}>", 'exec'), self.namespace)
+        self.build = self.namespace['build']
+
+    ### --- COMPILING --- ###
+
+    def column(self, lookup):
+        if lookup not in self.lookups:
+            self.lookups.append(lookup)
+        return self.lookups.index(lookup)
+
+    def bind(self, value):
+        name = f"_v{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+    def resolve(self, model, source):
+        """Model fields along a dotted source; all but the last must be forward to-one relations."""
+        fields = []
+        for part in source.split('.'):
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                raise UnsupportedSerializer(f"'{source}' is not a model field.")
+            fields.append(field)
+            model = field.related_model
+        if any(field.many_to_many or field.one_to_many for field in fields[:-1]):
+            raise UnsupportedSerializer(f"'{source}' spans a to-many relation.")
+        return fields
+
+    def compile_serializer(self, serializer, model, prefix):
+        projected = getattr(serializer.Meta, 'projected_fields', {})
+        items = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in projected:
+                lookup, function = projected[name]
+                value = f"{self.bind(function)}(row[{self.column(prefix + lookup)}])"
+            else:
+                value = self.compile_field(field, model, prefix)
+            items.append(f"{name!r}: {value}")
+        return "{" + ", ".join(items) + "}"
+
+    def compile_field(self, field, model, prefix):
+        if field.source == '*' or isinstance(field, (serializers.SerializerMethodField, serializers.HiddenField)):
+            raise UnsupportedSerializer(f"{type(field).__name__} '{field.field_name}' has no column.")
+        fields = self.resolve(model, field.source)
+        lookup = prefix + "__".join(model_field.name for model_field in fields)
+        model_field = fields[-1]
+
+        if isinstance(field, serializers.ListSerializer) and isinstance(field.child, serializers.ModelSerializer):
+            if not (model_field.many_to_many or model_field.one_to_many):
+                raise UnsupportedSerializer(f"'{field.source}' is not a to-many relation.")
+            if isinstance(model_field, ForeignObjectRel):
+                remote = model_field.field.name
+            else:
+                remote = model_field.related_query_name()
+            owner_model = fields[-2].related_model if len(fields) > 1 else model
+            owner = self.column(lookup[:-len(model_field.name)] + owner_model._meta.pk.name)
+            self.relations.append((owner, CompiledSerializer(field.child, owner_lookup=remote)))
+            return f"related[{len(self.relations) - 1}].get(row[{owner}], [])"
+
+        if model_field.many_to_many or model_field.one_to_many:
+            raise UnsupportedSerializer(f"'{field.source}' is a to-many relation.")
+
+        if isinstance(field, serializers.ModelSerializer):
+            nested_prefix = f"{lookup}__"
+            key = self.column(nested_prefix + model_field.related_model._meta.pk.name)
+            return f"(None if row[{key}] is None else {self.compile_serializer(field, model_field.related_model, nested_prefix)})"
+
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            return f"row[{self.column(lookup)}]"
+        if isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField, serializers.BaseSerializer)):
+            raise UnsupportedSerializer(f"{type(field).__name__} '{field.field_name}' is not supported.")
+
+        value = f"row[{self.column(lookup)}]"
+        if type(field) in PASSTHROUGH_FIELDS:
+            return value
+        return f"(None if {value} is None else {self.bind(field.to_representation)}({value}))"
+
+    ### --- FETCHING --- ###
+
+    def get_queryset(self, queryset, extra=()):
+        return queryset.select_related(None).prefetch_related(None).values_list(*self.lookups, *extra)
+
+    def related_querysets(self, rows, using):
+        for owner, child in self.relations:
+            owners = {row[owner] for row in rows}
+            owners.discard(None)
+            yield child, child.model._default_manager.using(using).filter(**{f"{child.lookups[0]}__in": owners})
+
+    @staticmethod
+    def group(pairs):
+        grouped = defaultdict(list)
+        for row, data in pairs:
+            grouped[row[0]].append(data)
+        return grouped
+
+    def fetch(self, queryset, extra=()):
+        """[(row, data)] for a queryset; `extra` lookups are appended to each row."""
+        return self.build_rows(list(self.get_queryset(queryset, extra)), queryset.db)
+
+    def build_rows(self, rows, using):
+        related = [
+            self.group(child.fetch(child_queryset)) for child, child_queryset in self.related_querysets(rows, using)
+        ]
+        build = self.build
+        return [(row, build(row, related)) for row in rows]
+
+    async def afetch(self, queryset, extra=()):
+        # Not aiterator(): ValuesListIterable runs its query as soon as it is created.
+        rows = await sync_to_async(list)(self.get_queryset(queryset, extra))
+        related = [
+            self.group(await child.afetch(child_queryset))
+            for child, child_queryset in self.related_querysets(rows, queryset.db)
+        ]
+        build = self.build
+        return [(row, build(row, related)) for row in rows]
+
+    def serialize(self, queryset):
+        return [data for _, data in self.fetch(queryset)]
+
+    def iter_serialized(self, queryset, chunk_size):
+        """
+        Yields the serialized rows in lists of `chunk_size`. Rows are read with a
+        server-side cursor and relations are fetched per chunk, so memory does
+        not grow with the size of the queryset.
+        """
+        using = queryset.db
+        rows = self.get_queryset(queryset).iterator(chunk_size=chunk_size)
+        for chunk in iter_chunks(rows, chunk_size):
+            yield [data for _, data in self.build_rows(chunk, using)]
+
+
+@lru_cache(maxsize=None)
+def get_compiled_serializer(serializer_class):
+    """The compiled form of `serializer_class`, or None when some field cannot be compiled."""
+    try:
+        return CompiledSerializer(serializer_class())
+    except UnsupportedSerializer:
+        return None
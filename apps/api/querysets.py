@@ -0,0 +1,72 @@
+from functools import lru_cache
+from typing import NamedTuple, Tuple, Union
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+class QueryPlan(NamedTuple):
+    select_related: Tuple[str, ...]
+    prefetch_related: Tuple[Union[str, Prefetch], ...]
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset
+
+
+def _prefixed(prefix, lookup):
+    if isinstance(lookup, Prefetch):
+        return Prefetch(f"{prefix}__{lookup.prefetch_through}", queryset=lookup.queryset, to_attr=lookup.to_attr)
+    return f"{prefix}__{lookup}"
+
+
+def _build_plan(serializer, model):
+    select_related, prefetch_related = [], []
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        source = field.source.split('.')[0]
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation or not model_field.related_model:
+            continue
+
+        related_model = model_field.related_model
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+
+        if model_field.many_to_many or model_field.one_to_many:
+            if isinstance(nested, serializers.BaseSerializer):
+                inner = _build_plan(nested, related_model)
+                prefetch_related.append(
+                    Prefetch(source, queryset=inner.apply(related_model._default_manager.all()))
+                )
+            else:  # PrimaryKeyRelatedField(many=True) and friends
+                prefetch_related.append(source)
+            continue
+
+        # Forward FK / one-to-one: a bare PK is read from the "<name>_id" attribute.
+        if isinstance(nested, serializers.RelatedField) and nested.use_pk_only_optimization():
+            continue
+        select_related.append(source)
+        if isinstance(nested, serializers.BaseSerializer):
+            inner = _build_plan(nested, related_model)
+            select_related.extend(f"{source}__{lookup}" for lookup in inner.select_related)
+            prefetch_related.extend(_prefixed(source, lookup) for lookup in inner.prefetch_related)
+
+    return QueryPlan(tuple(select_related), tuple(prefetch_related))
+
+
+@lru_cache(maxsize=None)
+def get_query_plan(serializer_class) -> QueryPlan:
+    return _build_plan(serializer_class(), serializer_class.Meta.model)
+
+
+def optimize_queryset(queryset, serializer_class):
+    return get_query_plan(serializer_class).apply(queryset)
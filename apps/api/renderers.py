@@ -0,0 +1,66 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional, the stdlib encoder is used without it
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer producing the same bytes with orjson, floats aside. Values
+    orjson does not encode itself, and datetimes (which DRF writes with a 'Z'
+    suffix), go through DRF's encoder. Data orjson rejects (integers beyond
+    64 bits, keys that are not strings) is rendered by JSONRenderer, as are
+    indented and ASCII-only output.
+
+    Floats are written by orjson: the same values, but not always the same
+    bytes ('1e16' for '1e+16', '0.00001' for '1e-05'), and NaN and infinities
+    become null where JSONRenderer raises ValueError. Scanning every response
+    for them would cost most of what orjson saves.
+    """
+
+    def can_encode_fast(self, accepted_media_type, renderer_context):
+        return (
+            orjson is not None and self.compact and not self.ensure_ascii
+            and self.get_indent(accepted_media_type, renderer_context or {}) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        content = None
+        if self.can_encode_fast(accepted_media_type, renderer_context):
+            content = self.dumps(data)
+        if content is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return content
+
+    def dumps(self, data):
+        """The orjson encoding of `data`, or None when orjson cannot encode it."""
+        try:
+            content = orjson.dumps(
+                data, default=self.encoder_class().default, option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except (TypeError, orjson.JSONEncodeError):
+            return None
+        # Escaped like JSONRenderer does, so the output is a strict JavaScript subset.
+        if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+            content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return content
+
+    def render_items(self, chunks, accepted_media_type=None, renderer_context=None):
+        """
+        Encodes an iterable of lists as one JSON array, chunk by chunk, for
+        StreamingHttpResponse. Only one chunk is held in memory at a time.
+        """
+        def encode(chunk):
+            return self.render(chunk, accepted_media_type, renderer_context)
+
+        separator = b'['
+        for chunk in chunks:
+            if chunk:
+                # Each chunk is encoded as an array; its brackets are dropped.
+                yield separator + encode(chunk)[1:-1]
+                separator = b','
+        yield b'[]' if separator == b'[' else b']'
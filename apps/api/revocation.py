@@ -0,0 +1,138 @@
+import time
+from threading import Lock, RLock
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from core.bloom import BloomFilter
+
+from api.cache import get_versions
+
+
+MIN_CAPACITY = 100000
+
+
+def _blacklisted_jtis(**filters):
+    return (
+        BlacklistedToken.objects
+        .filter(token__expires_at__gt=timezone.now(), **filters)
+        .order_by('id')
+        .values_list('id', 'token__jti')
+    )
+
+
+class RevocationFilter:
+    """
+    Per-worker Bloom filter of revoked token jtis. A miss means the token was
+    never revoked, so only hits (revoked tokens and rare false positives) are
+    checked against the blacklist table.
+
+    Workers follow the blacklist as a change feed: every revocation bumps the
+    BlacklistedToken version in the shared cache once it commits (see
+    api.signals), and a worker that sees a new version adds the blacklist rows
+    with an id above the last one it has, less TOKEN_REVOCATION_SYNC_OVERLAP:
+    ids are allocated before their transactions commit, so a row may become
+    visible after rows with higher ids.
+
+    The filter is rebuilt from scratch periodically to drop expired tokens, by
+    one request while the others keep checking against the current filter.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._build_lock = Lock()
+        self.bloom = None
+        self.last_id = 0
+        self.generation = None
+        self.synced_at = self.built_at = 0.0
+
+    def rebuild(self):
+        generation = get_versions((BlacklistedToken,))
+        rows = _blacklisted_jtis()
+        bloom = BloomFilter(max(rows.count() * 2, MIN_CAPACITY), settings.TOKEN_REVOCATION_ERROR_RATE)
+        last_id = BlacklistedToken.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+        for _, jti in rows.filter(id__lte=last_id).iterator(chunk_size=10000):
+            bloom.add(jti)
+
+        with self._lock:
+            self.bloom, self.last_id, self.generation = bloom, last_id, generation
+            self.synced_at = self.built_at = time.monotonic()
+
+    def is_current(self):
+        return not self.bloom.is_saturated and time.monotonic() - self.built_at <= settings.TOKEN_REVOCATION_REBUILD_INTERVAL
+
+    def sync(self):
+        if self.bloom is None:
+            with self._build_lock:
+                if self.bloom is None:
+                    self.rebuild()
+            return
+        if not self.is_current() and self._build_lock.acquire(blocking=False):
+            try:
+                if not self.is_current():
+                    self.rebuild()
+                    return
+            finally:
+                self._build_lock.release()
+
+        now = time.monotonic()
+        if now - self.synced_at < settings.TOKEN_REVOCATION_SYNC_INTERVAL:
+            return
+
+        with self._lock:
+            self.synced_at = now
+            generation = get_versions((BlacklistedToken,))
+            if generation == self.generation:
+                return
+            rows = _blacklisted_jtis(id__gt=self.last_id - settings.TOKEN_REVOCATION_SYNC_OVERLAP)
+            for row_id, jti in rows.iterator(chunk_size=10000):
+                # The overlap is read again on every sync; adding it again would fill the filter.
+                if jti not in self.bloom:
+                    self.bloom.add(jti)
+                self.last_id = max(self.last_id, row_id)
+            self.generation = generation
+
+    def add(self, jti):
+        with self._lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+
+    def is_revoked(self, jti):
+        self.sync()
+        if jti not in self.bloom:
+            return False
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+revocation_filter = RevocationFilter()
+
+
+def revoke_token(token):
+    """Blacklists any simplejwt token (access or refresh); api.signals announces it to the workers."""
+    jti = token[api_settings.JTI_CLAIM]
+    outstanding, _ = OutstandingToken.objects.get_or_create(
+        jti=jti,
+        defaults={
+            "user_id": token.get(api_settings.USER_ID_CLAIM),
+            "created_at": timezone.now(),
+            "token": str(token),
+            "expires_at": datetime_from_epoch(token["exp"]),
+        },
+    )
+    BlacklistedToken.objects.get_or_create(token=outstanding)
+
+
+def purge_expired_tokens(batch_size=5000):
+    """Deletes expired outstanding tokens (and their blacklist rows) in batches. Returns the number deleted."""
+    deleted = 0
+    expired = OutstandingToken.objects.filter(expires_at__lte=timezone.now()).order_by('id')
+    while True:
+        ids = list(expired.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
@@ -0,0 +1,156 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from users.autocomplete import AUTOCOMPLETE_INDEXES
+from users.matching import get_built_matcher
+from users.models import CustomUser, SkillType, Skill, ProfessionType, Profession, UserSkill, UserProfession
+
+from api.authentication import claims_version_key, set_claims_version
+from api.cache import bump_version, bump_version_on_commit, get_shared_cache, get_versions
+from api.revocation import revocation_filter
+
+
+CACHED_MODELS = (SkillType, Skill, ProfessionType, Profession)
+# Versioned for conditional GETs only (see BaseViewSet.get_validators)
+RELATION_MODELS = (UserSkill, UserProfession)
+MATCHING_MODELS = (Profession, Skill)
+AUTOCOMPLETE_MODELS = {
+    Skill: AUTOCOMPLETE_INDEXES['skills'],
+    Profession: AUTOCOMPLETE_INDEXES['professions'],
+}
+AUTOCOMPLETE_WEIGHTS = {
+    UserSkill: (AUTOCOMPLETE_INDEXES['skills'], 'skill_id'),
+    UserProfession: (AUTOCOMPLETE_INDEXES['professions'], 'profession_id'),
+}
+
+
+def sync_profession_matcher(update=None):
+    # The worker that made the change patches its matcher in place and adopts
+    # the new versions; other workers see the version change and rebuild.
+    matcher = get_built_matcher()
+    if matcher is not None:
+        if update is not None:
+            update(matcher)
+        matcher.version = get_versions(MATCHING_MODELS)
+
+
+# Everything below runs once the writer's transaction commits: versions bumped
+# earlier would let a concurrent read cache the old rows under the new version,
+# and the in-process indexes would read (or keep) rows that may be rolled back.
+
+def taxonomy_bulk_written(model, using=None):
+    """Called after bulk writes, which do not send post_save/m2m_changed."""
+    def written():
+        bump_version(model)
+        if model in MATCHING_MODELS:
+            sync_profession_matcher(lambda matcher: matcher.build())
+        if model in AUTOCOMPLETE_MODELS:
+            AUTOCOMPLETE_MODELS[model].invalidate()
+
+    transaction.on_commit(written, using=using)
+
+
+def bump_model_version(sender, instance, using=None, **kwargs):
+    # Read now: the instance loses its pk once the delete completes.
+    pk, name, deleted = instance.pk, instance.name, kwargs.get('signal') is post_delete
+
+    def changed():
+        bump_version(sender)
+        if sender in AUTOCOMPLETE_MODELS:
+            index = AUTOCOMPLETE_MODELS[sender]
+            if deleted:
+                index.remove(pk)
+            else:
+                index.upsert(pk, name)
+
+        if sender is Profession:
+            sync_profession_matcher(lambda matcher: matcher.update_professions([pk]))
+        elif sender is Skill and deleted:
+            sync_profession_matcher(lambda matcher: matcher.remove_skill(pk))
+        elif sender is Skill:
+            sync_profession_matcher()
+
+    transaction.on_commit(changed, using=using)
+
+
+def bump_required_skills_version(sender, instance, action, reverse, pk_set, using=None, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        update = lambda matcher, pks=[instance.pk]: matcher.update_professions(pks)  # noqa: E731
+    elif pk_set is not None:
+        update = lambda matcher, pks=set(pk_set): matcher.update_professions(pks)  # noqa: E731
+    else:  # skill.professions.clear() does not say which professions lost the skill
+        update = lambda matcher: matcher.build()  # noqa: E731
+
+    def changed():
+        bump_version(Profession)
+        sync_profession_matcher(update)
+
+    transaction.on_commit(changed, using=using)
+
+
+def update_autocomplete_weight(sender, instance, using=None, **kwargs):
+    index, field = AUTOCOMPLETE_WEIGHTS[sender]
+    object_id = getattr(instance, field)
+    if kwargs.get('signal') is post_delete:
+        transaction.on_commit(lambda: index.add_weight(object_id, -1), using=using)
+    elif kwargs.get('created'):
+        transaction.on_commit(lambda: index.add_weight(object_id, 1), using=using)
+
+
+def bump_relation_version(sender, instance, using=None, **kwargs):
+    bump_version_on_commit(sender, using=using)
+
+
+def publish_claims_version(sender, instance, using=None, **kwargs):
+    # The claims (username, email, role) are also all that UserSerializer shows,
+    # so the CustomUser version only moves when they do.
+    pk, claims_version = instance.pk, instance.claims_version
+
+    def published():
+        if kwargs.get('signal') is post_delete:
+            get_shared_cache().delete(claims_version_key(pk))
+            bump_version(CustomUser)
+        elif get_shared_cache().get(claims_version_key(pk)) != claims_version:
+            set_claims_version(pk, claims_version)
+            bump_version(CustomUser)
+
+    transaction.on_commit(published, using=using)
+
+
+def announce_revocation(sender, instance, created, using=None, **kwargs):
+    # Also sent when simplejwt blacklists a token itself (refresh rotation,
+    # TokenBlacklistView), not only from api.revocation.revoke_token.
+    if not created:
+        return
+    jti = instance.token.jti
+
+    def revoked():
+        revocation_filter.add(jti)
+        bump_version(BlacklistedToken)
+
+    transaction.on_commit(revoked, using=using)
+
+
+for model in CACHED_MODELS:
+    post_save.connect(bump_model_version, sender=model, dispatch_uid=f"api_cache_save_{model.__name__}")
+    post_delete.connect(bump_model_version, sender=model, dispatch_uid=f"api_cache_delete_{model.__name__}")
+
+for model in RELATION_MODELS:
+    post_save.connect(bump_relation_version, sender=model, dispatch_uid=f"api_version_save_{model.__name__}")
+    post_delete.connect(bump_relation_version, sender=model, dispatch_uid=f"api_version_delete_{model.__name__}")
+
+for model in AUTOCOMPLETE_WEIGHTS:
+    post_save.connect(update_autocomplete_weight, sender=model, dispatch_uid=f"autocomplete_save_{model.__name__}")
+    post_delete.connect(update_autocomplete_weight, sender=model, dispatch_uid=f"autocomplete_delete_{model.__name__}")
+
+m2m_changed.connect(
+    bump_required_skills_version, sender=Profession.required_skills.through, dispatch_uid="api_cache_required_skills"
+)
+
+post_save.connect(publish_claims_version, sender=CustomUser, dispatch_uid="api_claims_version_save")
+post_delete.connect(publish_claims_version, sender=CustomUser, dispatch_uid="api_claims_version_delete")
+
+post_save.connect(announce_revocation, sender=BlacklistedToken, dispatch_uid="api_token_revoked")
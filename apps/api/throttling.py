@@ -0,0 +1,136 @@
+import logging
+import math
+import time
+from hashlib import blake2b
+from threading import Lock
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from core.utils import clean_text_for_unique_fields
+
+from api.cache import get_shared_cache
+
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    """'10/m' or '10/min' -> (10, 60), like DRF rates."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+class LocalCounters:
+    """Per-process stand-in for the shared cache counters while it is unreachable."""
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = Lock()
+
+    def incr(self, key, timeout):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._counts) > 10000:
+                self._counts = {k: v for k, v in self._counts.items() if v[1] > now}
+            expires_at = now + timeout if timeout is not None else float('inf')
+            count, expires = self._counts.get(key, (0, expires_at))
+            if expires <= now:
+                count, expires = 0, expires_at
+            self._counts[key] = (count + 1, expires)
+            return count + 1
+
+    def get(self, key):
+        count, expires = self._counts.get(key, (0, 0))
+        return count if expires > time.monotonic() else 0
+
+
+local_counters = LocalCounters()
+
+
+def _incr(key, timeout):
+    shared = get_shared_cache()
+    try:
+        shared.add(key, 0, timeout=timeout)
+        return shared.incr(key)
+    except Exception:  # a cache server outage must not take the auth views down with it
+        logger.warning("Throttle counters fall back to per-process counting.", exc_info=True)
+        return local_counters.incr(key, timeout)
+
+
+def _get(key):
+    try:
+        return get_shared_cache().get(key) or 0
+    except Exception:
+        return local_counters.get(key)
+
+
+def sliding_window_hit(key, limit, window, now=None):
+    """
+    Counts one request under `key` and returns (allowed, retry_after).
+
+    Sliding window approximated from two fixed windows: the previous window's
+    count is weighted by how much of it still overlaps the sliding one. Each
+    hit is a single atomic incr on the shared cache.
+    """
+    now = time.time() if now is None else now
+    bucket, elapsed = divmod(now, window)
+    current = _incr(f"{key}:{int(bucket)}", timeout=window * 2)
+    previous = _get(f"{key}:{int(bucket) - 1}")
+    estimate = previous * (1 - elapsed / window) + current
+    if estimate <= limit:
+        return True, 0
+    if current > limit:
+        retry_after = window - elapsed
+    else:
+        # Wait until enough of the previous window has slid out of the sliding one.
+        retry_after = window * (1 - (limit - current) / previous) - elapsed
+    return False, max(math.ceil(round(retry_after, 3)), 1)
+
+
+### --- AUTH THROTTLES --- ###
+
+def get_identities(request, data):
+    """
+    The values requests are counted by: client IP, plus the username and email
+    they target. The IP is read as NUM_PROXIES trusted proxies report it.
+    """
+    identities = {'ip': BaseThrottle().get_ident(request)}
+    for field in ('username', 'email'):
+        value = data.get(field) if isinstance(data, dict) else None
+        if isinstance(value, str) and value.strip():
+            identities[field] = clean_text_for_unique_fields(value)
+    return identities
+
+
+def shed_key(scope, identity):
+    return f"api:throttle:shed:{scope}:{identity}"
+
+
+def check_auth_throttles(scope, request, data):
+    """
+    Counts the request against every limit of `scope` in AUTH_THROTTLE_RATES.
+    Returns None if it may proceed, otherwise the seconds to wait.
+    """
+    retry_after = None
+    for identity, value in get_identities(request, data).items():
+        rate = settings.AUTH_THROTTLE_RATES.get(scope, {}).get(identity)
+        if rate is None:
+            continue
+        limit, window = parse_rate(rate)
+        digest = blake2b(value.encode(), digest_size=12).hexdigest()
+        allowed, wait = sliding_window_hit(f"api:throttle:{scope}:{identity}:{digest}", limit, window)
+        if not allowed:
+            _incr(shed_key(scope, identity), timeout=None)
+            retry_after = max(retry_after or 0, wait)
+    return retry_after
+
+
+def get_shed_counts():
+    return {
+        (scope, identity): _get(shed_key(scope, identity))
+        for scope, rates in settings.AUTH_THROTTLE_RATES.items()
+        for identity in rates
+    }
@@ -0,0 +1,41 @@
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from api.views import (
+    AsyncRegisterView, AsyncLoginView, LogoutView, ConfirmEmailView, AvatarView, UserExportView,
+    SkillTypeViewSet, SkillViewSet, ProfessionTypeViewSet, ProfessionViewSet,
+    UserSkillViewSet, UserProfessionViewSet, TaxonomySearchView, AutocompleteView,
+    AsyncSkillTypeViewSet, AsyncSkillViewSet, AsyncProfessionTypeViewSet, AsyncProfessionViewSet,
+    AsyncUserSkillViewSet, AsyncUserProfessionViewSet,
+)
+
+
+router = DefaultRouter()
+router.register('skill-types', SkillTypeViewSet, basename='skill-type')
+router.register('skills', SkillViewSet, basename='skill')
+router.register('profession-types', ProfessionTypeViewSet, basename='profession-type')
+router.register('professions', ProfessionViewSet, basename='profession')
+router.register('user-skills', UserSkillViewSet, basename='user-skill')
+router.register('user-professions', UserProfessionViewSet, basename='user-profession')
+
+# The same endpoints as native async views, for deployments served over ASGI.
+async_router = DefaultRouter()
+async_router.register('skill-types', AsyncSkillTypeViewSet, basename='async-skill-type')
+async_router.register('skills', AsyncSkillViewSet, basename='async-skill')
+async_router.register('profession-types', AsyncProfessionTypeViewSet, basename='async-profession-type')
+async_router.register('professions', AsyncProfessionViewSet, basename='async-profession')
+async_router.register('user-skills', AsyncUserSkillViewSet, basename='async-user-skill')
+async_router.register('user-professions', AsyncUserProfessionViewSet, basename='async-user-profession')
+
+urlpatterns = [
+    path('auth/register/', AsyncRegisterView.as_view(), name='register'),
+    path('auth/login/', AsyncLoginView.as_view(), name='login'),
+    path('auth/logout/', LogoutView.as_view(), name='logout'),
+    path('auth/confirm-email/', ConfirmEmailView.as_view(), name='confirm-email'),
+    path('users/export/', UserExportView.as_view(), name='user-export'),
+    path('users/me/avatar/', AvatarView.as_view(), name='avatar'),
+    path('search/', TaxonomySearchView.as_view(), name='taxonomy-search'),
+    path('autocomplete/<str:kind>/', AutocompleteView.as_view(), name='autocomplete'),
+    path('async/', include(async_router.urls)),
+    path('', include(router.urls)),
+]
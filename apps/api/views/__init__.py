@@ -2,4 +2,6 @@ from .base import *
 from .auth import *
 from .user import *
 from .skill import *
-from .profession import *
\ No newline at end of file
+from .profession import *
+from .search import *
+from .autocomplete import *
\ No newline at end of file
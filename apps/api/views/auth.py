@@ -1,57 +1,143 @@
-from rest_framework.generics import CreateAPIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import aauthenticate
+from django.contrib.auth.models import update_last_login
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.serializers import TokenBlacklistSerializer
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenBlacklistView
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.views import TokenBlacklistView
 from rest_framework import status
 
-from users.serializers import RegisterSerializer, LoginSerializer
-
+from core.hashing import HashingSaturated, hashing_pool
 
-class RegisterView(CreateAPIView):
-    permission_classes = [AllowAny]
-    serializer_class = RegisterSerializer
-
-    def post(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        user = serializer.create(serializer.validated_data)
-        return Response({"detail": "User registered successfully."}, status=status.HTTP_201_CREATED)
-
-
-class LoginView(TokenObtainPairView):
-    permission_classes = [AllowAny]
-    serializer_class = LoginSerializer
-
-    def post(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        try:
-            serializer.is_valid(raise_exception=True)
-            data = serializer.validated_data
-            return Response({
-                "access_token": data['access'],
-                "refresh_token": data['refresh'],
-                "user": {
-                    "id": data['id'],
-                    "username": data['username'],
-                    "email": data['email'],
-                    "role": data['role']
-                }
-            }, status=status.HTTP_200_OK)
-        except Exception as e:
-            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+from api.revocation import revoke_token
+from api.throttling import check_auth_throttles
+from users.models import CustomUser
+from users.serializers import RegisterSerializer, LoginSerializer
 
 
 class LogoutView(TokenBlacklistView):
+    # simplejwt token views disable authentication, which left request.user
+    # anonymous here and IsAuthenticated always failing.
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
     permission_classes = [IsAuthenticated]
     serializer_class = TokenBlacklistSerializer
 
     def post(self, request: Request, *args, **kwargs) -> Response:
         serializer = self.get_serializer(data=request.data)
         try:
+            # Validation blacklists the refresh token (the serializer has no
+            # save()); the access token would otherwise stay valid until it expires.
             serializer.is_valid(raise_exception=True)
-            serializer.save()
+            if request.auth is not None:
+                revoke_token(request.auth)
             return Response({"detail": "Successfully logged out."}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+### --- ASYNC AUTH VIEWS --- ###
+
+# API clients authenticate with tokens, not the session cookie, so there is no
+# CSRF token to send (DRF's APIView is exempt for the same reason).
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncAuthView(View):
+    """
+    Plain async Django views for registration and login. Hashing runs in
+    core.hashing's process pool, so a login spike does not pin the web
+    workers; when the pool is full the request is shed with a 503.
+    Abusive clients are throttled before any validation or hashing.
+    """
+    throttle_scope = None
+
+    @staticmethod
+    def read_data(request):
+        if request.content_type != 'application/json':
+            return request.POST.dict()
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+    @staticmethod
+    def retry_response(detail, status, retry_after):
+        response = JsonResponse({"detail": detail}, status=status)
+        response['Retry-After'] = str(retry_after)
+        return response
+
+    async def post(self, request, *args, **kwargs):
+        data = self.read_data(request)
+        if data is None:
+            return JsonResponse({"detail": "The request body must be a JSON object."}, status=400)
+
+        retry_after = await sync_to_async(check_auth_throttles)(self.throttle_scope, request, data)
+        if retry_after is not None:
+            return self.retry_response("Request was throttled.", 429, retry_after)
+        try:
+            return await self.handle(request, data)
+        except HashingSaturated:
+            return self.retry_response(
+                "The server is busy, please retry shortly.", 503, settings.PASSWORD_HASHING_RETRY_AFTER
+            )
+
+
+class AsyncRegisterView(AsyncAuthView):
+    throttle_scope = 'register'
+
+    async def handle(self, request, data):
+        serializer = RegisterSerializer(data=data)
+        if not await sync_to_async(serializer.is_valid)():
+            return JsonResponse(serializer.errors, status=400)
+        password_hash = await hashing_pool.make_password(serializer.validated_data['password'])
+        try:
+            await sync_to_async(serializer.save)(password_hash=password_hash)
+        except DjangoValidationError as e:
+            # A concurrent registration took the username or email after validation.
+            return JsonResponse(e.message_dict, status=400)
+        return JsonResponse({"detail": "User registered successfully."}, status=201)
+
+
+class AsyncLoginView(AsyncAuthView):
+    throttle_scope = 'login'
+    error_message = "No active account found with the given credentials"
+
+    async def handle(self, request, data):
+        username, password = data.get(CustomUser.USERNAME_FIELD), data.get('password')
+        if not isinstance(username, str) or not isinstance(password, str):
+            return JsonResponse({"detail": "Username and password are required."}, status=400)
+
+        # Through AUTHENTICATION_BACKENDS, so user_login_failed is sent and inactive
+        # users are refused; users.backends.PooledModelBackend hashes in the pool.
+        user = await aauthenticate(request, **{CustomUser.USERNAME_FIELD: username, 'password': password})
+        if user is None:
+            return JsonResponse({"detail": self.error_message}, status=400)
+
+        refresh = await sync_to_async(self.login)(user)
+        return JsonResponse({
+            "access_token": str(refresh.access_token),
+            "refresh_token": str(refresh),
+            "user": {
+                "id": user.id,
+                "username": user.username,
+                "email": user.email,
+                "role": user.role
+            }
+        }, status=200)
+
+    @staticmethod
+    def login(user):
+        refresh = LoginSerializer.get_token(user)
+        if jwt_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
+        return refresh
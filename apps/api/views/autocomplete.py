@@ -0,0 +1,23 @@
+from django.http import JsonResponse
+from django.views import View
+
+from users.autocomplete import AUTOCOMPLETE_INDEXES
+
+
+class AutocompleteView(View):
+    """
+    Typeahead for skill and profession names, answered from the in-process
+    prefix index. Plain Django view: no DRF authentication and no queries.
+    """
+    default_limit = 10
+    max_limit = 20
+
+    def get(self, request, kind):
+        index = AUTOCOMPLETE_INDEXES.get(kind)
+        if index is None:
+            return JsonResponse({"detail": "Not found."}, status=404)
+        try:
+            limit = min(max(int(request.GET.get('limit', self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            return JsonResponse({"limit": ["A valid integer is required."]}, status=400)
+        return JsonResponse({"results": index.search(request.GET.get('q', ''), limit)})
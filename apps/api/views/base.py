@@ -1,12 +1,186 @@
+import math
+import time
+from functools import update_wrapper
+from hashlib import blake2b
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from core.loaders import ObjectLoader
+from core.replicas import is_pinned, pick_replica, read_alias, reads_from
+from core.streaming import aiterate, is_asgi, iter_chunks
 
+from api.cache import get_last_modified, get_serializer_models, get_versions
 from api.mixins import AdminPermissionMixin, UserPermissionMixin
+from api.pagination import KeysetPagination
+from api.projections import get_compiled_serializer
+from api.querysets import optimize_queryset
+
+
+class ConditionalResponse(Exception):
+    """Ends a request early with a 304/412 computed before any work was done."""
+
+    def __init__(self, response):
+        self.response = response
 
 
 class BaseViewSet(ModelViewSet):
     OutputSerializer = None
     InputSerializer = None
+    pagination_class = KeysetPagination
+    pagination_ordering = ('-id',)
+    optimized_actions = ('list', 'retrieve')
+    # Safe requests read from a replica unless the client wrote recently
+    replica_reads = True
+    # The replica the current request reads from; None for the primary
+    db_alias = None
+    conditional_actions = ('list', 'retrieve')
+    # list() serializes pages with the compiled form of the OutputSerializer when it has one
+    compiled_list = True
+    # ?stream=true returns the whole list as one JSON array, encoded chunk by chunk
+    stream_query_param = 'stream'
+    stream_chunk_size = 1000
+
+    def initial(self, request, *args, **kwargs):
+        self._read_alias_token = None
+        self.validators = None
+        super().initial(request, *args, **kwargs)
+        self.activate_read_alias(self.get_read_alias(request))
+        self.check_conditions(request)
+
+    ### --- CONDITIONAL GET --- ###
+
+    def get_validators(self, request):
+        """
+        (etag, last_modified) of the response, from the versions of the models
+        the OutputSerializer shows. Computed from the shared cache alone.
+
+        HTTP dates have whole seconds, so the last write is rounded up, and
+        last_modified is None until its second is over: another write could
+        still land in it without moving Last-Modified.
+        """
+        models = get_serializer_models(self.OutputSerializer)
+        parts = [self.__class__.__name__, request.accepted_media_type, request.build_absolute_uri()]
+        parts.extend(str(version) for version in get_versions(models))
+        etag = blake2b(":".join(parts).encode(), digest_size=16).hexdigest()
+        last_modified = math.ceil(get_last_modified(models))
+        return f'"{etag}"', last_modified if last_modified < time.time() else None
+
+    def check_conditions(self, request):
+        if self.action not in self.conditional_actions or request.method not in ('GET', 'HEAD'):
+            return
+        if not self.OutputSerializer:
+            return
+        self.validators = self.get_validators(request)
+        etag, last_modified = self.validators
+        response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            raise ConditionalResponse(response)
+
+    def shows_current_versions(self, response):
+        """
+        Whether `response` can be labelled with the current versions: in ETags or
+        in the response cache. A replica may not have replayed the writes that
+        moved them yet, so what was read from one is not, unless it came from
+        the response cache (which only the primary fills).
+        """
+        return self.db_alias is None or response.status_code == 304 or getattr(response, 'from_cache', False)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, ConditionalResponse):
+            return exc.response
+        if isinstance(exc, DjangoValidationError):
+            # Raised by model saves, e.g. for a duplicate the database rejected
+            exc = ValidationError(as_serializer_error(exc))
+        return super().handle_exception(exc)
+
+    def get_read_alias(self, request):
+        if self.replica_reads and request.method in SAFE_METHODS and not is_pinned(request):
+            return pick_replica()
+        return None
+
+    def activate_read_alias(self, alias):
+        self.db_alias = alias
+        self._read_alias_token = read_alias.set(alias)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if getattr(self, '_read_alias_token', None) is not None:
+            read_alias.reset(self._read_alias_token)
+            self._read_alias_token = None
+        validators = getattr(self, 'validators', None)
+        if validators and response.status_code in (200, 304) and self.shows_current_versions(response):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def get_compiled_serializer(self):
+        if not self.compiled_list or not self.OutputSerializer:
+            return None
+        return get_compiled_serializer(self.OutputSerializer)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.stream_requested(request):
+            return self.stream_list(request, queryset, asynchronous=is_asgi(request))
+        compiled = self.get_compiled_serializer()
+        if compiled is None or self.paginator is None:
+            return super().list(request, *args, **kwargs)
+        return self.get_paginated_response(self.paginator.paginate_compiled(queryset, compiled, request, view=self))
+
+    ### --- STREAMED LISTS --- ###
+
+    def stream_requested(self, request):
+        return (
+            request.query_params.get(self.stream_query_param, '').lower() in ('1', 'true', 'yes')
+            and hasattr(request.accepted_renderer, 'render_items')
+        )
+
+    def iter_list_chunks(self, queryset):
+        compiled = self.get_compiled_serializer()
+        if compiled is not None:
+            yield from compiled.iter_serialized(queryset, self.stream_chunk_size)
+            return
+        rows = queryset.iterator(chunk_size=self.stream_chunk_size)
+        for chunk in iter_chunks(rows, self.stream_chunk_size):
+            yield self.get_serializer(chunk, many=True).data
+
+    def stream_list(self, request, queryset, asynchronous=False):
+        """
+        The whole list, unpaginated, in the pagination order. Rows are read with a
+        server-side cursor and sent as they are encoded, so memory stays at one chunk.
+        Under ASGI it must be `asynchronous`: Django reads sync iterators whole there.
+        """
+        # The body is produced after the request's read alias is reset, so the database is chosen now.
+        queryset = queryset.order_by(*self.pagination_ordering).using(queryset.db)
+        renderer = request.accepted_renderer
+        content = renderer.render_items(
+            self.iter_list_chunks(queryset), request.accepted_media_type, self.get_renderer_context()
+        )
+        return StreamingHttpResponse(aiterate(content) if asynchronous else content, content_type=renderer.media_type)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.optimized_actions and self.OutputSerializer:
+            queryset = optimize_queryset(queryset, self.OutputSerializer)
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if not hasattr(self, 'loader'):
+            self.loader = ObjectLoader()
+        context['loader'] = self.loader
+        return context
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -47,3 +221,99 @@ class BaseUserViewSet(UserPermissionMixin, BaseViewSet):
     def perform_destroy(self, instance):
         self.check_user_permissions(instance.user)
         instance.delete()
+
+
+### --- ASYNC VIEWSETS --- ###
+
+class AsyncViewSetMixin:
+    """
+    Runs a viewset as a native async view under ASGI. Authentication,
+    permissions and throttling run in one sync_to_async call. list/retrieve
+    then fetch with the async ORM and serialize and render on the event loop,
+    so they do not hold a thread while waiting on the database. Other actions
+    (writes, custom actions) run in a thread as before. The rendered-response
+    cache of CachedReadMixin does not apply to these actions.
+    """
+    db_alias = None
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            return await view(request, *args, **kwargs)
+
+        return update_wrapper(async_view, view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            if not iscoroutinefunction(handler):
+                handler = sync_to_async(handler)
+            with reads_from(self.db_alias):
+                response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.as_plain_response(self.response)
+
+    def activate_read_alias(self, alias):
+        # Activated around the handler in dispatch(), which runs in another context than initial().
+        self.db_alias = alias
+
+    @staticmethod
+    def as_plain_response(response):
+        # Rendered here, Django's async handler would otherwise render in a thread.
+        if not isinstance(response, Response):
+            return response
+        response.render()
+        plain = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            plain[header] = value
+        return plain
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, DjangoValidationError, TypeError, ValueError):
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    async def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.stream_requested(request):
+            return self.stream_list(request, queryset, asynchronous=True)
+        compiled = self.get_compiled_serializer()
+        if compiled is not None:
+            data = await self.paginator.apaginate_compiled(queryset, compiled, request, view=self)
+            return self.get_paginated_response(data)
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    async def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_serializer(await self.aget_object())
+        return Response(serializer.data)
+
+
+class AsyncBaseViewSet(AsyncViewSetMixin, BaseViewSet):
+    pass
+
+
+class AsyncBaseAdminViewSet(AsyncViewSetMixin, BaseAdminViewSet):
+    pass
+
+
+class AsyncBaseUserViewSet(AsyncViewSetMixin, BaseUserViewSet):
+    pass
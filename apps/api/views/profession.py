@@ -1,23 +1,133 @@
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from django.conf import settings
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
 
-from users.models import ProfessionType, Profession
+from core.streaming import is_asgi, streaming_response
+
+from users.analytics import get_cohort, get_skill_gaps, iter_user_skill_gaps
+from users.matching import get_profession_matcher, get_user_skill_ids
+from users.models import CustomUser, ProfessionType, Profession, Skill, UserSkill, UserProfession
 from users.serializers import (
     ProfessionTypeSerializer, ProfessionTypeInputSerializer,
-    ProfessionSerializer, ProfessionInputSerializer
+    ProfessionSerializer, ProfessionInputSerializer, SkillGapQuerySerializer
 )
 
-from api.views.base import BaseAdminViewSet
+from api.cache import get_shared_cache, get_versions
+from api.mixins import CachedReadMixin, BulkUpsertMixin, PopularMixin
+from api.signals import MATCHING_MODELS
+from api.views.base import AsyncViewSetMixin, BaseAdminViewSet
 
 
-class ProfessionTypeViewSet(BaseAdminViewSet):
+class ProfessionTypeViewSet(CachedReadMixin, BulkUpsertMixin, BaseAdminViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_ordering = ('name', 'id')
     queryset = ProfessionType.objects.all()
     OutputSerializer = ProfessionTypeSerializer
     InputSerializer = ProfessionTypeInputSerializer
 
 
-class ProfessionViewSet(BaseAdminViewSet):
+class ProfessionViewSet(CachedReadMixin, BulkUpsertMixin, PopularMixin, BaseAdminViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_ordering = ('name', 'id')
     queryset = Profession.objects.all()
     OutputSerializer = ProfessionSerializer
     InputSerializer = ProfessionInputSerializer
+    match_default_top = 10
+    match_max_top = 100
+    skill_gap_models = (Profession, CustomUser, UserSkill, UserProfession)
+
+    def get_match_user_ids(self, request):
+        users = request.query_params.get('users')
+        if not users:
+            return [request.user.id]
+        self.check_admin_permissions()
+        try:
+            return list(dict.fromkeys(int(user_id) for user_id in users.split(',')))
+        except ValueError:
+            raise ValidationError({"users": "Provide a comma-separated list of user IDs."})
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def match(self, request, *args, **kwargs):
+        """
+        Ranks professions by how much of their required skills the user has.
+        Admins can rank several users at once with ?users=1,2,3.
+        """
+        try:
+            top = min(int(request.query_params.get('top', self.match_default_top)), self.match_max_top)
+        except ValueError:
+            raise ValidationError({"top": "A valid integer is required."})
+        if top < 1:
+            raise ValidationError({"top": "Must be at least 1."})
+
+        user_ids = self.get_match_user_ids(request)
+        matcher = get_profession_matcher(version=get_versions(MATCHING_MODELS))
+        skill_ids = get_user_skill_ids(user_ids)
+        rankings = matcher.rank_many([skill_ids[user_id] for user_id in user_ids], top=top)
+
+        missing_ids = {
+            skill_id for ranking in rankings for result in ranking for skill_id in result['missing_skills']
+        }
+        skill_names = dict(Skill.objects.filter(id__in=missing_ids).values_list('id', 'name'))
+        for ranking in rankings:
+            for result in ranking:
+                result['missing_skills'] = [
+                    {'id': skill_id, 'name': skill_names.get(skill_id)} for skill_id in result['missing_skills']
+                ]
+
+        return Response({
+            "results": [
+                {"user": user_id, "professions": ranking} for user_id, ranking in zip(user_ids, rankings)
+            ]
+        })
+
+    def get_cached_skill_gaps(self, profession, cohort, params):
+        # The report aggregates users and what they hold, so any of these invalidates it.
+        versions = get_versions(self.skill_gap_models)
+        key = ":".join(str(part) for part in (
+            "api:skill-gaps", profession.pk, *versions,
+            getattr(params.get('cohort_profession'), 'pk', ''), params.get('joined_from', ''), params.get('joined_to', ''),
+        ))
+        if self.db_alias is not None:
+            # Read from a replica, the report may predate the versions: used from the cache only.
+            report = get_shared_cache().get(key)
+            return report if report is not None else get_skill_gaps(cohort, profession)
+        return get_shared_cache().get_or_set(
+            key, lambda: get_skill_gaps(cohort, profession), timeout=settings.API_REPORT_CACHE_TIMEOUT
+        )
+
+    @action(detail=True, methods=['get'], url_path='skill-gaps', permission_classes=[IsAuthenticated])
+    def skill_gaps(self, request, *args, **kwargs):
+        """
+        Required skills of the profession that users of a cohort are missing. The
+        cohort is built from ?cohort_profession=<id>&joined_from=<date>&joined_to=<date>.
+        ?detail=users streams one row per user; ?output=csv|ndjson streams the report.
+        """
+        self.check_admin_permissions()
+        profession = self.get_object()
+        query = SkillGapQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        cohort = get_cohort(params.get('cohort_profession'), params.get('joined_from'), params.get('joined_to'))
+        if params['detail'] == 'users':
+            rows = iter_user_skill_gaps(cohort, profession)
+            fields = ('user_id', 'username', 'missing_count', 'missing_skills')
+        else:
+            report = self.get_cached_skill_gaps(profession, cohort, params)
+            if params['output'] == 'json':
+                return Response(report)
+            rows = report['skills']
+            fields = ('skill_id', 'skill_name', 'holders', 'missing', 'missing_ratio')
+
+        filename = f"skill-gaps-{profession.pk}-{params['detail']}"
+        return streaming_response(rows, fields, params['output'], filename, asynchronous=is_asgi(request))
+
+
+class AsyncProfessionTypeViewSet(AsyncViewSetMixin, ProfessionTypeViewSet):
+    pass
+
+
+class AsyncProfessionViewSet(AsyncViewSetMixin, ProfessionViewSet):
+    pass
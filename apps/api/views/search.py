@@ -0,0 +1,16 @@
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from users.search import search_taxonomy
+from users.serializers import TaxonomySearchQuerySerializer
+
+
+class TaxonomySearchView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = TaxonomySearchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        return Response(search_taxonomy(params['q'], params['types'], params['limit']))
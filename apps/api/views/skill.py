@@ -3,18 +3,29 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from users.models import SkillType, Skill
 from users.serializers import SkillTypeSerializer, SkillTypeInputSerializer, SkillSerializer, SkillInputSerializer
 
-from api.views.base import BaseAdminViewSet
+from api.mixins import CachedReadMixin, BulkUpsertMixin, PopularMixin
+from api.views.base import AsyncViewSetMixin, BaseAdminViewSet
 
 
-class SkillTypeViewSet(BaseAdminViewSet):
+class SkillTypeViewSet(CachedReadMixin, BulkUpsertMixin, BaseAdminViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_ordering = ('name', 'id')
     queryset = SkillType.objects.all()
     OutputSerializer = SkillTypeSerializer
     InputSerializer = SkillTypeInputSerializer
 
 
-class SkillViewSet(BaseAdminViewSet):
+class SkillViewSet(CachedReadMixin, BulkUpsertMixin, PopularMixin, BaseAdminViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_ordering = ('name', 'id')
     queryset = Skill.objects.all()
     OutputSerializer = SkillSerializer
-    InputSerializer = SkillInputSerializer
\ No newline at end of file
+    InputSerializer = SkillInputSerializer
+
+
+class AsyncSkillTypeViewSet(AsyncViewSetMixin, SkillTypeViewSet):
+    pass
+
+
+class AsyncSkillViewSet(AsyncViewSetMixin, SkillViewSet):
+    pass
\ No newline at end of file
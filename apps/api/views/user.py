@@ -1,20 +1,33 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework import status
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
-from users.models import UserSkill, UserProfession
+from core.replicas import pick_replica
+from core.streaming import is_asgi, streaming_response
+
+from users.analytics import get_cohort
+from users.avatars import AvatarUploadHandler, schedule_variants, store_avatar, variant_urls, variants_ready
+from users.exports import USER_EXPORT_FIELDS, iter_user_export
+from users.models import CustomUser, UserSkill, UserProfession
 from users.serializers import (
-    UserSkillSerializer, UserSKillInputSerializer, UserProfessionSerializer, UserProfessionInputSerializer
+    UserSkillSerializer, UserSKillInputSerializer, UserProfessionSerializer, UserProfessionInputSerializer,
+    UserExportQuerySerializer
 )
 
-from api.views.base import BaseUserViewSet
+from api.cache import bump_version_on_commit
+from api.mixins import AdminPermissionMixin
+from api.views.base import AsyncViewSetMixin, BaseUserViewSet
 
 
 class UserSkillViewSet(BaseUserViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
     queryset = UserSkill.objects.all()
+    pagination_ordering = ('-added_at', '-id')
     OutputSerializer = UserSkillSerializer
     InputSerializer = UserSKillInputSerializer
 
@@ -22,6 +35,7 @@ class UserSkillViewSet(BaseUserViewSet):
 class UserProfessionViewSet(BaseUserViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
     queryset = UserProfession.objects.all()
+    pagination_ordering = ('-assigned_at', '-id')
     OutputSerializer = UserProfessionSerializer
     InputSerializer = UserProfessionInputSerializer
 
@@ -44,3 +58,84 @@ class ConfirmEmailView(APIView):
         user.save()
 
         return Response({"detail": "Email has been successfully confirmed!"}, status=status.HTTP_200_OK)
+
+
+class UserExportView(AdminPermissionMixin, APIView):
+    """
+    Streams every user with their skills and professions as ?output=ndjson|csv.
+    The cohort can be narrowed with ?cohort_profession=<id>&joined_from=<date>&joined_to=<date>.
+    """
+    permission_classes = [IsAuthenticated]
+    export_chunk_size = 2000
+
+    def get(self, request):
+        self.check_admin_permissions()
+        query = UserExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        cohort = get_cohort(params.get('cohort_profession'), params.get('joined_from'), params.get('joined_to'))
+        # The rows are read while the response streams, after the request's read
+        # alias is reset, so the replica is chosen here.
+        rows = iter_user_export(cohort, chunk_size=self.export_chunk_size, using=pick_replica())
+        return streaming_response(rows, USER_EXPORT_FIELDS, params['output'], "users", asynchronous=is_asgi(request))
+
+
+class AvatarView(APIView):
+    """
+    PUT a multipart `avatar` file. The upload is streamed to disk with a size
+    limit, stored under its content hash, and resized variants are rendered
+    in the background. The 202 response lists the variant URLs; while
+    `pending` is true they are not rendered yet and answer 404.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    # Multipart framing around the file
+    upload_overhead = 64 * 1024
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [AvatarUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def put(self, request):
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        too_large = Response(
+            {"avatar": f"The file must not exceed {settings.AVATAR_MAX_BYTES} bytes."},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+        if content_length > settings.AVATAR_MAX_BYTES + self.upload_overhead:
+            return too_large
+
+        uploaded = request.FILES.get('avatar')
+        if uploaded is None:
+            if request.upload_handlers[0].received > settings.AVATAR_MAX_BYTES:
+                return too_large
+            return Response({"avatar": "No file was submitted."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            name = store_avatar(uploaded)
+        except DjangoValidationError as e:
+            return Response({"avatar": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+        CustomUser.objects.filter(pk=request.user.pk).update(avatar=name)
+        bump_version_on_commit(CustomUser)
+        schedule_variants(name)
+        return Response(
+            {"avatar": variant_urls(name), "pending": not variants_ready(name)}, status=status.HTTP_202_ACCEPTED
+        )
+
+    def delete(self, request):
+        # The files stay: other users may have uploaded the same image.
+        CustomUser.objects.filter(pk=request.user.pk).update(avatar=None)
+        bump_version_on_commit(CustomUser)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class AsyncUserSkillViewSet(AsyncViewSetMixin, UserSkillViewSet):
+    pass
+
+
+class AsyncUserProfessionViewSet(AsyncViewSetMixin, UserProfessionViewSet):
+    pass
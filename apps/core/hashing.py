@@ -0,0 +1,81 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+
+
+class HashingSaturated(Exception):
+    """Raised instead of queueing when the password hashing pool is full."""
+
+
+def init_worker():
+    # Spawned workers (the default outside Linux) start without Django configured.
+    import django
+    django.setup()
+
+
+def _check(raw_password, encoded):
+    if encoded is None:
+        # Hash anyway, so that unknown usernames take as long as wrong passwords.
+        make_password(raw_password)
+        return False
+    return check_password(raw_password, encoded)
+
+
+class HashingPool:
+    """
+    Process pool for password hashing and verification, so that this CPU work
+    neither holds the GIL of the web worker nor the event loop. At most
+    `max_pending` jobs are accepted at a time; beyond that `HashingSaturated`
+    is raised so the caller can shed load instead of queueing it.
+    """
+
+    def __init__(self, workers, max_pending):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._lock = Lock()
+        self._executor = None
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker)
+            return self._executor
+
+    async def run(self, function, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise HashingSaturated()
+            self.pending += 1
+        try:
+            return await asyncio.wrap_future(self.executor.submit(function, *args))
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    async def make_password(self, raw_password):
+        return await self.run(make_password, raw_password)
+
+    async def check_password(self, raw_password, encoded):
+        """Returns (is_correct, new_hash); new_hash is set when the stored hash should be upgraded."""
+        is_correct = await self.run(_check, raw_password, encoded)
+        if is_correct and identify_hasher(encoded).must_update(encoded):
+            return True, await self.run(make_password, raw_password)
+        return is_correct, None
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+hashing_pool = HashingPool(
+    workers=settings.PASSWORD_HASHING_WORKERS or os.cpu_count(),
+    max_pending=settings.PASSWORD_HASHING_MAX_PENDING,
+)
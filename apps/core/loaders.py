@@ -0,0 +1,105 @@
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.relations import PrimaryKeyRelatedField
+
+from core.utils import clean_text_for_unique_fields
+
+
+# Lookups that can be batched besides the primary key, with the normalization
+# the models apply to them before saving.
+LOOKUP_NORMALIZERS = {
+    'name': clean_text_for_unique_fields,
+}
+
+
+class ObjectLoader:
+    """
+    Request-scoped identity map. Lookups registered with `want()` are resolved
+    together on the first `get()`, with one `<field>__in` query per model and field.
+    """
+
+    def __init__(self):
+        self._objects = defaultdict(dict)
+        self._missing = defaultdict(set)
+        self._pending = defaultdict(set)
+
+    @staticmethod
+    def lookup_key(model, value):
+        if isinstance(value, dict):
+            if len(value) != 1:
+                return None
+            (field, value), = value.items()
+        else:
+            field = 'pk'
+
+        if field in ('pk', 'id'):
+            if isinstance(value, bool):
+                raise TypeError("A boolean is not a valid primary key.")
+            try:
+                return 'pk', model._meta.pk.to_python(value)
+            except DjangoValidationError as e:
+                raise ValueError(e.messages[0])
+        if field in LOOKUP_NORMALIZERS and hasattr(model, field):
+            if not isinstance(value, str):
+                raise TypeError(f"Expected a string for '{field}'.")
+            return field, LOOKUP_NORMALIZERS[field](value)
+        return None
+
+    def _is_known(self, model, field, value):
+        return value in self._objects[model, field] or value in self._missing[model, field]
+
+    def want(self, model, value):
+        try:
+            key = self.lookup_key(model, value)
+        except (TypeError, ValueError):
+            return
+        if key is not None and not self._is_known(model, *key):
+            self._pending[(model, key[0])].add(key[1])
+
+    def remember(self, model, instance):
+        self._objects[model, 'pk'][instance.pk] = instance
+        for field in LOOKUP_NORMALIZERS:
+            if hasattr(instance, field):
+                self._objects[model, field][getattr(instance, field)] = instance
+
+    def load(self):
+        pending, self._pending = self._pending, defaultdict(set)
+        for (model, field), values in pending.items():
+            for instance in model._default_manager.filter(**{f"{field}__in": values}):
+                self.remember(model, instance)
+            self._missing[model, field].update(values - self._objects[model, field].keys())
+
+    def get(self, model, value):
+        """Returns the instance or None. Raises TypeError/ValueError for malformed values."""
+        key = self.lookup_key(model, value)
+        if key is None:
+            return None
+        field, value = key
+        if not self._is_known(model, field, value):
+            self._pending[(model, field)].add(value)
+            self.load()
+        return self._objects[model, field].get(value)
+
+
+def get_loader(context):
+    if 'loader' not in context:
+        context['loader'] = ObjectLoader()
+    return context['loader']
+
+
+class LoadedPrimaryKeyRelatedField(PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField that resolves through the ObjectLoader of the serializer context."""
+
+    def to_internal_value(self, data):
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        if isinstance(data, (dict, list)):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            instance = get_loader(self.context).get(self.get_queryset().model, data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
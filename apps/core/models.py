@@ -1,3 +1,85 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connections, router, transaction
 
-# Create your models here.
+from core.utils import clean_text_for_unique_fields
+
+
+class DirtyFieldsMixin:
+    """
+    Model mixin that remembers the field values an instance was loaded with.
+
+    save() normalizes (`normalized_fields`) and validates only the fields that
+    changed since then, restricted to `update_fields` when given; new rows
+    are validated entirely. Uniqueness is left to the database: an
+    IntegrityError is turned into the ValidationError that validate_unique()
+    would have raised, so no SELECT runs for it on the way in.
+    """
+    normalized_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot()
+        return instance
+
+    def _snapshot(self, fields=None):
+        # Reads __dict__ so that deferred fields are not loaded.
+        loaded = self.__dict__.setdefault('_loaded_values', {})
+        for field in self._meta.concrete_fields:
+            if (fields is None or field.name in fields or field.attname in fields) and field.attname in self.__dict__:
+                loaded[field.attname] = self.__dict__[field.attname]
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._snapshot(fields)
+
+    def get_dirty_fields(self):
+        """Names of the concrete fields assigned a different value since the instance was loaded or saved."""
+        loaded = self.__dict__.get('_loaded_values')
+        if self._state.adding or loaded is None:
+            return {field.name for field in self._meta.concrete_fields if not field.generated}
+        return {
+            field.name for field in self._meta.concrete_fields
+            if field.attname in self.__dict__ and (
+                field.attname not in loaded or loaded[field.attname] != self.__dict__[field.attname]
+            )
+        }
+
+    def normalize_fields(self, names):
+        for name in self.normalized_fields:
+            if name in names and getattr(self, name):
+                setattr(self, name, clean_text_for_unique_fields(getattr(self, name)))
+
+    def clean(self):
+        self.normalize_fields(self.normalized_fields)
+        super().clean()
+
+    def save(self, *args, **kwargs):
+        changed = self.get_dirty_fields()
+        if kwargs.get('update_fields') is not None:
+            changed &= {self._meta.get_field(name).name for name in kwargs['update_fields']}
+        excluded = {field.name for field in self._meta.concrete_fields} - changed
+        self.normalize_fields(changed)
+        self.clean_fields(exclude=excluded)
+        self._save_checking_integrity(excluded, *args, **kwargs)
+        self._snapshot(kwargs.get('update_fields'))
+
+    def _save_checking_integrity(self, excluded, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        # Inside a transaction the failed statement must be rolled back to a
+        # savepoint, or the lookups below (and everything after) would fail.
+        in_transaction = connections[using].in_atomic_block
+        try:
+            if in_transaction:
+                with transaction.atomic(using=using):
+                    super().save(*args, **kwargs)
+            else:
+                super().save(*args, **kwargs)
+        except IntegrityError as error:
+            try:
+                # Only the fields being written can be the cause.
+                self.validate_unique(exclude=excluded)
+                self.validate_constraints(exclude=excluded)
+            except ValidationError as validation_error:
+                raise validation_error from error
+            raise
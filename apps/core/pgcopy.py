@@ -0,0 +1,29 @@
+from io import StringIO
+
+
+# Escapes of the COPY text format
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def copy_value(value):
+    if value is None:
+        return '\\N'
+    return str(value).translate(COPY_ESCAPES)
+
+
+def copy_rows(cursor, table, columns, rows):
+    """
+    Loads `rows` (tuples in the order of `columns`) into `table` with one
+    `COPY ... FROM STDIN`. Works with psycopg2 and psycopg 3.
+    """
+    buffer = StringIO()
+    buffer.writelines('\t'.join(map(copy_value, row)) + '\n' for row in rows)
+    buffer.seek(0)
+
+    quote_name = cursor.db.ops.quote_name
+    sql = f"COPY {quote_name(table)} ({', '.join(map(quote_name, columns))}) FROM STDIN"
+    if hasattr(cursor.cursor, 'copy_expert'):
+        cursor.copy_expert(sql, buffer)
+    else:
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.getvalue())
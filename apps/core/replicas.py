@@ -0,0 +1,139 @@
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+
+logger = logging.getLogger(__name__)
+
+# Alias reads go to while a replica-safe request is handled; None means the primary.
+read_alias = ContextVar('read_alias', default=None)
+
+PIN_COOKIE = 'db_pinned_until'
+
+# 0 when the replica has replayed everything it received, else the age of the
+# last replayed transaction. Not in recovery (a plain database) reads as 0.
+LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+class ReplicaRouter:
+    """Reads go to the replica picked for the current request, if any; everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db in settings.DATABASE_REPLICAS else None
+
+
+class ReplicaHealth:
+    """
+    Per-process view of which replicas can serve reads. A replica is checked
+    at most every REPLICA_HEALTH_CHECK_INTERVAL seconds and is skipped while
+    it is unreachable or lags more than REPLICA_MAX_LAG_SECONDS behind.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._checked = {}
+
+    def check(self, alias):
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(LAG_QUERY)
+                lag = float(cursor.fetchone()[0])
+        except DatabaseError:
+            logger.warning("Replica %s is unreachable; reading from the primary.", alias, exc_info=True)
+            connections[alias].close()
+            return False
+        if lag > settings.REPLICA_MAX_LAG_SECONDS:
+            logger.warning("Replica %s lags %.1fs behind; reading from the primary.", alias, lag)
+            return False
+        return True
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        with self._lock:
+            healthy, checked_at = self._checked.get(alias, (None, 0.0))
+        if healthy is None or now - checked_at > settings.REPLICA_HEALTH_CHECK_INTERVAL:
+            healthy = self.check(alias)
+            with self._lock:
+                self._checked[alias] = (healthy, now)
+        return healthy
+
+    def reset(self):
+        with self._lock:
+            self._checked.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+def pick_replica():
+    healthy = [alias for alias in settings.DATABASE_REPLICAS if replica_health.is_healthy(alias)]
+    return random.choice(healthy) if healthy else None
+
+
+@contextmanager
+def reads_from(alias):
+    token = read_alias.set(alias)
+    try:
+        yield
+    finally:
+        read_alias.reset(token)
+
+
+### --- READ-YOUR-WRITES --- ###
+
+def pin_key(user_id):
+    return f"db:pinned:{user_id}"
+
+
+def is_pinned(request):
+    """True while the client's own recent writes may not have reached the replicas yet."""
+    try:
+        if float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_authenticated and cache.get(pin_key(user.pk)))
+
+
+class ReplicaPinningMiddleware:
+    """
+    After a write request, pins the client to the primary for REPLICA_PIN_SECONDS:
+    with a cookie, and with a cache marker for authenticated users (API clients
+    often drop cookies).
+    """
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in self.safe_methods and settings.DATABASE_REPLICAS:
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(PIN_COOKIE, str(time.time() + seconds), max_age=seconds, httponly=True, samesite='Lax')
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                cache.set(pin_key(user.pk), True, timeout=seconds)
+        return response
@@ -0,0 +1,80 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+# Lines passed to the event loop per call into the sync thread (see streaming_response)
+ASYNC_BATCH_SIZE = 500
+
+
+class _EchoBuffer:
+    def write(self, value):
+        return value
+
+
+def iter_chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+async def aiterate(iterable):
+    """
+    Iterates a sync iterable from async code, one item per call into the sync
+    thread, e.g. to stream a queryset iterator from an async view.
+    """
+    iterator, done = iter(iterable), object()
+    while (item := await sync_to_async(next)(iterator, done)) is not done:
+        yield item
+
+
+def is_asgi(request):
+    """Whether a Django or DRF request is served by the ASGI handler."""
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+def iter_csv(rows, fields):
+    """Yields CSV lines for dict rows; list values are joined with '|'."""
+    writer = csv.writer(_EchoBuffer())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([
+            "|".join(str(item) for item in value) if isinstance(value, (list, tuple)) else value
+            for value in (row.get(field) for field in fields)
+        ])
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, separators=(',', ':')) + "\n"
+
+
+STREAM_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def iter_output(rows, fields, output):
+    if output == 'csv':
+        return iter_csv(rows, fields)
+    return iter_ndjson(rows)
+
+
+def streaming_response(rows, fields, output, filename, asynchronous=False):
+    """
+    Streams `rows` as CSV or ndjson. Pass asynchronous=True under ASGI: Django
+    reads a sync iterator whole (sync_to_async(list)) before sending it there,
+    so the lines are handed over in batches from an async iterator instead.
+    """
+    content = iter_output(rows, fields, output)
+    if asynchronous:
+        content = aiterate("".join(lines) for lines in iter_chunks(content, ASYNC_BATCH_SIZE))
+    response = StreamingHttpResponse(content, content_type=STREAM_CONTENT_TYPES[output])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{output}"'
+    return response
@@ -1,6 +1,22 @@
+import statistics
 
 
 def clean_text_for_unique_fields(value: str) -> str:
     if not value:
         return value
     return " ".join(value.split()).lower()
+
+
+def percentile(sorted_samples, fraction):
+    return sorted_samples[min(int(len(sorted_samples) * fraction), len(sorted_samples) - 1)]
+
+
+def format_latencies(samples, unit='us'):
+    """Formats durations in seconds as p50/p99/mean in `unit` ('us' or 'ms'), for benchmark output."""
+    scale = {'us': 1e6, 'ms': 1e3}[unit]
+    samples = sorted(samples)
+
+    def pick(fraction):
+        return percentile(samples, fraction) * scale
+
+    return f"p50={pick(0.5):.2f}{unit} p99={pick(0.99):.2f}{unit} mean={statistics.fmean(samples) * scale:.2f}{unit}"
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import BATCH_SIZE, MAX_ATTEMPTS, drain
+
+
+class Command(BaseCommand):
+    help = "Sends the emails waiting in the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="Number of concurrent senders.")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Messages per SMTP connection.")
+        parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS)
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep when the outbox is empty.")
+        parser.add_argument('--once', action='store_true', help="Exit once nothing is due instead of polling.")
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            stats = drain(options['workers'], options['batch_size'], options['max_attempts'])
+            total_sent += stats['sent']
+            total_failed += stats['failed']
+            if stats['sent'] or stats['failed']:
+                self.stdout.write(
+                    f"sent={stats['sent']} failed={stats['failed']} "
+                    f"seconds={stats['seconds']} per_second={stats['per_second']}"
+                )
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {total_sent} sent, {total_failed} failed."))
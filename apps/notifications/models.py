@@ -1,3 +1,39 @@
 from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+
+class OutgoingEmail(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    CHOICES_STATUS = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255, verbose_name=_("Subject"))
+    body = models.TextField(verbose_name=_("Body"))
+    from_email = models.CharField(max_length=255, verbose_name=_("From"))
+    recipients = models.JSONField(default=list, verbose_name=_("Recipients"))
+    status = models.CharField(max_length=10, choices=CHOICES_STATUS, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # When the message may be (re)tried. A worker moves it forward when it claims
+    # the message, so a crashed worker's claims become available again later.
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Created At"))
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Sent At"))
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at', 'id'],
+                condition=models.Q(status='pending'),
+                name='outgoingemail_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)}: {self.status}"
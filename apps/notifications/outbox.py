@@ -0,0 +1,143 @@
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 30  # seconds, doubled on every failed attempt
+BACKOFF_MAX = 60 * 60 * 6
+# How long a claimed message stays invisible to other workers
+CLAIM_LEASE = 60 * 5
+
+
+def enqueue_email(subject, body, recipients, from_email=None):
+    """
+    Stores the message in the outbox. Call it inside the transaction that makes
+    the change the email is about, so both are committed (or not) together.
+    """
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipients),
+    )
+
+
+def get_backoff(attempts):
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    with transaction.atomic():
+        now = timezone.now()
+        messages = list(
+            OutgoingEmail.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmail.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        OutgoingEmail.objects.filter(id__in=[message.id for message in messages]).update(
+            next_attempt_at=now + timedelta(seconds=CLAIM_LEASE)
+        )
+    return messages
+
+
+def record_failure(message, error, max_attempts):
+    message.attempts += 1
+    message.last_error = f"{error.__class__.__name__}: {error}"
+    if message.attempts >= max_attempts:
+        message.status = OutgoingEmail.STATUS_FAILED
+    else:
+        message.next_attempt_at = timezone.now() + get_backoff(message.attempts)
+
+
+def send_batch(messages, max_attempts=MAX_ATTEMPTS):
+    """
+    Sends the messages over one SMTP connection. Returns (sent, failed). When
+    the connection cannot be opened, every message of the batch counts as a
+    failed attempt and is retried with backoff.
+    """
+    sent, failed = [], []
+    smtp = get_connection()
+    try:
+        smtp.open()
+    except Exception as e:
+        logger.warning("Email outbox: cannot connect to the mail server: %s", e)
+        for message in messages:
+            record_failure(message, e, max_attempts)
+        failed = list(messages)
+    else:
+        with smtp:
+            for message in messages:
+                email = EmailMessage(
+                    message.subject, message.body, message.from_email, message.recipients, connection=smtp
+                )
+                try:
+                    email.send(fail_silently=False)
+                except Exception as e:
+                    record_failure(message, e, max_attempts)
+                    failed.append(message)
+                else:
+                    message.status = OutgoingEmail.STATUS_SENT
+                    message.sent_at = timezone.now()
+                    sent.append(message)
+
+    OutgoingEmail.objects.bulk_update(sent, ['status', 'sent_at'])
+    OutgoingEmail.objects.bulk_update(failed, ['status', 'attempts', 'last_error', 'next_attempt_at'])
+    return len(sent), len(failed)
+
+
+def drain_once(batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS):
+    """Claims and sends batches until nothing is due. Returns (sent, failed)."""
+    sent = failed = 0
+    while messages := claim_batch(batch_size):
+        batch_sent, batch_failed = send_batch(messages, max_attempts)
+        sent += batch_sent
+        failed += batch_failed
+    return sent, failed
+
+
+def _worker(batch_size, max_attempts):
+    try:
+        return drain_once(batch_size, max_attempts)
+    finally:
+        connection.close()
+
+
+def drain(workers=1, batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS):
+    """
+    Drains the outbox with up to `workers` threads. SKIP LOCKED keeps them from
+    claiming the same rows. Returns {'sent', 'failed', 'seconds', 'per_second'}.
+    """
+    started = time.monotonic()
+    if workers == 1:
+        sent, failed = drain_once(batch_size, max_attempts)
+    else:
+        close_old_connections()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda _: _worker(batch_size, max_attempts), range(workers)))
+        sent, failed = sum(result[0] for result in results), sum(result[1] for result in results)
+
+    seconds = time.monotonic() - started
+    stats = {
+        'sent': sent,
+        'failed': failed,
+        'seconds': round(seconds, 3),
+        'per_second': round(sent / seconds, 1) if seconds else 0.0,
+    }
+    if sent or failed:
+        logger.info("Email outbox drained: %(sent)s sent, %(failed)s failed, %(per_second)s/s", stats)
+    return stats
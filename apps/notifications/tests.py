@@ -1,3 +1,72 @@
-from django.test import TestCase
+from smtplib import SMTPException
 
-# Create your tests here.
+import pytest
+from django.core import mail
+from django.core.mail import EmailMessage
+
+from notifications.models import OutgoingEmail
+from notifications.outbox import drain, enqueue_email
+from users.models import CustomUser
+from users.services import send_email_confirmation
+
+
+@pytest.mark.django_db
+def test_confirmation_email_is_queued_and_sent_by_the_worker():
+    user = CustomUser.objects.create_user("loner", "loner@example.com", "password")
+
+    send_email_confirmation(user)
+    assert len(mail.outbox) == 0
+
+    stats = drain()
+    assert stats["sent"] == 1
+    assert mail.outbox[0].to == ["loner@example.com"]
+    assert OutgoingEmail.objects.get().status == OutgoingEmail.STATUS_SENT
+
+
+@pytest.mark.django_db
+def test_failed_email_is_retried_with_backoff_then_given_up(monkeypatch):
+    message = enqueue_email("Subject", "Body", ["broken@example.com"])
+
+    def fail(self, fail_silently=False):
+        raise SMTPException("relay unavailable")
+    monkeypatch.setattr(EmailMessage, "send", fail)
+
+    assert drain()["failed"] == 1
+    message.refresh_from_db()
+    assert message.status == OutgoingEmail.STATUS_PENDING and message.attempts == 1
+    assert drain()["failed"] == 0  # not due yet
+
+    OutgoingEmail.objects.update(next_attempt_at=message.created_at)
+    assert drain(max_attempts=2)["failed"] == 1
+    message.refresh_from_db()
+    assert message.status == OutgoingEmail.STATUS_FAILED
+    assert "relay unavailable" in message.last_error
+
+
+
+@pytest.mark.django_db
+def test_unreachable_mail_server_backs_off_the_whole_batch(monkeypatch):
+    for number in range(3):
+        enqueue_email("Subject", "Body", [f"user{number}@example.com"])
+
+    def refuse(self):
+        raise ConnectionRefusedError("connection refused")
+    monkeypatch.setattr(mail.get_connection().__class__, "open", refuse)
+
+    stats = drain(batch_size=2)
+
+    assert stats["sent"] == 0 and stats["failed"] == 3
+    for message in OutgoingEmail.objects.all():
+        assert message.status == OutgoingEmail.STATUS_PENDING and message.attempts == 1
+        assert "connection refused" in message.last_error
+        assert message.next_attempt_at > message.created_at
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_workers_send_every_email_once():
+    for number in range(40):
+        enqueue_email("Subject", "Body", [f"user{number}@example.com"])
+
+    stats = drain(workers=4, batch_size=5)
+
+    assert stats["sent"] == 40
+    assert sorted(message.to[0] for message in mail.outbox) == sorted(f"user{n}@example.com" for n in range(40))
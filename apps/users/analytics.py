@@ -0,0 +1,67 @@
+from collections import defaultdict
+
+from django.db.models import Count
+
+from core.streaming import iter_chunks
+
+from .models import CustomUser, UserSkill, Skill
+
+
+def get_cohort(profession=None, joined_from=None, joined_to=None):
+    cohort = CustomUser.objects.all()
+    if profession is not None:
+        cohort = cohort.filter(user_professions__profession=profession)
+    if joined_from is not None:
+        cohort = cohort.filter(date_joined__date__gte=joined_from)
+    if joined_to is not None:
+        cohort = cohort.filter(date_joined__date__lte=joined_to)
+    return cohort
+
+
+def get_skill_gaps(cohort, profession):
+    """
+    For each required skill of `profession`, how many users of the cohort
+    have it and how many miss it. Counting is done by the database.
+    """
+    cohort_size = cohort.count()
+    required = Skill.objects.filter(professions=profession).order_by('name').values_list('id', 'name')
+    holders = dict(
+        UserSkill.objects
+        .filter(user__in=cohort.values('id'), skill__professions=profession)
+        .values('skill')
+        .annotate(holders=Count('id'))
+        .values_list('skill', 'holders')
+    )
+
+    gaps = []
+    for skill_id, name in required:
+        missing = cohort_size - holders.get(skill_id, 0)
+        gaps.append({
+            'skill_id': skill_id,
+            'skill_name': name,
+            'holders': holders.get(skill_id, 0),
+            'missing': missing,
+            'missing_ratio': round(missing / cohort_size, 4) if cohort_size else 0.0,
+        })
+    gaps.sort(key=lambda gap: -gap['missing'])
+    return {'cohort_size': cohort_size, 'skills': gaps}
+
+
+def iter_user_skill_gaps(cohort, profession, chunk_size=2000):
+    """
+    Yields the missing required skills of every cohort user. Users are read
+    with a server-side cursor and their skills one chunk at a time, so memory
+    does not grow with the size of the cohort.
+    """
+    required = set(profession.required_skills.values_list('id', flat=True))
+    users = cohort.order_by('id').values_list('id', 'username').iterator(chunk_size=chunk_size)
+
+    for chunk in iter_chunks(users, chunk_size):
+        owned = defaultdict(set)
+        user_skills = UserSkill.objects.filter(user_id__in=[user_id for user_id, _ in chunk], skill_id__in=required)
+        for user_id, skill_id in user_skills.values_list('user_id', 'skill_id'):
+            owned[user_id].add(skill_id)
+
+        for user_id, username in chunk:
+            missing = sorted(required - owned[user_id])
+            yield {'user_id': user_id, 'username': username, 'missing_count': len(missing), 'missing_skills': missing}
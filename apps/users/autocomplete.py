@@ -0,0 +1,144 @@
+import heapq
+import time
+from bisect import bisect_left
+from threading import Lock, RLock
+
+from django.conf import settings
+
+from core.utils import clean_text_for_unique_fields
+
+from .models import Skill, Profession
+
+
+class PrefixIndex:
+    """
+    Sorted-array prefix index over normalized names. Every word start of a name
+    is an entry, so "learn" finds "machine learning". Matches are ordered by
+    weight (how many users hold the skill/profession), then by name.
+    """
+    # Results for prefixes up to this length match a large part of the index,
+    # so they are memoized until the next change.
+    memo_prefix_length = 2
+    # Sorts after every character a name can continue with
+    upper_bound = chr(0x10FFFF)
+
+    def __init__(self, model):
+        self.model = model
+        self._lock = RLock()
+        # Held by the one request that rebuilds the index
+        self._build_lock = Lock()
+        self._memo = {}
+        self.built_at = None
+
+    def build(self):
+        rows = self.model.objects.values_list('id', 'name', 'holder_count')
+        entries, names, weights = [], {}, {}
+        for object_id, name, weight in rows.iterator(chunk_size=5000):
+            names[object_id] = name
+            weights[object_id] = weight
+            entries.extend(self._entries(object_id, name))
+        entries.sort()
+
+        with self._lock:
+            self.entries, self.names, self.weights = entries, names, weights
+            self.keys = [key for key, _ in entries]
+            self._memo = {}
+            self.built_at = time.monotonic()
+
+    def is_current(self):
+        max_age = settings.AUTOCOMPLETE_MAX_AGE
+        return self.built_at is not None and not (max_age and time.monotonic() - self.built_at > max_age)
+
+    def ensure_built(self):
+        """
+        Builds the index on first use, once. Later rebuilds (expired or
+        invalidated) are done by one request while the others keep searching
+        the current index.
+        """
+        if self.is_current():
+            return
+        if not hasattr(self, 'entries'):
+            with self._build_lock:
+                if not hasattr(self, 'entries'):
+                    self.build()
+        elif self._build_lock.acquire(blocking=False):
+            try:
+                if not self.is_current():
+                    self.build()
+            finally:
+                self._build_lock.release()
+
+    @staticmethod
+    def _entries(object_id, name):
+        words = name.split(' ')
+        return [(' '.join(words[index:]), object_id) for index in range(len(words))]
+
+    ### --- INCREMENTAL UPDATES --- ###
+
+    def remove(self, object_id):
+        with self._lock:
+            if self.built_at is None or object_id not in self.names:
+                return
+            self._memo = {}
+            for entry in self._entries(object_id, self.names.pop(object_id)):
+                position = bisect_left(self.entries, entry)
+                if position < len(self.entries) and self.entries[position] == entry:
+                    del self.entries[position]
+                    del self.keys[position]
+            self.weights.pop(object_id, None)
+
+    def upsert(self, object_id, name):
+        with self._lock:
+            if self.built_at is None or self.names.get(object_id) == name:
+                return
+            self.remove(object_id)
+            self._memo = {}
+            self.names[object_id] = name
+            self.weights.setdefault(object_id, 0)
+            for entry in self._entries(object_id, name):
+                position = bisect_left(self.entries, entry)
+                self.entries.insert(position, entry)
+                self.keys.insert(position, entry[0])
+
+    def add_weight(self, object_id, delta):
+        with self._lock:
+            if self.built_at is not None and object_id in self.weights:
+                self.weights[object_id] = max(self.weights[object_id] + delta, 0)
+                self._memo = {}
+
+    def invalidate(self):
+        with self._lock:
+            self.built_at = None
+
+    ### --- LOOKUP --- ###
+
+    def search(self, prefix, limit=10):
+        prefix = clean_text_for_unique_fields(prefix)
+        if not prefix:
+            return []
+        self.ensure_built()
+
+        with self._lock:
+            memo_key = (prefix, limit)
+            if memo_key in self._memo:
+                return self._memo[memo_key]
+
+            start = bisect_left(self.keys, prefix)
+            end = bisect_left(self.keys, prefix + self.upper_bound, lo=start)
+            matches = {object_id for _, object_id in self.entries[start:end]}
+            best = heapq.nsmallest(
+                limit, matches, key=lambda object_id: (-self.weights[object_id], self.names[object_id])
+            )
+            results = [
+                {'id': object_id, 'name': self.names[object_id], 'weight': self.weights[object_id]}
+                for object_id in best
+            ]
+            if len(prefix) <= self.memo_prefix_length:
+                self._memo[memo_key] = results
+            return results
+
+
+AUTOCOMPLETE_INDEXES = {
+    'skills': PrefixIndex(Skill),
+    'professions': PrefixIndex(Profession),
+}
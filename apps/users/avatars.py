@@ -0,0 +1,153 @@
+import hashlib
+import logging
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import PurePosixPath
+from threading import Lock
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import StopUpload, TemporaryFileUploadHandler
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from core.hashing import init_worker
+
+
+logger = logging.getLogger(__name__)
+
+# Pillow format -> stored extension of accepted uploads
+AVATAR_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+VARIANT_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+
+def original_name(digest, extension):
+    return f"avatars/{digest[:2]}/{digest}.{extension}"
+
+
+def variant_name(name, size, variant_format):
+    path = PurePosixPath(name)
+    return str(path.with_name(f"{path.stem}-{size}.{variant_format}"))
+
+
+def variant_urls(name):
+    """{size: {format: url}} for a stored avatar; originals are never exposed."""
+    if not name:
+        return None
+    return {
+        str(size): {
+            variant_format: default_storage.url(variant_name(name, size, variant_format))
+            for variant_format in VARIANT_FORMATS
+        }
+        for size in settings.AVATAR_SIZES
+    }
+
+
+def variants_ready(name):
+    return all(
+        default_storage.exists(variant_name(name, size, variant_format))
+        for size in settings.AVATAR_SIZES for variant_format in VARIANT_FORMATS
+    )
+
+
+### --- UPLOAD --- ###
+
+class AvatarUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams the upload to a temporary file, hashing it on the way, and stops
+    reading as soon as it grows past AVATAR_MAX_BYTES.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Stays 0 when the request has no file part (empty or non-multipart body).
+        self.received = 0
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.AVATAR_MAX_BYTES:
+            self.file.close()
+            raise StopUpload(connection_reset=True)
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        uploaded.sha256 = self.sha256.hexdigest()
+        return uploaded
+
+
+def store_avatar(uploaded):
+    """
+    Validates an upload received through AvatarUploadHandler and stores it
+    under its content hash. Identical images are stored once. Returns the name.
+    """
+    try:
+        with Image.open(uploaded) as image:
+            image_format = image.format
+            width, height = image.size
+            image.verify()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError):
+        raise ValidationError("Upload a valid JPEG, PNG or WebP image.")
+    if image_format not in AVATAR_FORMATS:
+        raise ValidationError("Upload a valid JPEG, PNG or WebP image.")
+    if width * height > settings.AVATAR_MAX_PIXELS:
+        raise ValidationError("The image is too large.")
+
+    name = original_name(uploaded.sha256, AVATAR_FORMATS[image_format])
+    if not default_storage.exists(name):
+        uploaded.seek(0)
+        default_storage.save(name, uploaded)
+    return name
+
+
+### --- VARIANTS --- ###
+
+def render_variants(name):
+    """Writes the missing resized variants of a stored avatar. Runs in the avatar process pool."""
+    written = []
+    missing = [
+        (size, variant_format) for size in settings.AVATAR_SIZES for variant_format in VARIANT_FORMATS
+        if not default_storage.exists(variant_name(name, size, variant_format))
+    ]
+    if not missing:
+        return written
+
+    with default_storage.open(name) as original, Image.open(original) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        for size, variant_format in missing:
+            buffer = BytesIO()
+            variant = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            variant.save(buffer, VARIANT_FORMATS[variant_format], quality=settings.AVATAR_QUALITY)
+            written.append(default_storage.save(variant_name(name, size, variant_format), ContentFile(buffer.getvalue())))
+    return written
+
+
+_executor = None
+_executor_lock = Lock()
+
+
+def get_avatar_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=settings.AVATAR_WORKERS, initializer=init_worker)
+        return _executor
+
+
+def _log_failure(future):
+    if future.exception() is not None:
+        logger.error("Rendering avatar variants failed.", exc_info=future.exception())
+
+
+def schedule_variants(name):
+    """Renders the variants in the background; build_avatar_variants catches anything lost."""
+    future = get_avatar_executor().submit(render_variants, name)
+    future.add_done_callback(_log_failure)
+    return future
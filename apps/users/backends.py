@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from core.hashing import hashing_pool
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend whose async path verifies the password in core.hashing's
+    process pool, so aauthenticate() neither holds the event loop nor the GIL.
+    Raises HashingSaturated when the pool is full. The sync path is unchanged.
+    """
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await UserModel._default_manager.aget_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            user = None
+
+        # Unknown usernames are hashed too, so they take as long as wrong passwords.
+        is_correct, new_hash = await hashing_pool.check_password(password, user.password if user else None)
+        if not is_correct:
+            return None
+        if new_hash is not None:
+            user.password = new_hash
+            await user.asave(update_fields=['password'])
+        return user if self.user_can_authenticate(user) else None
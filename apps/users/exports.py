@@ -0,0 +1,42 @@
+from collections import defaultdict
+
+from core.streaming import iter_chunks
+
+from .models import UserSkill, UserProfession
+
+
+USER_EXPORT_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name', 'role',
+    'is_active', 'is_email_verified', 'date_joined', 'skills', 'professions',
+)
+
+# (relation model, related name field, export column)
+USER_EXPORT_RELATIONS = (
+    (UserSkill, 'skill__name', 'skills'),
+    (UserProfession, 'profession__name', 'professions'),
+)
+
+
+def iter_user_export(users, chunk_size=2000, using=None):
+    """
+    Yields every user of `users` with the names of their skills and
+    professions. Users are read with a server-side cursor and their relations
+    are fetched one chunk of users at a time, so memory stays flat no matter
+    how many users are exported.
+    """
+    columns = [field for field in USER_EXPORT_FIELDS if field not in ('skills', 'professions')]
+    rows = users.using(using).order_by('id').values(*columns).iterator(chunk_size=chunk_size)
+
+    for chunk in iter_chunks(rows, chunk_size):
+        user_ids = [row['id'] for row in chunk]
+        related = {}
+        for model, name_field, column in USER_EXPORT_RELATIONS:
+            names = related[column] = defaultdict(list)
+            pairs = model.objects.using(using).filter(user_id__in=user_ids).order_by('user_id', name_field)
+            for user_id, name in pairs.values_list('user_id', name_field):
+                names[user_id].append(name)
+
+        for row in chunk:
+            for column, names in related.items():
+                row[column] = names.get(row['id'], [])
+            yield row
@@ -0,0 +1,179 @@
+import random
+from datetime import date, datetime, timedelta, timezone
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from core.pgcopy import copy_rows
+
+from .models import CustomUser, SkillType, Skill, ProfessionType, Profession, UserSkill, UserProfession
+
+
+# Number of users of each named scale; the taxonomy grows with it.
+SCALES = {
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+
+# Every generated user logs in with this password; the first one is an admin.
+BENCH_PASSWORD = "bench-password"
+
+WORDS = (
+    "data", "cloud", "web", "mobile", "security", "network", "design", "product", "machine", "learning",
+    "analysis", "backend", "frontend", "systems", "quality", "testing", "database", "platform", "growth",
+    "content", "research", "support", "sales", "finance", "project", "management", "operations", "embedded",
+    "graphics", "audio", "game", "robotics", "hardware", "legal", "marketing", "people", "vision", "language",
+)
+FIRST_NAMES = ("alex", "maria", "ivan", "olga", "sam", "nina", "li", "omar", "anna", "john", "sofia", "max")
+LAST_NAMES = ("smith", "ivanova", "garcia", "kim", "novak", "ali", "brown", "petrov", "silva", "chen")
+
+EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+HISTORY = timedelta(days=3 * 365)
+
+
+class GraphGenerator:
+    """
+    Generates a reproducible users/taxonomy graph for benchmarks: skill and
+    profession types, skills, professions with their required skills, users
+    and the skills and professions they hold.
+
+    The same `users` and `seed` always produce the same rows. Popularity is
+    skewed (a few skills are held by many users, most by few), as in real
+    data. Rows are written with COPY in batches, ids are reserved from the
+    tables' sequences so relations can be built without reading them back,
+    and the tables are analyzed at the end. holder_count is maintained by
+    the database triggers. Names start with `prefix`, so a graph can be
+    generated next to existing data, but only once per prefix.
+    """
+
+    def __init__(self, users, seed=0, prefix='bench', batch_size=20000, using=DEFAULT_DB_ALIAS):
+        self.users = users
+        self.seed = seed
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.using = using
+        self.counts = {}
+
+        self.sizes = {
+            SkillType: max(users // 2000, 5),
+            Skill: max(users // 20, 50),
+            ProfessionType: max(users // 5000, 3),
+            Profession: max(users // 100, 20),
+            CustomUser: users,
+        }
+
+    @classmethod
+    def for_scale(cls, scale, **kwargs):
+        return cls(SCALES[scale], **kwargs)
+
+    def run(self):
+        """Writes the graph in one transaction and returns the number of rows per model."""
+        self.random = random.Random(self.seed)
+        with transaction.atomic(using=self.using), connections[self.using].cursor() as cursor:
+            self.cursor = cursor
+            skill_types = self.generate_types(SkillType)
+            profession_types = self.generate_types(ProfessionType)
+            skills = self.generate_taxonomy(Skill, 'skill_type', skill_types)
+            professions = self.generate_taxonomy(Profession, 'profession_type', profession_types)
+            self.generate_required_skills(professions, skills)
+            self.generate_users(skills, professions)
+            for model in (*self.sizes, UserSkill, UserProfession, Profession.required_skills.through):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+        return self.counts
+
+    ### --- HELPERS --- ###
+
+    def reserve_ids(self, model, count):
+        self.cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+            [model._meta.db_table, model._meta.pk.column, count],
+        )
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def copy(self, model, fields, rows):
+        columns = [model._meta.get_field(name).column for name in fields]
+        copy_rows(self.cursor, model._meta.db_table, columns, rows)
+        self.counts[model._meta.label] = self.counts.get(model._meta.label, 0) + len(rows)
+
+    def skewed(self, population):
+        """A sampler of `population` favouring its first items (Zipf-like)."""
+        cum_weights = list(accumulate(1 / (rank + 1) ** 1.1 for rank in range(len(population))))
+
+        def sample(count):
+            picks = self.random.choices(population, cum_weights=cum_weights, k=count)
+            return list(dict.fromkeys(picks))
+        return sample
+
+    def sentence(self, low, high):
+        return " ".join(self.random.choices(WORDS, k=self.random.randint(low, high)))
+
+    def moment(self, after=EPOCH):
+        return after + timedelta(seconds=self.random.randrange(int((EPOCH + HISTORY - after).total_seconds()) + 1))
+
+    ### --- TAXONOMY --- ###
+
+    def generate_types(self, model):
+        ids = self.reserve_ids(model, self.sizes[model])
+        label = model._meta.verbose_name.lower()
+        rows = [(pk, f"{self.prefix} {label} {index}", self.sentence(3, 10)) for index, pk in enumerate(ids)]
+        self.copy(model, ('id', 'name', 'description'), rows)
+        return ids
+
+    def generate_taxonomy(self, model, type_field, type_ids):
+        ids = self.reserve_ids(model, self.sizes[model])
+        label = model._meta.verbose_name.lower()
+        pick_type = self.skewed(type_ids)
+        rows = [
+            (pk, f"{self.prefix} {self.sentence(1, 2)} {label} {index}", self.sentence(5, 25), pick_type(1)[0], 0)
+            for index, pk in enumerate(ids)
+        ]
+        self.copy(model, ('id', 'name', 'description', type_field, 'holder_count'), rows)
+        # Popularity does not follow creation order.
+        popular = ids[:]
+        self.random.shuffle(popular)
+        return popular
+
+    def generate_required_skills(self, professions, skills):
+        through = Profession.required_skills.through
+        field = Profession._meta.get_field('required_skills')
+        pick_skills = self.skewed(skills)
+        rows = [
+            (profession, skill) for profession in professions
+            for skill in pick_skills(self.random.randint(3, 12))
+        ]
+        copy_rows(self.cursor, through._meta.db_table, (field.m2m_column_name(), field.m2m_reverse_name()), rows)
+        self.counts[through._meta.label] = len(rows)
+
+    ### --- USERS --- ###
+
+    def generate_users(self, skills, professions):
+        password = make_password(BENCH_PASSWORD)
+        pick_skills, pick_professions = self.skewed(skills), self.skewed(professions)
+        user_fields = (
+            'id', 'password', 'is_superuser', 'username', 'first_name', 'last_name', 'email', 'is_staff',
+            'is_active', 'date_joined', 'bio', 'role', 'birth_date', 'is_email_verified', 'claims_version',
+        )
+
+        for start in range(0, self.users, self.batch_size):
+            ids = self.reserve_ids(CustomUser, min(self.batch_size, self.users - start))
+            users, user_skills, user_professions = [], [], []
+            for number, pk in enumerate(ids, start):
+                username = f"{self.prefix}-admin" if number == 0 else f"{self.prefix}{number}"
+                joined = self.moment()
+                users.append((
+                    pk, password, False, username, self.random.choice(FIRST_NAMES), self.random.choice(LAST_NAMES),
+                    f"{username}@example.com", number == 0, True, joined,
+                    self.sentence(5, 30) if self.random.random() < 0.3 else None,
+                    'admin' if number == 0 else 'user',
+                    date(1960, 1, 1) + timedelta(days=self.random.randrange(45 * 365)) if self.random.random() < 0.7 else None,
+                    self.random.random() < 0.8, 0,
+                ))
+                user_skills.extend((pk, skill, self.moment(joined)) for skill in pick_skills(self.random.randint(0, 10)))
+                user_professions.extend(
+                    (pk, profession, self.moment(joined)) for profession in pick_professions(self.random.randint(0, 3))
+                )
+            self.copy(CustomUser, user_fields, users)
+            self.copy(UserSkill, ('user', 'skill', 'added_at'), user_skills)
+            self.copy(UserProfession, ('user', 'profession', 'assigned_at'), user_professions)
@@ -0,0 +1,183 @@
+import csv
+import json
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from core.pgcopy import copy_rows
+from core.streaming import iter_chunks
+from core.utils import clean_text_for_unique_fields
+
+from .models import SkillType, Skill, ProfessionType, Profession
+
+
+def read_records(path, file_format=None):
+    """Yields dicts from a CSV file with a header or a JSON Lines file, one line at a time."""
+    if file_format is None:
+        file_format = 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+    with open(path, newline='', encoding='utf-8') as file:
+        if file_format == 'csv':
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _clean(value):
+    return clean_text_for_unique_fields(value) if isinstance(value, str) else None
+
+
+class TaxonomyImporter:
+    """
+    Merges skills, professions and required-skill edges into the taxonomy with
+    set-based SQL instead of one save() per row.
+
+    Records are read in batches, normalized the way the models' clean() does
+    it and copied into temporary tables with COPY. Each table is then merged
+    with a single `INSERT ... SELECT ... ON CONFLICT` statement; when a name
+    occurs more than once, the last record wins. Edges are only ever added.
+
+    skills/professions records: {"name", "type", "description"}
+    required_skills records: {"profession", "skill"} (names)
+    """
+    # model, type foreign key, staging table
+    taxonomies = {
+        'skills': (Skill, 'skill_type', 'import_skill'),
+        'professions': (Profession, 'profession_type', 'import_profession'),
+    }
+    edge_table = 'import_required_skill'
+    # Which model changed when the counters of a kind report writes
+    kind_models = {
+        'skill_types': SkillType,
+        'skills': Skill,
+        'profession_types': ProfessionType,
+        'professions': Profession,
+        'required_skills': Profession,
+    }
+
+    def __init__(self, batch_size=10000, using=DEFAULT_DB_ALIAS):
+        self.batch_size = batch_size
+        self.using = using
+        self.stats = {}
+
+    def run(self, skills=(), professions=(), required_skills=()):
+        """Imports the record iterables in one transaction and returns per-kind counters."""
+        with transaction.atomic(using=self.using), connections[self.using].cursor() as cursor:
+            self.cursor = cursor
+            for kind, records in (('skills', skills), ('professions', professions)):
+                self.stage_taxonomy(kind, records)
+                self.merge_taxonomy(kind)
+            self.stage_edges(required_skills)
+            self.merge_edges()
+        return self.stats
+
+    def _counters(self, kind):
+        return self.stats.setdefault(kind, {'read': 0, 'skipped': 0, 'staged': 0, 'inserted': 0, 'updated': 0})
+
+    def _analyze(self, table):
+        # Autovacuum never analyzes temporary tables, and the merge plans need row counts.
+        self.cursor.execute(f"ANALYZE {table}")
+
+    ### --- STAGING --- ###
+
+    def normalize_taxonomy_batch(self, model, records, first_line, counters):
+        """Returns the valid rows of a batch, keeping the last record for each name."""
+        name_length = model._meta.get_field('name').max_length
+        description_length = model._meta.get_field('description').max_length
+        rows = {}
+        for line, record in enumerate(records, first_line):
+            name, type_name, description = (_clean(record.get(key)) for key in ('name', 'type', 'description'))
+            if (
+                not name or not type_name or len(name) > name_length or len(type_name) > name_length
+                or (description and len(description) > description_length)
+            ):
+                counters['skipped'] += 1
+                continue
+            rows[name] = (line, name, type_name, description or None)
+        return list(rows.values())
+
+    def stage_taxonomy(self, kind, records):
+        model, _, table = self.taxonomies[kind]
+        counters = self._counters(kind)
+        self.cursor.execute(
+            f"CREATE TEMPORARY TABLE {table} (line bigint, name text, type text, description text) ON COMMIT DROP"
+        )
+        for batch in iter_chunks(records, self.batch_size):
+            rows = self.normalize_taxonomy_batch(model, batch, counters['read'], counters)
+            copy_rows(self.cursor, table, ('line', 'name', 'type', 'description'), rows)
+            counters['read'] += len(batch)
+            counters['staged'] += len(rows)
+        self._analyze(table)
+
+    def stage_edges(self, records):
+        counters = self._counters('required_skills')
+        self.cursor.execute(f"CREATE TEMPORARY TABLE {self.edge_table} (profession text, skill text) ON COMMIT DROP")
+        for batch in iter_chunks(records, self.batch_size):
+            pairs = [(_clean(record.get('profession')), _clean(record.get('skill'))) for record in batch]
+            rows = {pair for pair in pairs if all(pair)}
+            counters['read'] += len(batch)
+            counters['skipped'] += sum(1 for pair in pairs if not all(pair))
+            copy_rows(self.cursor, self.edge_table, ('profession', 'skill'), rows)
+            counters['staged'] += len(rows)
+        self._analyze(self.edge_table)
+
+    ### --- MERGING --- ###
+
+    def _upsert(self, sql):
+        """Runs an INSERT ... ON CONFLICT and returns (inserted, updated) row counts."""
+        self.cursor.execute(
+            f"WITH upserted AS ({sql} RETURNING (xmax = 0) AS inserted) "
+            "SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted"
+        )
+        return self.cursor.fetchone()
+
+    def merge_taxonomy(self, kind):
+        model, type_field, table = self.taxonomies[kind]
+        type_model = model._meta.get_field(type_field).related_model
+        type_kind = f"{type_field}s"
+        type_table, model_table = type_model._meta.db_table, model._meta.db_table
+        type_column = model._meta.get_field(type_field).column
+        counters = self._counters(kind)
+
+        types_inserted, _ = self._upsert(
+            f"INSERT INTO {type_table} (name) SELECT DISTINCT type FROM {table} ON CONFLICT (name) DO NOTHING"
+        )
+        self._counters(type_kind)['inserted'] += types_inserted
+
+        counters['inserted'], counters['updated'] = self._upsert(
+            f"""
+            INSERT INTO {model_table} AS target (name, description, {type_column}, holder_count)
+            SELECT DISTINCT ON (staged.name) staged.name, staged.description, types.id, 0
+            FROM {table} AS staged JOIN {type_table} AS types ON types.name = staged.type
+            ORDER BY staged.name, staged.line DESC
+            ON CONFLICT (name) DO UPDATE
+            SET description = EXCLUDED.description, {type_column} = EXCLUDED.{type_column}
+            WHERE (target.description, target.{type_column})
+                IS DISTINCT FROM (EXCLUDED.description, EXCLUDED.{type_column})
+            """
+        )
+
+    def merge_edges(self):
+        through = Profession.required_skills.through
+        field = Profession._meta.get_field('required_skills')
+        source, target = field.m2m_column_name(), field.m2m_reverse_name()
+        counters = self._counters('required_skills')
+
+        # Edges whose profession or skill does not exist are left out by the joins.
+        counters['inserted'], _ = self._upsert(
+            f"""
+            INSERT INTO {through._meta.db_table} ({source}, {target})
+            SELECT professions.id, skills.id
+            FROM {self.edge_table} AS staged
+            JOIN {Profession._meta.db_table} AS professions ON professions.name = staged.profession
+            JOIN {Skill._meta.db_table} AS skills ON skills.name = staged.skill
+            ON CONFLICT ({source}, {target}) DO NOTHING
+            """
+        )
+
+    def written_models(self):
+        """The models whose rows changed, for cache invalidation."""
+        return list(dict.fromkeys(
+            self.kind_models[kind] for kind, counters in self.stats.items()
+            if counters['inserted'] or counters['updated']
+        ))
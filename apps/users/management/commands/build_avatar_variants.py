@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from users.avatars import get_avatar_executor, render_variants
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Renders the avatar variants that are missing, e.g. after a worker died or AVATAR_SIZES changed."
+
+    def handle(self, *args, **options):
+        names = (
+            CustomUser.objects.exclude(avatar__isnull=True).exclude(avatar='')
+            .order_by().values_list('avatar', flat=True).distinct()
+        )
+        written = 0
+        for variants in get_avatar_executor().map(render_variants, names.iterator(), chunksize=16):
+            written += len(variants)
+        self.stdout.write(self.style.SUCCESS(f"Rendered {written} variants."))
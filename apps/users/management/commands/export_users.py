@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from core.replicas import pick_replica
+from core.streaming import iter_output
+
+from users.exports import USER_EXPORT_FIELDS, iter_user_export
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Streams all users with their skills and professions as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=('ndjson', 'csv'), default='ndjson')
+        parser.add_argument('--output', help="File to write to. Defaults to stdout.")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--database', help="Database alias to read from. Defaults to a healthy replica.")
+
+    def handle(self, *args, **options):
+        rows = iter_user_export(
+            CustomUser.objects.all(), chunk_size=options['chunk_size'], using=options['database'] or pick_replica()
+        )
+        content = iter_output(rows, USER_EXPORT_FIELDS, options['format'])
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as file:
+                file.writelines(content)
+            self.stdout.write(self.style.SUCCESS(f"Exported users to {options['output']}."))
+        else:
+            for line in content:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Skill, Profession, UserSkill, UserProfession
+
+
+COUNTERS = (
+    (Skill, UserSkill, 'skill'),
+    (Profession, UserProfession, 'profession'),
+)
+
+
+class Command(BaseCommand):
+    help = "Recounts Skill/Profession.holder_count and repairs the rows that drifted."
+
+    def handle(self, *args, **options):
+        for model, relation, field in COUNTERS:
+            actual = Coalesce(Subquery(
+                relation.objects.filter(**{field: OuterRef('pk')})
+                .order_by().values(field).annotate(count=Count('*')).values('count')
+            ), 0)
+            drifted = model.objects.annotate(actual=actual).exclude(holder_count=F('actual'))
+            repaired = model.objects.filter(pk__in=drifted.values('pk')).update(holder_count=actual)
+            self.stdout.write(self.style.SUCCESS(f"{model.__name__}: repaired {repaired} counters."))
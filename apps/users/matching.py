@@ -0,0 +1,165 @@
+from threading import RLock
+
+import numpy as np
+
+from core.replicas import reads_from
+
+from .models import Profession, UserSkill
+
+
+class ProfessionMatcher:
+    """
+    In-memory profession x skill incidence index.
+
+    Every profession is a row; `postings` maps a skill id to the rows that
+    require it and `required` holds the number of required skills per row.
+    Scoring a user is a `bincount` over the postings of the skills they have,
+    so all professions are ranked at once without touching the database.
+    """
+
+    def __init__(self, version=None):
+        self.version = version
+        self._lock = RLock()
+        self.build()
+
+    def build(self):
+        professions = list(Profession.objects.order_by('id').values_list('id', 'name'))
+        edges = Profession.required_skills.through.objects.values_list('profession_id', 'skill_id')
+
+        with self._lock:
+            self.profession_ids = [profession_id for profession_id, _ in professions]
+            self.profession_names = [name for _, name in professions]
+            self.rows = {profession_id: row for row, profession_id in enumerate(self.profession_ids)}
+            self.skills = [set() for _ in professions]
+            for profession_id, skill_id in edges.iterator(chunk_size=10000):
+                self.skills[self.rows[profession_id]].add(skill_id)
+            self._reindex()
+
+    def _reindex(self):
+        postings = {}
+        for row, skill_ids in enumerate(self.skills):
+            for skill_id in skill_ids:
+                postings.setdefault(skill_id, []).append(row)
+        self.postings = {skill_id: np.array(rows, dtype=np.int32) for skill_id, rows in postings.items()}
+        self.required = np.array([len(skill_ids) for skill_ids in self.skills], dtype=np.int32)
+
+    ### --- INCREMENTAL UPDATES --- ###
+
+    def _set_skills(self, row, new_skills):
+        old_skills = self.skills[row]
+        for skill_id in old_skills - new_skills:
+            rows = self.postings[skill_id]
+            rows = rows[rows != row]
+            if rows.size:
+                self.postings[skill_id] = rows
+            else:
+                del self.postings[skill_id]
+        for skill_id in new_skills - old_skills:
+            self.postings[skill_id] = np.append(self.postings.get(skill_id, np.empty(0, dtype=np.int32)), row)
+        self.skills[row] = set(new_skills)
+        self.required[row] = len(new_skills)
+
+    def update_professions(self, profession_ids):
+        profession_ids = set(profession_ids)
+        found = dict(Profession.objects.filter(id__in=profession_ids).values_list('id', 'name'))
+        edges = Profession.required_skills.through.objects.filter(profession_id__in=found)
+        skills = {profession_id: set() for profession_id in found}
+        for profession_id, skill_id in edges.values_list('profession_id', 'skill_id'):
+            skills[profession_id].add(skill_id)
+
+        with self._lock:
+            for profession_id in profession_ids:
+                row = self.rows.get(profession_id)
+                if row is None:
+                    if profession_id not in found:
+                        continue
+                    row = len(self.profession_ids)
+                    self.rows[profession_id] = row
+                    self.profession_ids.append(profession_id)
+                    self.profession_names.append(found[profession_id])
+                    self.skills.append(set())
+                    self.required = np.append(self.required, 0).astype(np.int32)
+                elif profession_id in found:
+                    self.profession_names[row] = found[profession_id]
+                # A deleted profession keeps its row with no skills, so it never scores.
+                self._set_skills(row, skills.get(profession_id, set()))
+
+    def remove_skill(self, skill_id):
+        with self._lock:
+            for row in self.postings.get(skill_id, np.empty(0, dtype=np.int32)).tolist():
+                self._set_skills(row, self.skills[row] - {skill_id})
+
+    ### --- SCORING --- ###
+
+    def _results(self, hits, user_skills, top):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            coverage = np.where(self.required > 0, hits / self.required, 0.0)
+        candidates = np.flatnonzero(self.required > 0)
+        if top is not None and top < candidates.size:
+            candidates = candidates[np.argpartition(-coverage[candidates], top - 1)[:top]]
+        # Highest coverage first, then the most matched skills, then the lowest id
+        order = np.lexsort((candidates, -hits[candidates], -coverage[candidates]))
+
+        return [
+            {
+                'profession': {'id': self.profession_ids[row], 'name': self.profession_names[row]},
+                'coverage': round(float(coverage[row]), 4),
+                'matched_count': int(hits[row]),
+                'required_count': int(self.required[row]),
+                'missing_skills': sorted(self.skills[row] - user_skills),
+            }
+            for row in candidates[order]
+        ]
+
+    def rank(self, skill_ids, top=None):
+        """Ranks all professions for one set of skill ids."""
+        skill_ids = set(skill_ids)
+        with self._lock:
+            postings = [self.postings[skill_id] for skill_id in skill_ids if skill_id in self.postings]
+            rows = np.concatenate(postings) if postings else np.empty(0, dtype=np.int32)
+            hits = np.bincount(rows, minlength=len(self.profession_ids))
+            return self._results(hits, skill_ids, top)
+
+    def rank_many(self, skill_sets, top=None):
+        """Ranks all professions for several skill sets, scoring them in one bincount."""
+        skill_sets = [set(skill_ids) for skill_ids in skill_sets]
+        with self._lock:
+            width = len(self.profession_ids)
+            offsets = []
+            for index, skill_ids in enumerate(skill_sets):
+                offsets.extend(
+                    self.postings[skill_id].astype(np.int64) + index * width
+                    for skill_id in skill_ids if skill_id in self.postings
+                )
+            cells = np.concatenate(offsets) if offsets else np.empty(0, dtype=np.int64)
+            hits = np.bincount(cells, minlength=width * len(skill_sets)).reshape(len(skill_sets), width)
+            return [self._results(hits[index], skill_ids, top) for index, skill_ids in enumerate(skill_sets)]
+
+
+_matcher = None
+_matcher_lock = RLock()
+
+
+def get_profession_matcher(version=None):
+    """
+    Returns the process-wide matcher. It is rebuilt when `version` differs from
+    the one it was built for (e.g. after another worker changed the taxonomy),
+    from the primary: a replica may not have replayed that change yet.
+    """
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None or _matcher.version != version:
+            with reads_from(None):
+                _matcher = ProfessionMatcher(version=version)
+        return _matcher
+
+
+def get_built_matcher():
+    return _matcher
+
+
+def get_user_skill_ids(user_ids):
+    skill_ids = {user_id: set() for user_id in user_ids}
+    for user_id, skill_id in UserSkill.objects.filter(user_id__in=user_ids).values_list('user_id', 'skill_id'):
+        skill_ids[user_id].add(skill_id)
+    return skill_ids
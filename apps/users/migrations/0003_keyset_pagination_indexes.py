@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_alter_customuser_birth_date"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="is_email_verified",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name="userprofession",
+            index=models.Index(
+                fields=["assigned_at", "id"], name="userprof_assigned_at_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userskill",
+            index=models.Index(
+                fields=["added_at", "id"], name="userskill_added_at_id_idx"
+            ),
+        ),
+    ]
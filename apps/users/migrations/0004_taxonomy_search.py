@@ -0,0 +1,137 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:32
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+TAXONOMY_TABLES = (
+    "users_skilltype",
+    "users_skill",
+    "users_professiontype",
+    "users_profession",
+)
+
+# pg_trgm is a contrib extension that some servers do not ship, so it and the
+# trigram indexes are only created when it is available. Search falls back to
+# full-text matching alone without it (see users.search).
+CREATE_TRIGRAM_INDEXES = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        %s
+    END IF;
+END $$;
+""" % "\n        ".join(
+    f"CREATE INDEX IF NOT EXISTS {table}_name_trgm_idx ON {table} USING gin (name gin_trgm_ops);"
+    for table in TAXONOMY_TABLES
+)
+
+DROP_TRIGRAM_INDEXES = "\n".join(f"DROP INDEX IF EXISTS {table}_name_trgm_idx;" for table in TAXONOMY_TABLES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profession",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.SearchVector(
+                        "name", config="simple", weight="A"
+                    ),
+                    "||",
+                    django.contrib.postgres.search.SearchVector(
+                        "description", config="simple", weight="B"
+                    ),
+                    django.contrib.postgres.search.SearchConfig("simple"),
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddField(
+            model_name="professiontype",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.SearchVector(
+                        "name", config="simple", weight="A"
+                    ),
+                    "||",
+                    django.contrib.postgres.search.SearchVector(
+                        "description", config="simple", weight="B"
+                    ),
+                    django.contrib.postgres.search.SearchConfig("simple"),
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddField(
+            model_name="skill",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.SearchVector(
+                        "name", config="simple", weight="A"
+                    ),
+                    "||",
+                    django.contrib.postgres.search.SearchVector(
+                        "description", config="simple", weight="B"
+                    ),
+                    django.contrib.postgres.search.SearchConfig("simple"),
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddField(
+            model_name="skilltype",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.SearchVector(
+                        "name", config="simple", weight="A"
+                    ),
+                    "||",
+                    django.contrib.postgres.search.SearchVector(
+                        "description", config="simple", weight="B"
+                    ),
+                    django.contrib.postgres.search.SearchConfig("simple"),
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="profession",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="profession_search_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="professiontype",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="professiontype_search_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="skill",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="skill_search_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="skilltype",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="skilltype_search_idx"
+            ),
+        ),
+        migrations.RunSQL(CREATE_TRIGRAM_INDEXES, DROP_TRIGRAM_INDEXES),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0004_taxonomy_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="claims_version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:57
+
+from django.db import migrations, models
+
+# (relation table, foreign key column, counted table)
+COUNTED_RELATIONS = (
+    ("users_userskill", "skill_id", "users_skill"),
+    ("users_userprofession", "profession_id", "users_profession"),
+)
+
+# Statement-level triggers with transition tables: a bulk insert or a cascade
+# delete of many rows costs one UPDATE per statement, not one per row.
+COUNTER_FUNCTION = """
+CREATE OR REPLACE FUNCTION {relation}_holder_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE {counted} AS target
+        SET holder_count = GREATEST(target.holder_count - delta.n, 0)
+        FROM (SELECT {column}, count(*) AS n FROM old_rows GROUP BY {column}) AS delta
+        WHERE target.id = delta.{column};
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE {counted} AS target
+        SET holder_count = target.holder_count + delta.n
+        FROM (SELECT {column}, count(*) AS n FROM new_rows GROUP BY {column}) AS delta
+        WHERE target.id = delta.{column};
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER {relation}_holder_count_insert AFTER INSERT ON {relation}
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION {relation}_holder_count();
+CREATE TRIGGER {relation}_holder_count_update AFTER UPDATE ON {relation}
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION {relation}_holder_count();
+CREATE TRIGGER {relation}_holder_count_delete AFTER DELETE ON {relation}
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION {relation}_holder_count();
+
+UPDATE {counted} AS target
+SET holder_count = (SELECT count(*) FROM {relation} WHERE {relation}.{column} = target.id);
+"""
+
+DROP_COUNTER_FUNCTION = """
+DROP TRIGGER IF EXISTS {relation}_holder_count_insert ON {relation};
+DROP TRIGGER IF EXISTS {relation}_holder_count_update ON {relation};
+DROP TRIGGER IF EXISTS {relation}_holder_count_delete ON {relation};
+DROP FUNCTION IF EXISTS {relation}_holder_count();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0005_user_claims_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profession",
+            name="holder_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Holder Count"
+            ),
+        ),
+        migrations.AddField(
+            model_name="skill",
+            name="holder_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Holder Count"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="profession",
+            index=models.Index(
+                fields=["-holder_count", "id"], name="profession_holder_count_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="skill",
+            index=models.Index(
+                fields=["-holder_count", "id"], name="skill_holder_count_idx"
+            ),
+        ),
+    ] + [
+        migrations.RunSQL(
+            COUNTER_FUNCTION.format(relation=relation, column=column, counted=counted),
+            DROP_COUNTER_FUNCTION.format(relation=relation),
+        )
+        for relation, column, counted in COUNTED_RELATIONS
+    ]
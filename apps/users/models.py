@@ -1,17 +1,63 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import AbstractUser
 
-from core.utils import clean_text_for_unique_fields
+from core.models import DirtyFieldsMixin
 
+from .avatars import original_name
+
+import hashlib
 from datetime import date
+from pathlib import PurePosixPath
+
+
+def search_vector_field():
+    # Names are searched with the 'simple' configuration: they are short technical
+    # terms ("c++", "go") that stemming and stop words would only damage.
+    return models.GeneratedField(
+        expression=(
+            SearchVector('name', weight='A', config='simple') +
+            SearchVector('description', weight='B', config='simple')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+
+class HolderCountModel(models.Model):
+    """
+    `holder_count` is the number of users holding the skill/profession. Database
+    triggers keep it current (migration 0006), bulk and cascade deletes included,
+    so save() must never write back the copy loaded with the instance.
+    """
+    holder_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_("Holder Count"))
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and not field.generated and field.name != 'holder_count'
+            ]
+        super().save(*args, **kwargs)
 
 
 def path_to_avatar(instance, filename):
-    return f"media/user_{instance.id}/avatar-{filename}"
+    # Content-addressed: the same image is stored once, and new users (no id yet)
+    # do not all land in one directory. Uploads through the API are stored by
+    # users.avatars.store_avatar instead, which also validates them.
+    sha256 = hashlib.sha256()
+    for chunk in instance.avatar.chunks():
+        sha256.update(chunk)
+    extension = PurePosixPath(filename).suffix.lstrip('.').lower() or 'jpg'
+    return original_name(sha256.hexdigest(), extension)
 
 
-class CustomUser(AbstractUser):
+class CustomUser(DirtyFieldsMixin, AbstractUser):
     CHOICES_ROLE = [
         ('user', 'User'),
         ('admin', 'Admin')
@@ -23,6 +69,23 @@ class CustomUser(AbstractUser):
     role = models.CharField(max_length=10, choices=CHOICES_ROLE, default='user')
     birth_date = models.DateField(null=True, blank=True)
     is_email_verified = models.BooleanField(default=False)
+    # Bumped whenever a value copied into access tokens changes, so that tokens
+    # issued before the change stop being trusted (see api.authentication).
+    claims_version = models.PositiveIntegerField(default=0, editable=False)
+
+    TOKEN_CLAIMS = ('username', 'email', 'role')
+    # Changing these also invalidates the claims, although they are not copied.
+    CLAIMS_DEPENDENCIES = TOKEN_CLAIMS + ('is_active',)
+
+    normalized_fields = ('username', 'first_name', 'last_name', 'email', 'bio')
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Instances built from token claims defer everything else; touching one
+        # deferred field loads the rest of the row with it, in one query.
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = list(deferred)
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
 
     def get_age(self):
         if not self.birth_date:
@@ -33,97 +96,86 @@ class CustomUser(AbstractUser):
             age -= 1
         return age
 
-    def clean(self):
-        if self.username:
-            self.username = clean_text_for_unique_fields(self.username)
-        if self.first_name:
-            self.first_name = clean_text_for_unique_fields(self.first_name)
-        if self.last_name:
-            self.last_name = clean_text_for_unique_fields(self.last_name)
-        if self.email:
-            self.email = clean_text_for_unique_fields(self.email)
-        if self.bio:
-            self.bio = clean_text_for_unique_fields(self.bio)
-        super().clean()
+    def normalize_fields(self, names):
+        if 'username' in names and self.username:
+            self.username = self.normalize_username(self.username)
+        super().normalize_fields(names)
 
     def save(self, *args, **kwargs):
-        super().full_clean()
+        if not self._state.adding and self.get_dirty_fields() & set(self.CLAIMS_DEPENDENCIES):
+            self.claims_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'claims_version'}
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.username}: {self.role}"
 
 
-class SkillType(models.Model):
+class SkillType(DirtyFieldsMixin, models.Model):
     name = models.CharField(max_length=255, unique=True, verbose_name=_("Name"))
     description = models.TextField(max_length=500, null=True, blank=True, verbose_name=_('Description'))
+    search_vector = search_vector_field()
 
-    def clean(self):
-        if self.name:
-            self.name = clean_text_for_unique_fields(self.name)
-        if self.description:
-            self.description = clean_text_for_unique_fields(self.description)
+    normalized_fields = ('name', 'description')
 
-    def save(self, *args, **kwargs):
-        super().full_clean()
-        super().save(*args, **kwargs)
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='skilltype_search_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Skill(models.Model):
+class Skill(DirtyFieldsMixin, HolderCountModel):
     name = models.CharField(max_length=255, unique=True, verbose_name=_("Name"))
     description = models.TextField(max_length=500, null=True, blank=True, verbose_name=_('Description'))
     skill_type = models.ForeignKey(SkillType, on_delete=models.PROTECT, related_name='skills', verbose_name=_("Skill Type"))
+    search_vector = search_vector_field()
 
-    def clean(self):
-        if self.name:
-            self.name = clean_text_for_unique_fields(self.name)
-        if self.description:
-            self.description = clean_text_for_unique_fields(self.description)
+    normalized_fields = ('name', 'description')
 
-    def save(self, *args, **kwargs):
-        super().full_clean()
-        super().save(*args, **kwargs)
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='skill_search_idx'),
+            models.Index(fields=['-holder_count', 'id'], name='skill_holder_count_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name}: {self.skill_type}"
 
 
-class ProfessionType(models.Model):
+class ProfessionType(DirtyFieldsMixin, models.Model):
     name = models.CharField(max_length=255, unique=True, verbose_name=_("Name"))
     description = models.TextField(max_length=500, null=True, blank=True, verbose_name=_('Description'))
+    search_vector = search_vector_field()
 
-    def clean(self):
-        if self.name:
-            self.name = clean_text_for_unique_fields(self.name)
-        if self.description:
-            self.description = clean_text_for_unique_fields(self.description)
+    normalized_fields = ('name', 'description')
 
-    def save(self, *args, **kwargs):
-        super().full_clean()
-        super().save(*args, **kwargs)
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='professiontype_search_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Profession(models.Model):
+class Profession(DirtyFieldsMixin, HolderCountModel):
     name = models.CharField(max_length=255, unique=True, verbose_name=_("Name"))
     description = models.TextField(max_length=700, null=True, blank=True, verbose_name=_('Description'))
     profession_type = models.ForeignKey(ProfessionType, on_delete=models.PROTECT, related_name='professions', verbose_name=_("Profession Type"))
     required_skills = models.ManyToManyField(Skill, related_name="professions", verbose_name=_("Required Skills"))
+    search_vector = search_vector_field()
 
-    def clean(self):
-        if self.name:
-            self.name = clean_text_for_unique_fields(self.name)
-        if self.description:
-            self.description = clean_text_for_unique_fields(self.description)
+    normalized_fields = ('name', 'description')
 
-    def save(self, *args, **kwargs):
-        super().full_clean()
-        super().save(*args, **kwargs)
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='profession_search_idx'),
+            models.Index(fields=['-holder_count', 'id'], name='profession_holder_count_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name}: {self.profession_type}"
@@ -136,6 +188,9 @@ class UserSkill(models.Model):
 
     class Meta:
         unique_together = ('user', 'skill')
+        indexes = [
+            models.Index(fields=['added_at', 'id'], name='userskill_added_at_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user}, skill: {self.skill}"
@@ -148,6 +203,9 @@ class UserProfession(models.Model):
 
     class Meta:
         unique_together = ('user', 'profession')
+        indexes = [
+            models.Index(fields=['assigned_at', 'id'], name='userprof_assigned_at_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user}, profession: {self.profession}"
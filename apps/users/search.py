@@ -0,0 +1,53 @@
+from functools import lru_cache
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connections
+from django.db.models import F, FloatField, Q, Value
+
+from core.utils import clean_text_for_unique_fields
+
+from .models import SkillType, Skill, ProfessionType, Profession
+
+
+SEARCHABLE_MODELS = {
+    'skill_types': SkillType,
+    'skills': Skill,
+    'profession_types': ProfessionType,
+    'professions': Profession,
+}
+
+
+@lru_cache(maxsize=None)
+def has_trigram_support(alias='default'):
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def search_model(model, text, limit):
+    """
+    Ranks rows of `model` by full-text rank over the weighted name/description
+    vector, plus trigram similarity of the name when pg_trgm is installed.
+    """
+    text = clean_text_for_unique_fields(text)
+    query = SearchQuery(text, config='simple', search_type='websearch')
+    queryset = model.objects.annotate(rank=SearchRank(F('search_vector'), query))
+    condition = Q(search_vector=query)
+
+    if has_trigram_support(queryset.db):
+        queryset = queryset.annotate(similarity=TrigramSimilarity('name', text))
+        # `%` uses the trigram GIN index and pg_trgm.similarity_threshold (0.3 by default)
+        condition |= Q(name__trigram_similar=text)
+    else:
+        queryset = queryset.annotate(similarity=Value(0.0, output_field=FloatField()))
+
+    return (
+        queryset.filter(condition)
+        .annotate(score=F('rank') + F('similarity'))
+        .order_by('-score', 'name')
+        .values('id', 'name', 'description', 'score')[:limit]
+    )
+
+
+def search_taxonomy(text, kinds, limit):
+    return {kind: list(search_model(SEARCHABLE_MODELS[kind], text, limit)) for kind in kinds}
@@ -1,16 +1,45 @@
 from typing import Dict, Any
 
 from rest_framework import serializers
-from rest_framework.relations import PrimaryKeyRelatedField
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenBlacklistSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from core.loaders import get_loader, LoadedPrimaryKeyRelatedField
+
+from .avatars import variant_urls
+from .search import SEARCHABLE_MODELS
 from .models import (
     CustomUser, UserSkill, UserProfession,
     SkillType, Skill, ProfessionType, Profession
 )
 
 
+### --- BATCH LOADING --- ###
+
+class BatchLoadedSerializer(serializers.ModelSerializer):
+    """
+    Related objects are resolved through the request-scoped ObjectLoader.
+    `collect_lookups` registers everything a payload refers to, so that bulk
+    and nested payloads are resolved with one query per model.
+    """
+
+    @property
+    def loader(self):
+        return get_loader(self.context)
+
+    def collect_lookups(self, data):
+        pass
+
+    def load_related(self, model, value, error):
+        try:
+            instance = self.loader.get(model, value)
+        except (TypeError, ValueError):
+            instance = None
+        if instance is None:
+            raise serializers.ValidationError(error)
+        return instance
+
+
 ### --- SKILL SERIALIZERS --- ###
 
 class SkillTypeSerializer(serializers.ModelSerializer):
@@ -32,8 +61,8 @@ class SkillSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'description', 'skill_type')
 
 
-class SkillInputSerializer(serializers.ModelSerializer):
-    skill_type = serializers.PrimaryKeyRelatedField(
+class SkillInputSerializer(BatchLoadedSerializer):
+    skill_type = LoadedPrimaryKeyRelatedField(
         queryset=SkillType.objects.all()
     )
 
@@ -41,16 +70,18 @@ class SkillInputSerializer(serializers.ModelSerializer):
         model = Skill
         fields = ('name', 'description', 'skill_type')
 
+    def collect_lookups(self, data):
+        if data.get('skill_type') is not None:
+            self.loader.want(SkillType, data['skill_type'])
+
     def to_internal_value(self, data):
+        self.collect_lookups(data)
         skill_type_data = data.get('skill_type')
 
         if isinstance(skill_type_data, dict):
-            try:
-                skill_type = SkillType.objects.get(**skill_type_data)
-            except SkillType.DoesNotExist:
-                raise serializers.ValidationError(
-                    {"skill_type": "Skill type not found, provide a valid ID."}
-                )
+            skill_type = self.load_related(
+                SkillType, skill_type_data, {"skill_type": "Skill type not found, provide a valid ID."}
+            )
             data['skill_type'] = skill_type.id
 
         return super().to_internal_value(data)
@@ -79,11 +110,11 @@ class ProfessionSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'description', 'profession_type', 'required_skills')
 
 
-class ProfessionInputSerializer(serializers.ModelSerializer):
-    profession_type = PrimaryKeyRelatedField(
+class ProfessionInputSerializer(BatchLoadedSerializer):
+    profession_type = LoadedPrimaryKeyRelatedField(
         queryset=ProfessionType.objects.all()
     )
-    required_skills = PrimaryKeyRelatedField(
+    required_skills = LoadedPrimaryKeyRelatedField(
         queryset=Skill.objects.all(), many=True
     )
 
@@ -91,7 +122,15 @@ class ProfessionInputSerializer(serializers.ModelSerializer):
         model = Profession
         fields = ('name', 'description', 'profession_type', 'required_skills')
 
+    def collect_lookups(self, data):
+        if data.get('profession_type') is not None:
+            self.loader.want(ProfessionType, data['profession_type'])
+        if isinstance(data.get('required_skills'), list):
+            for skill in data['required_skills']:
+                self.loader.want(Skill, skill)
+
     def to_internal_value(self, data):
+        self.collect_lookups(data)
         profession_type_data = data.get('profession_type')
         required_skills_data = data.get('required_skills', [])
 
@@ -99,12 +138,9 @@ class ProfessionInputSerializer(serializers.ModelSerializer):
             skill_ids = []
             for skill in required_skills_data:
                 if isinstance(skill, dict):  # Nested object
-                    try:
-                        skill_obj = Skill.objects.get(**skill)
-                    except Skill.DoesNotExist:
-                        raise serializers.ValidationError(
-                            {"required_skills": "Some skills were not found, provide valid IDs."}
-                        )
+                    skill_obj = self.load_related(
+                        Skill, skill, {"required_skills": "Some skills were not found, provide valid IDs."}
+                    )
                     skill_ids.append(skill_obj.id)
                 else:  # ID (the usual case)
                     skill_ids.append(skill)
@@ -112,12 +148,9 @@ class ProfessionInputSerializer(serializers.ModelSerializer):
             data['required_skills'] = skill_ids
 
         if isinstance(profession_type_data, dict):
-            try:
-                profession_type = ProfessionType.objects.get(**profession_type_data)
-            except ProfessionType.DoesNotExist:
-                raise serializers.ValidationError(
-                    {"profession_type": "Profession type not found, provide a valid ID."}
-                )
+            profession_type = self.load_related(
+                ProfessionType, profession_type_data, {"profession_type": "Profession type not found, provide a valid ID."}
+            )
             data['profession_type'] = profession_type.id
 
         return super().to_internal_value(data)
@@ -126,9 +159,16 @@ class ProfessionInputSerializer(serializers.ModelSerializer):
 ### --- USER SERIALIZERS --- ###
 
 class UserSerializer(serializers.ModelSerializer):
+    avatar = serializers.SerializerMethodField()
+
     class Meta:
         model = CustomUser
-        fields = ('id', 'username', 'email', 'role')
+        fields = ('id', 'username', 'email', 'role', 'avatar')
+        # get_avatar() for api.projections, which reads the stored name directly
+        projected_fields = {'avatar': ('avatar', variant_urls)}
+
+    def get_avatar(self, obj):
+        return variant_urls(obj.avatar.name)
 
 
 ### --- USER-SKILL RELATION SERIALIZERS --- ###
@@ -164,6 +204,52 @@ class UserProfessionInputSerializer(serializers.ModelSerializer):
         model = UserProfession
         fields = ('profession', )
 
+### --- REPORT SERIALIZERS --- ###
+
+class SkillGapQuerySerializer(serializers.Serializer):
+    cohort_profession = serializers.PrimaryKeyRelatedField(queryset=Profession.objects.all(), required=False)
+    joined_from = serializers.DateField(required=False)
+    joined_to = serializers.DateField(required=False)
+    detail = serializers.ChoiceField(choices=('skills', 'users'), default='skills')
+    output = serializers.ChoiceField(choices=('json', 'csv', 'ndjson'), default='json')
+
+    def validate(self, data):
+        if data.get('joined_from') and data.get('joined_to') and data['joined_from'] > data['joined_to']:
+            raise serializers.ValidationError({'joined_to': "Must not be earlier than joined_from."})
+        if data['detail'] == 'users' and data['output'] == 'json':
+            raise serializers.ValidationError({'output': "Per-user reports are only available as csv or ndjson."})
+        return data
+
+
+class UserExportQuerySerializer(serializers.Serializer):
+    cohort_profession = serializers.PrimaryKeyRelatedField(queryset=Profession.objects.all(), required=False)
+    joined_from = serializers.DateField(required=False)
+    joined_to = serializers.DateField(required=False)
+    output = serializers.ChoiceField(choices=('csv', 'ndjson'), default='ndjson')
+
+    def validate(self, data):
+        if data.get('joined_from') and data.get('joined_to') and data['joined_from'] > data['joined_to']:
+            raise serializers.ValidationError({'joined_to': "Must not be earlier than joined_from."})
+        return data
+
+
+class TaxonomySearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=255)
+    types = serializers.CharField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+    def validate_types(self, value):
+        types = [kind.strip() for kind in value.split(',') if kind.strip()]
+        unknown = set(types) - set(SEARCHABLE_MODELS)
+        if unknown:
+            raise serializers.ValidationError(f"Unknown types: {', '.join(sorted(unknown))}.")
+        return types
+
+    def validate(self, data):
+        data.setdefault('types', list(SEARCHABLE_MODELS))
+        return data
+
+
 ### --- AUTH SERIALIZERS (REGISTER & LOGIN) --- ###
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -181,7 +267,16 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data.pop('password_confirm')
-        user = CustomUser.objects.create_user(**validated_data)
+        password_hash = validated_data.pop('password_hash', None)
+        if password_hash is None:
+            return CustomUser.objects.create_user(**validated_data)
+
+        # The caller already hashed the password (see AsyncRegisterView).
+        validated_data.pop('password')
+        user = CustomUser(**validated_data, password=password_hash)
+        user.username = CustomUser.normalize_username(user.username)
+        user.email = CustomUser.objects.normalize_email(user.email)
+        user.save()
         return user
 
 
@@ -193,6 +288,9 @@ class LoginSerializer(TokenObtainPairSerializer):
         token['username'] = user.username
         token['email'] = user.email
         token['id'] = user.id
+        token['role'] = user.role
+        # Lets ClaimsJWTAuthentication tell whether the claims above are still current.
+        token['claims_version'] = user.claims_version
 
         return token
 
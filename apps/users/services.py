@@ -1,17 +1,21 @@
-from django.core.mail import send_mail
-from django.conf import settings
+from django.db import transaction
 from django.utils.crypto import get_random_string
+
+from notifications.outbox import enqueue_email
+
 from .models import CustomUser
 
+
 def send_email_confirmation(user: CustomUser):
+    # The code and the email are committed together; the send_outbox worker
+    # delivers the message outside of the request.
     confirmation_code = get_random_string(32)
-    user.confirmation_code = confirmation_code
-    user.save()
+    with transaction.atomic():
+        user.confirmation_code = confirmation_code
+        user.save()
 
-    send_mail(
-        "Confirm your email",
-        f"Your confirmation code: {confirmation_code}",
-        settings.DEFAULT_FROM_EMAIL,
-        [user.email],
-        fail_silently=False,
-    )
+        enqueue_email(
+            "Confirm your email",
+            f"Your confirmation code: {confirmation_code}",
+            [user.email],
+        )
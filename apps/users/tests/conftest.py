@@ -0,0 +1,134 @@
+import pytest
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from api.cache import local_cache
+from api.revocation import revocation_filter
+from core.replicas import replica_health
+from users.autocomplete import AUTOCOMPLETE_INDEXES
+from users.models import (
+    CustomUser, SkillType, Skill,
+    ProfessionType, Profession,
+    UserSkill, UserProfession,
+)
+
+
+def run_commit_hooks(connection):
+    # Only the test's own blocks are open: the code under test would have committed.
+    if connection.in_atomic_block and all(block._from_testcase for block in connection.atomic_blocks):
+        hooks, connection.run_on_commit = connection.run_on_commit, []
+        for _, func, _ in hooks:
+            func()
+
+
+@pytest.fixture(autouse=True)
+def commit_hooks_run_on_commit(monkeypatch):
+    """
+    Tests run in a transaction that is rolled back, so on_commit() callbacks would
+    never run. They run where the code under test commits instead: when registered
+    outside of its atomic blocks, or when its outermost block exits.
+    """
+    on_commit, atomic_exit = BaseDatabaseWrapper.on_commit, transaction.Atomic.__exit__
+
+    def patched_on_commit(self, func, robust=False):
+        on_commit(self, func, robust)
+        run_commit_hooks(self)
+
+    def patched_atomic_exit(self, exc_type, exc_value, traceback):
+        result = atomic_exit(self, exc_type, exc_value, traceback)
+        run_commit_hooks(transaction.get_connection(self.using))
+        return result
+
+    monkeypatch.setattr(BaseDatabaseWrapper, 'on_commit', patched_on_commit)
+    monkeypatch.setattr(transaction.Atomic, '__exit__', patched_atomic_exit)
+
+
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    cache.clear()
+    local_cache.clear()
+    for index in AUTOCOMPLETE_INDEXES.values():
+        index.invalidate()
+    revocation_filter.bloom = None
+    replica_health.reset()
+
+
+# Replicas from DB_REPLICAS (mirrors of the test database). Only tests that use
+# the `replicas` fixture read from them; the rest always read from the primary.
+CONFIGURED_REPLICAS = list(django_settings.DATABASE_REPLICAS)
+
+
+@pytest.fixture(autouse=True)
+def primary_reads_only(settings):
+    settings.DATABASE_REPLICAS = []
+
+
+@pytest.fixture
+def replicas(settings):
+    # Without configured replicas the test database stands in for one.
+    settings.DATABASE_REPLICAS = CONFIGURED_REPLICAS or ['default']
+    return settings.DATABASE_REPLICAS
+
+
+@pytest.fixture
+def api_factory():
+    return APIRequestFactory()
+
+
+@pytest.fixture
+def admin_user():
+    return CustomUser.objects.create_user("admin", "admin@example.com", "password", role="admin")
+
+
+@pytest.fixture
+def make_taxonomy():
+    def make(count, prefix="item"):
+        skill_type = SkillType.objects.create(name=f"{prefix} type {SkillType.objects.count()}")
+        profession_type = ProfessionType.objects.create(name=f"{prefix} type {ProfessionType.objects.count()}")
+        skills, professions = [], []
+        for _ in range(count):
+            skill = Skill.objects.create(name=f"{prefix} skill {Skill.objects.count()}", skill_type=skill_type)
+            profession = Profession.objects.create(
+                name=f"{prefix} profession {Profession.objects.count()}", profession_type=profession_type
+            )
+            profession.required_skills.add(skill)
+            skills.append(skill)
+            professions.append(profession)
+        return skills, professions
+    return make
+
+
+@pytest.fixture
+def make_user_relations(make_taxonomy):
+    def make(count, prefix="user"):
+        skills, professions = make_taxonomy(count, prefix=prefix)
+        for skill, profession in zip(skills, professions):
+            number = CustomUser.objects.count()
+            user = CustomUser.objects.create_user(f"{prefix}{number}", f"{prefix}{number}@example.com", "password")
+            UserSkill.objects.create(user=user, skill=skill)
+            UserProfession.objects.create(user=user, profession=profession)
+    return make
+
+
+@pytest.fixture
+def assert_constant_queries():
+    """
+    Runs `call` before and after `grow` adds more rows and checks
+    that the number of queries did not change.
+    """
+    def check(call, grow, expected=None):
+        with CaptureQueriesContext(connection) as before:
+            call()
+        grow()
+        with CaptureQueriesContext(connection) as after:
+            call()
+        assert len(before) == len(after), (
+            f"Query count grew with the number of rows: {len(before)} -> {len(after)}"
+        )
+        if expected is not None:
+            assert len(after) == expected, f"Expected {expected} queries, got {len(after)}"
+    return check
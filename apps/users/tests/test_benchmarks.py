@@ -0,0 +1,65 @@
+import copy
+
+import pytest
+from django.db.models import Count
+
+from users.generators import GraphGenerator
+from users.models import CustomUser, Skill, UserSkill, UserProfession
+from api.benchmarks import BenchContext, Runner, compare, get_scenarios
+from api.urls import router
+
+
+def relation_pairs(prefix):
+    # The generated names without their prefix
+    return sorted(
+        (user[len(prefix):], skill[len(prefix):])
+        for user, skill in UserSkill.objects.filter(user__username__startswith=prefix)
+        .values_list('user__username', 'skill__name')
+    )
+
+
+@pytest.mark.django_db
+def test_graph_generator_is_reproducible_and_keeps_holder_counts():
+    first = GraphGenerator(40, seed=3, prefix='first').run()
+    second = GraphGenerator(40, seed=3, prefix='other').run()
+
+    assert first == second
+    assert first['users.CustomUser'] == 40
+    assert relation_pairs('first') == relation_pairs('other')
+    assert CustomUser.objects.get(username='first-admin').role == 'admin'
+    assert UserProfession.objects.filter(user__username__startswith='first').count() == first['users.UserProfession']
+    for skill in Skill.objects.annotate(holders=Count('user_skills')):
+        assert skill.holder_count == skill.holders
+
+
+@pytest.mark.django_db
+def test_bench_suite_covers_every_action_and_compare_flags_regressions():
+    GraphGenerator(30, seed=1).run()
+    scenarios = {scenario.name: scenario for scenario in get_scenarios(BenchContext(seed=1))}
+
+    for _, viewset, basename in router.registry:
+        actions = ['list', 'retrieve', 'create', 'update', 'partial_update', 'destroy']
+        actions += [extra.__name__ for extra in viewset.get_extra_actions()]
+        assert {f"{basename}:{action}" for action in actions} <= scenarios.keys()
+    assert {'async-skill:list', 'auth:login', 'auth:register'} <= scenarios.keys()
+
+    skills = Skill.objects.count()
+    names = ('skill:list', 'skill:destroy', 'user-skill:create', 'auth:login')
+    results = Runner(repeat=2, warmup=0).run([scenarios[name] for name in names])
+    assert [results[name]['status'] for name in names] == [200, 204, 201, 200]
+    assert all(results[name]['queries'] > 0 and results[name]['peak_kib'] > 0 for name in names)
+    # The writes were rolled back.
+    assert Skill.objects.count() == skills
+
+    baseline = {'results': results}
+    current = copy.deepcopy(baseline)
+    current['results']['skill:list'].update(p50_ms=results['skill:list']['p50_ms'] * 2 + 1, queries=5)
+    current['results']['auth:login'].update(p50_ms=results['auth:login']['p50_ms'] * 1.05)
+    regressions = {(change.scenario, change.metric) for change in compare(baseline, current) if change.regressed}
+    assert regressions == {('skill:list', 'p50_ms'), ('skill:list', 'queries')}
+
+    # A renamed scenario is missing from the current run, and new in it.
+    current['results']['skill:listing'] = current['results'].pop('skill:list')
+    changes = {(change.scenario, change.metric): change for change in compare(baseline, current)}
+    assert changes[('skill:list', 'missing')].regressed and changes[('skill:list', 'missing')].ratio is None
+    assert not changes[('skill:listing', 'new')].regressed
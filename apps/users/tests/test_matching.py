@@ -0,0 +1,46 @@
+import pytest
+
+from users.matching import ProfessionMatcher, get_built_matcher, get_profession_matcher
+from users.models import Profession
+from api.cache import get_versions
+from api.signals import MATCHING_MODELS
+
+
+@pytest.mark.django_db
+def test_rank_orders_professions_by_coverage(make_taxonomy):
+    skills, professions = make_taxonomy(3)
+    professions[1].required_skills.add(skills[0], skills[2])
+    professions[2].required_skills.add(skills[0])
+
+    results = ProfessionMatcher().rank({skills[0].id, skills[1].id}, top=2)
+
+    # professions[1] needs skills 0, 1, 2 and professions[2] needs skills 0, 2
+    assert [result['profession']['id'] for result in results] == [professions[0].id, professions[1].id]
+    assert results[1]['coverage'] == 0.6667
+    assert results[1]['missing_skills'] == [skills[2].id]
+
+
+@pytest.mark.django_db
+def test_rank_many_matches_rank(make_taxonomy):
+    skills, _ = make_taxonomy(4)
+    matcher = ProfessionMatcher()
+    skill_sets = [{skills[0].id}, {skills[1].id, skills[2].id}, set()]
+
+    assert matcher.rank_many(skill_sets) == [matcher.rank(skill_ids) for skill_ids in skill_sets]
+
+
+@pytest.mark.django_db
+def test_matcher_is_patched_from_signals(make_taxonomy):
+    skills, professions = make_taxonomy(2)
+    matcher = get_profession_matcher(version=get_versions(MATCHING_MODELS))
+    assert get_built_matcher() is matcher
+
+    professions[0].required_skills.add(skills[1])
+    new = Profession.objects.create(name="new", profession_type=professions[0].profession_type)
+    new.required_skills.add(skills[1])
+
+    # No rebuild: the worker that made the change adopted the new versions.
+    assert get_profession_matcher(version=get_versions(MATCHING_MODELS)) is matcher
+    results = {result['profession']['id']: result for result in matcher.rank({skills[1].id})}
+    assert results[professions[0].id]['coverage'] == 0.5
+    assert results[new.id]['coverage'] == 1.0
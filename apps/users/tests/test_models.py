@@ -1,5 +1,12 @@
 import pytest
 from datetime import date
+from io import StringIO
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
 from users.models import (
     CustomUser, SkillType, Skill,
@@ -34,3 +41,95 @@ def test_skill_type_clean_and_save():
     )
     assert skill_type.name == 'language programming' and " ".join(skill_type.description.split()).lower() == "a programming language is a set of instructions and rules that enable the creation and management of programs, computers, and other devices. it allows developers to write, test, and debug code that performs various tasks and solves problems."
 
+
+@pytest.mark.django_db
+def test_holder_counts_follow_bulk_writes_and_cascades(make_taxonomy):
+    (first, second), (profession, _) = make_taxonomy(2)
+    users = [CustomUser.objects.create_user(f"holder{index}", f"holder{index}@example.com", "pw") for index in range(3)]
+
+    UserSkill.objects.bulk_create([UserSkill(user=user, skill=first) for user in users])
+    UserSkill.objects.create(user=users[0], skill=second)
+    UserProfession.objects.create(user=users[0], profession=profession)
+    first.name = "renamed"
+    first.save()  # must not write its stale holder_count back
+
+    users[0].delete()
+    UserSkill.objects.filter(user=users[1]).update(skill=second)
+
+    counts = dict(Skill.objects.values_list('id', 'holder_count'))
+    assert (counts[first.id], counts[second.id]) == (1, 1)
+    assert Profession.objects.get(id=profession.id).holder_count == 0
+
+    Skill.objects.filter(id=first.id).update(holder_count=40)
+    call_command('reconcile_holder_counts', stdout=StringIO())
+    assert Skill.objects.get(id=first.id).holder_count == 1
+
+
+@pytest.mark.django_db
+def test_import_taxonomy_normalizes_and_merges_sets(tmp_path, make_taxonomy):
+    (existing, _), (profession, _) = make_taxonomy(2, prefix="old")
+    required_before = set(profession.required_skills.values_list('name', flat=True))
+    (tmp_path / "skills.csv").write_text(
+        "name,type,description\n"
+        f"  {existing.name.upper()} ,Renamed   Type,first\n"
+        f"{existing.name},renamed type,  Last   WINS \n"
+        "New\tSkill,renamed type,\n"
+        ",missing name,\n"
+    )
+    (tmp_path / "edges.jsonl").write_text(
+        f'{{"profession": "{profession.name}", "skill": "NEW SKILL"}}\n'
+        f'{{"profession": "{profession.name}", "skill": "unknown"}}\n'
+    )
+    output = StringIO()
+    call_command(
+        'import_taxonomy', f'--skills={tmp_path / "skills.csv"}', f'--required-skills={tmp_path / "edges.jsonl"}',
+        '--batch-size=2', stdout=output,
+    )
+
+    existing.refresh_from_db()
+    assert (existing.description, existing.skill_type.name) == ("last wins", "renamed type")
+    new_skill = Skill.objects.get(name="new skill")
+    assert new_skill.description is None and new_skill.holder_count == 0
+    assert set(profession.required_skills.values_list('name', flat=True)) == required_before | {"new skill"}
+    assert "skills: read=4 skipped=1 staged=2 inserted=1 updated=1" in output.getvalue()
+
+
+def data_statements(queries):
+    return [query['sql'] for query in queries if not query['sql'].startswith(('SAVEPOINT', 'RELEASE SAVEPOINT'))]
+
+
+@pytest.mark.django_db
+def test_save_validates_only_changed_fields_without_unique_selects():
+    CustomUser.objects.create_user("tracked", "tracked@example.com", "password")
+    user = CustomUser.objects.get(username="tracked")
+
+    with CaptureQueriesContext(connection) as queries:
+        user.last_login = timezone.now()
+        user.save(update_fields=['last_login'])
+        user.is_email_verified = True
+        user.first_name = "  Some   NAME "
+        user.save()
+    statements = data_statements(queries)
+    assert len(statements) == 2 and all(sql.startswith('UPDATE') for sql in statements)
+    assert user.first_name == "some name" and user.claims_version == 0
+
+    user.email = "Renamed@Example.com"
+    user.save()
+    user = CustomUser.objects.get(pk=user.pk)
+    assert (user.email, user.claims_version, user.get_dirty_fields()) == ("renamed@example.com", 1, set())
+
+
+@pytest.mark.django_db
+def test_duplicates_rejected_by_the_database_are_validation_errors(make_taxonomy):
+    CustomUser.objects.create_user("taken", "taken@example.com", "password")
+    with pytest.raises(ValidationError) as error:
+        CustomUser.objects.create_user("  TAKEN ", "other@example.com", "password")
+    assert list(error.value.message_dict) == ['username']
+
+    # The failed statement was rolled back to a savepoint, so the transaction goes on.
+    (first, second), _ = make_taxonomy(2)
+    second.name = first.name.upper()
+    with pytest.raises(ValidationError) as error:
+        second.save()
+    assert list(error.value.message_dict) == ['name']
+    assert Skill.objects.filter(name=first.name).count() == 1
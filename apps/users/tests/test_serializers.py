@@ -0,0 +1,69 @@
+import pytest
+from rest_framework import serializers
+
+from api.projections import get_compiled_serializer
+from api.querysets import optimize_queryset
+from users.models import CustomUser, Profession, Skill
+from users.serializers import (
+    ProfessionInputSerializer, SkillInputSerializer, SkillTypeSerializer, SkillSerializer,
+    ProfessionTypeSerializer, ProfessionSerializer, UserSerializer, UserSkillSerializer, UserProfessionSerializer,
+)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('count', [5, 50])
+def test_profession_input_validates_in_constant_queries(count, make_taxonomy, django_assert_num_queries):
+    skills, professions = make_taxonomy(count)
+    data = {
+        "name": "New profession",
+        "profession_type": {"id": professions[0].profession_type_id},
+        "required_skills": [skill.id for skill in skills[1:]] + [{"name": skills[0].name.upper()}],
+    }
+    serializer = ProfessionInputSerializer(data=data)
+
+    # Skill by pk, skill by name, profession type by pk and the unique name check
+    with django_assert_num_queries(4):
+        assert serializer.is_valid(), serializer.errors
+    assert set(serializer.validated_data["required_skills"]) == set(skills)
+
+
+@pytest.mark.django_db
+def test_skill_input_reports_unknown_skill_type():
+    serializer = SkillInputSerializer(data={"name": "rust", "skill_type": {"name": "missing"}})
+
+    assert not serializer.is_valid()
+    assert "skill_type" in serializer.errors
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('serializer_class', [
+    SkillTypeSerializer, SkillSerializer, ProfessionTypeSerializer, ProfessionSerializer,
+    UserSkillSerializer, UserProfessionSerializer,
+])
+def test_compiled_serializer_matches_serializer_output(serializer_class, make_user_relations, django_assert_num_queries):
+    make_user_relations(4)
+    profession = Profession.objects.order_by('id').first()
+    profession.required_skills.add(*Skill.objects.all())
+    Skill.objects.filter(id=Skill.objects.order_by('id').first().id).update(description="Systems language")
+    CustomUser.objects.filter(id=CustomUser.objects.order_by('id').first().id).update(avatar="avatars/ab/abcd.png")
+
+    queryset = serializer_class.Meta.model.objects.order_by('id')
+    expected = serializer_class(optimize_queryset(queryset, serializer_class), many=True).data
+    compiled = get_compiled_serializer(serializer_class)
+
+    with django_assert_num_queries(1 + len(compiled.relations)):
+        assert compiled.serialize(queryset) == expected
+
+
+def test_serializers_with_unknown_method_fields_are_not_compiled():
+    class AgeSerializer(UserSerializer):
+        age = serializers.SerializerMethodField()
+
+        class Meta(UserSerializer.Meta):
+            fields = UserSerializer.Meta.fields + ('age',)
+
+        def get_age(self, obj):
+            return obj.get_age()
+
+    assert get_compiled_serializer(UserSerializer) is not None
+    assert get_compiled_serializer(AgeSerializer) is None
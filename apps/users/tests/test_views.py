@@ -0,0 +1,720 @@
+import datetime
+import json
+import math
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+import pytest
+from PIL import Image
+from asgiref.sync import async_to_sync
+from django.contrib.auth.signals import user_login_failed
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import AsyncClient, Client
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import force_authenticate
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.cache import get_serializer_models, get_shared_cache, get_versions, modified_key
+from api.checks import check_shared_cache
+from api.renderers import FastJSONRenderer
+from api.revocation import revocation_filter
+from api.throttling import get_shed_counts, sliding_window_hit
+from core.bloom import BloomFilter
+from core.hashing import hashing_pool
+from core.replicas import ReplicaRouter, replica_health
+from users.autocomplete import AUTOCOMPLETE_INDEXES
+from users.avatars import render_variants
+from users.exports import USER_EXPORT_FIELDS
+from users.models import CustomUser, Skill, SkillType, Profession, UserSkill
+from users.serializers import LoginSerializer
+from api.views import ProfessionViewSet, SkillViewSet, UserSkillViewSet, UserProfessionViewSet, UserExportView
+
+
+def list_view(viewset, api_factory):
+    view = viewset.as_view({'get': 'list'})
+
+    def call():
+        response = view(api_factory.get('/'))
+        return response.render() if hasattr(response, 'render') else response
+    return call
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('viewset, expected', [
+    (SkillViewSet, 1),
+    (ProfessionViewSet, 2),
+])
+def test_taxonomy_list_query_count_is_constant(viewset, expected, api_factory, make_taxonomy, assert_constant_queries):
+    make_taxonomy(2)
+    assert_constant_queries(list_view(viewset, api_factory), lambda: make_taxonomy(5, prefix="more"), expected)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('viewset, expected', [
+    (UserSkillViewSet, 1),
+    (UserProfessionViewSet, 2),
+])
+def test_user_relation_list_query_count_is_constant(viewset, expected, api_factory, make_user_relations, assert_constant_queries):
+    make_user_relations(2)
+    assert_constant_queries(list_view(viewset, api_factory), lambda: make_user_relations(5, prefix="more"), expected)
+
+
+@pytest.mark.django_db
+def test_taxonomy_list_is_served_from_cache_until_a_write(api_factory, make_taxonomy, django_assert_num_queries):
+    skills, _ = make_taxonomy(2)
+    view = list_view(SkillViewSet, api_factory)
+    first = view()
+
+    with django_assert_num_queries(0):
+        cached = view()
+    assert cached.content == first.content
+
+    skills[0].description = "updated"
+    skills[0].save()
+    with django_assert_num_queries(1):
+        refreshed = view()
+    assert b"updated" in refreshed.content
+
+
+@pytest.mark.django_db
+def test_versions_move_when_the_write_commits(make_taxonomy):
+    skills, professions = make_taxonomy(1)
+    before = get_versions((Skill, Profession))
+
+    with transaction.atomic():
+        skills[0].description = "updated"
+        skills[0].save()
+        professions[0].required_skills.clear()
+        # A read now would still see the old rows; caching them under a new version would keep them.
+        assert get_versions((Skill, Profession)) == before
+    assert all(new > old for new, old in zip(get_versions((Skill, Profession)), before))
+
+
+def bulk_post(viewset, api_factory, user, rows):
+    request = api_factory.post('/bulk/', rows, format='json')
+    force_authenticate(request, user=user)
+    return viewset.as_view({'post': 'bulk_upsert'})(request)
+
+
+def test_per_process_api_cache_fails_the_system_check(settings):
+    settings.DEBUG = False
+    assert [error.id for error in check_shared_cache(None)] == ['api.E001']
+
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379/0'}}
+    assert check_shared_cache(None) == []
+
+
+@pytest.mark.django_db
+def test_skill_bulk_upsert_reports_row_errors(api_factory, admin_user, make_taxonomy):
+    skills, _ = make_taxonomy(1)
+    skill_type_id = skills[0].skill_type_id
+    response = bulk_post(SkillViewSet, api_factory, admin_user, [
+        {"name": "  New   SKILL ", "skill_type": skill_type_id},
+        {"name": skills[0].name.upper(), "description": "Upserted", "skill_type": skill_type_id},
+        {"name": "new skill", "skill_type": skill_type_id},
+        {"name": "broken"},
+    ])
+
+    assert response.status_code == 207
+    assert response.data["count"] == 2
+    assert [error["index"] for error in response.data["errors"]] == [2, 3]
+    assert Skill.objects.filter(name="new skill").exists()
+    skills[0].refresh_from_db()
+    assert skills[0].description == "upserted"
+
+
+@pytest.mark.django_db
+def test_profession_bulk_upsert_writes_required_skills(api_factory, admin_user, make_taxonomy):
+    skills, professions = make_taxonomy(3)
+    response = bulk_post(ProfessionViewSet, api_factory, admin_user, [
+        {"name": professions[0].name, "profession_type": professions[0].profession_type_id,
+         "required_skills": [skills[1].id, skills[2].id]},
+        {"name": "brand new", "profession_type": professions[0].profession_type_id,
+         "required_skills": [skills[0].id]},
+    ])
+
+    assert response.status_code == 201
+    assert set(professions[0].required_skills.values_list("id", flat=True)) == {skills[1].id, skills[2].id}
+    assert list(Profession.objects.get(name="brand new").required_skills.all()) == [skills[0]]
+
+
+@pytest.mark.django_db
+def test_keyset_pagination_walks_forward_and_back(api_factory, make_user_relations):
+    make_user_relations(5)
+    view = UserSkillViewSet.as_view({'get': 'list'})
+
+    pages, url = [], '/?page_size=2&count=true'
+    while url:
+        response = view(api_factory.get(url))
+        pages.append([row["id"] for row in response.data["results"]])
+        url = response.data["next"]
+
+    ids = [row_id for page in pages for row_id in page]
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert ids == sorted(ids, reverse=True)
+    assert response.data["count"] == 5
+
+    previous = view(api_factory.get(response.data["previous"]))
+    assert [row["id"] for row in previous.data["results"]] == pages[1]
+
+
+@pytest.mark.django_db
+def test_keyset_pagination_rejects_invalid_cursor(api_factory):
+    response = SkillViewSet.as_view({'get': 'list'})(api_factory.get('/?cursor=not-a-cursor'))
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_profession_match_ranks_for_current_user(api_factory, make_user_relations):
+    make_user_relations(2)
+    user_skill = UserSkill.objects.select_related('user', 'skill').first()
+    request = api_factory.get('/match/?top=1')
+    force_authenticate(request, user=user_skill.user)
+
+    response = ProfessionViewSet.as_view({'get': 'match'})(request)
+
+    assert response.status_code == 200
+    [result] = response.data["results"]
+    assert result["user"] == user_skill.user.id
+    assert result["professions"][0]["coverage"] == 1.0
+    assert result["professions"][0]["missing_skills"] == []
+
+
+@pytest.mark.django_db
+def test_skill_gap_report_counts_and_streams(api_factory, admin_user, make_user_relations):
+    make_user_relations(3)
+    profession = Profession.objects.first()
+    profession.required_skills.add(*Skill.objects.all())
+    view = ProfessionViewSet.as_view({'get': 'skill_gaps'})
+
+    def get(query):
+        request = api_factory.get(f'/?{query}')
+        force_authenticate(request, user=admin_user)
+        return view(request, pk=profession.pk)
+
+    report = get('').data
+    assert report["cohort_size"] == 4  # three users and the admin
+    assert [gap["missing"] for gap in report["skills"]] == [3, 3, 3]
+
+    # The cached summary follows the users and their skills.
+    UserSkill.objects.create(user=admin_user, skill=Skill.objects.first())
+    report = get('').data
+    assert sorted(gap["missing"] for gap in report["skills"]) == [2, 3, 3]
+
+    response = get('detail=users&output=csv')
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert lines[0] == "user_id,username,missing_count,missing_skills"
+    assert len(lines) == 5
+
+
+@pytest.mark.django_db
+def test_user_export_streams_relations_in_chunks(api_factory, admin_user, make_user_relations, monkeypatch):
+    make_user_relations(3)
+    monkeypatch.setattr(UserExportView, 'export_chunk_size', 2)
+    request = api_factory.get('/?output=ndjson')
+    force_authenticate(request, user=admin_user)
+    response = UserExportView.as_view()(request)
+
+    with CaptureQueriesContext(connection) as queries:
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+    # One cursor over the users, then skills and professions once per chunk of two users
+    assert len(queries) == 1 + 2 * 2
+    assert [row["username"] for row in rows] == ["admin", "user1", "user2", "user3"]
+    assert rows[0]["skills"] == [] and rows[1]["skills"] == [UserSkill.objects.get(user__username="user1").skill.name]
+
+    output = StringIO()
+    call_command('export_users', '--format=csv', '--chunk-size=3', stdout=output)
+    lines = output.getvalue().splitlines()
+    assert lines[0] == ",".join(USER_EXPORT_FIELDS)
+    assert len(lines) == 5
+
+
+@pytest.mark.django_db
+def test_taxonomy_search_ranks_name_matches_first(client, make_taxonomy):
+    skill_type = make_taxonomy(1)[0][0].skill_type
+    Skill.objects.create(name="Python", description="a programming language", skill_type=skill_type)
+    Skill.objects.create(name="Django", description="web framework written in python", skill_type=skill_type)
+
+    response = client.get('/api/search/', {'q': 'python', 'types': 'skills'})
+
+    assert response.status_code == 200
+    assert [skill["name"] for skill in response.json()["skills"]] == ["python", "django"]
+
+
+@pytest.mark.django_db
+def test_autocomplete_is_weighted_and_patched_without_queries(client, make_user_relations, django_assert_num_queries):
+    make_user_relations(1)
+    skill_type = Skill.objects.first().skill_type
+    popular = Skill.objects.create(name="Machine Learning", skill_type=skill_type)
+    Skill.objects.create(name="Machine Vision", skill_type=skill_type)
+    client.get('/api/autocomplete/skills/', {'q': 'ma'})  # builds the index
+
+    UserSkill.objects.create(user=UserSkill.objects.first().user, skill=popular)
+    Skill.objects.create(name="Mandarin", skill_type=skill_type)
+    with django_assert_num_queries(0):
+        response = client.get('/api/autocomplete/skills/', {'q': 'MA'})
+        learn = client.get('/api/autocomplete/skills/', {'q': 'learn'})
+
+    assert [skill["name"] for skill in response.json()["results"]] == [
+        "machine learning", "machine vision", "mandarin",
+    ]
+    assert [skill["name"] for skill in learn.json()["results"]] == ["machine learning"]
+
+
+@pytest.mark.django_db
+def test_expired_autocomplete_index_is_served_while_another_request_rebuilds(client, make_taxonomy, django_assert_num_queries):
+    skill_type = make_taxonomy(1)[0][0].skill_type
+    Skill.objects.create(name="Data\U0001d54a", skill_type=skill_type)
+    client.get('/api/autocomplete/skills/', {'q': 'data'})
+    index = AUTOCOMPLETE_INDEXES['skills']
+    index.built_at -= 24 * 60 * 60
+
+    with index._build_lock, django_assert_num_queries(0):
+        response = client.get('/api/autocomplete/skills/', {'q': 'data'})
+    assert [skill["name"] for skill in response.json()["results"]] == ["data\U0001d54a"]
+
+
+@pytest.mark.django_db
+def test_logout_revokes_access_token_checked_without_blacklist_queries(client, make_user_relations):
+    make_user_relations(1)
+    user = UserSkill.objects.first().user
+    refresh = RefreshToken.for_user(user)
+    auth = {'HTTP_AUTHORIZATION': f"Bearer {refresh.access_token}"}
+    assert client.get('/api/professions/match/', **auth).status_code == 200  # builds the filter
+
+    with CaptureQueriesContext(connection) as queries:
+        assert client.get('/api/professions/match/', **auth).status_code == 200
+    assert not any('token_blacklist' in query['sql'] for query in queries.captured_queries)
+
+    response = client.post('/api/auth/logout/', {'refresh': str(refresh)}, **auth)
+    assert response.status_code == 200
+    assert client.get('/api/professions/match/', **auth).status_code == 401
+
+
+@pytest.mark.django_db
+def test_tokens_blacklisted_by_simplejwt_reach_filters_even_when_committed_late(make_user_relations):
+    make_user_relations(1)
+    user = UserSkill.objects.first().user
+    revocation_filter.sync()
+    generation = get_versions((BlacklistedToken,))
+
+    early, late = RefreshToken.for_user(user), RefreshToken.for_user(user)
+    early.blacklist()
+    late.blacklist()
+    assert get_versions((BlacklistedToken,)) != generation
+    assert revocation_filter.is_revoked(early['jti']) and revocation_filter.is_revoked(late['jti'])
+
+    # Another worker synced when only the row of `late` (the higher id) had committed.
+    revocation_filter.bloom = BloomFilter(100, 0.001)
+    revocation_filter.bloom.add(late['jti'])
+    revocation_filter.last_id = BlacklistedToken.objects.get(token__jti=late['jti']).pk
+    revocation_filter.generation, revocation_filter.synced_at = generation, 0.0
+    assert revocation_filter.is_revoked(early['jti'])
+
+
+@pytest.mark.django_db
+def test_expired_revocation_filter_is_used_while_another_request_rebuilds(make_user_relations, django_assert_num_queries):
+    make_user_relations(1)
+    revocation_filter.sync()
+    bloom = revocation_filter.bloom
+    revocation_filter.built_at -= 24 * 60 * 60
+
+    with revocation_filter._build_lock, django_assert_num_queries(0):
+        assert not revocation_filter.is_revoked(str(uuid.uuid4()))
+    assert revocation_filter.bloom is bloom
+
+
+@pytest.mark.django_db
+def test_claims_authentication_skips_user_select_until_claims_change(client, make_user_relations):
+    make_user_relations(1)
+    user = UserSkill.objects.first().user
+    auth = {'HTTP_AUTHORIZATION': f"Bearer {LoginSerializer.get_token(user).access_token}"}
+    client.get('/api/professions/match/', **auth)
+
+    def user_selects():
+        with CaptureQueriesContext(connection) as queries:
+            assert client.get('/api/professions/match/', **auth).status_code == 200
+        return sum('FROM "users_customuser"' in query['sql'] for query in queries.captured_queries)
+
+    assert user_selects() == 0
+
+    user.bio = "unrelated"
+    user.save()
+    assert user_selects() == 0
+
+    user.role = "admin"
+    user.save()
+    assert user.claims_version == 1
+    assert user_selects() == 1
+
+
+@pytest.mark.django_db
+def test_async_register_and_login_hash_in_the_pool(client):
+    response = client.post('/api/auth/register/', {
+        'username': "Newcomer", 'email': "new@example.com", 'password': "s3cret-pass", 'password_confirm': "s3cret-pass",
+    }, content_type='application/json')
+    assert response.status_code == 201
+
+    login = client.post('/api/auth/login/', {'username': "newcomer", 'password': "s3cret-pass"}, content_type='application/json')
+    assert login.status_code == 200
+    assert login.json()["user"]["username"] == "newcomer"
+
+    wrong = client.post('/api/auth/login/', {'username': "newcomer", 'password': "nope"}, content_type='application/json')
+    assert wrong.status_code == 400
+
+
+@pytest.mark.django_db
+def test_async_auth_views_need_no_csrf_token():
+    client = Client(enforce_csrf_checks=True)
+    response = client.post('/api/auth/register/', {
+        'username': "tokenless", 'email': "tokenless@example.com", 'password': "s3cret-pass", 'password_confirm': "s3cret-pass",
+    }, content_type='application/json')
+    assert response.status_code == 201
+
+    login = client.post('/api/auth/login/', {'username': "tokenless", 'password': "s3cret-pass"}, content_type='application/json')
+    assert login.status_code == 200
+
+
+@pytest.mark.django_db
+def test_async_login_goes_through_the_authentication_backends(client):
+    CustomUser.objects.create_user("dormant", "dormant@example.com", "s3cret-pass", is_active=False)
+    failures = []
+
+    def login_failed(sender, credentials, request, **kwargs):
+        failures.append(credentials)
+    user_login_failed.connect(login_failed)
+    try:
+        for password in ("nope", "s3cret-pass"):
+            response = client.post(
+                '/api/auth/login/', {'username': "dormant", 'password': password}, content_type='application/json'
+            )
+            assert response.status_code == 400
+    finally:
+        user_login_failed.disconnect(login_failed)
+
+    assert [credentials['username'] for credentials in failures] == ["dormant", "dormant"]
+    assert all(credentials['password'] != password for credentials in failures)
+
+
+@pytest.mark.django_db
+def test_async_login_sheds_load_when_the_pool_is_full(client, monkeypatch):
+    monkeypatch.setattr(hashing_pool, 'max_pending', 0)
+
+    response = client.post('/api/auth/login/', {'username': "anyone", 'password': "x"}, content_type='application/json')
+
+    assert response.status_code == 503
+    assert response['Retry-After'] == "1"
+
+
+def test_sliding_window_weights_the_previous_window():
+    assert sliding_window_hit("test:window", limit=2, window=60, now=30)[0]
+    assert sliding_window_hit("test:window", limit=2, window=60, now=40)[0]
+    assert sliding_window_hit("test:window", limit=2, window=60, now=50) == (False, 10)
+    # Half of the previous window (3 hits) still counts at the middle of the next one.
+    assert sliding_window_hit("test:window", limit=2, window=60, now=90) == (False, 10)
+    # Rejected requests count too, so a client that keeps retrying stays blocked.
+    assert not sliding_window_hit("test:window", limit=2, window=60, now=115)[0]
+    assert sliding_window_hit("test:window", limit=2, window=60, now=250)[0]
+
+
+@pytest.mark.django_db
+def test_login_throttled_per_username_before_hashing(client, settings, monkeypatch):
+    settings.AUTH_THROTTLE_RATES = {"login": {"username": "2/min"}}
+    monkeypatch.setattr(hashing_pool, 'max_pending', 0)  # any hash attempt would answer 503
+
+    def login(username):
+        return client.post('/api/auth/login/', {'username': username, 'password': "x"}, content_type='application/json')
+
+    assert [login(" Victim ").status_code for _ in range(3)] == [503, 503, 429]
+    assert login("someone-else").status_code == 503
+    assert get_shed_counts()[("login", "username")] == 1
+
+
+@pytest.mark.django_db
+def test_login_throttle_ignores_a_client_supplied_forwarded_for(client, settings, monkeypatch):
+    settings.AUTH_THROTTLE_RATES = {"login": {"ip": "2/min"}}
+    monkeypatch.setattr(hashing_pool, 'max_pending', 0)
+
+    statuses = [
+        client.post(
+            '/api/auth/login/', {'username': f"user{number}", 'password': "x"},
+            content_type='application/json', HTTP_X_FORWARDED_FOR=f"10.0.0.{number}",
+        ).status_code
+        for number in range(3)
+    ]
+    assert statuses == [503, 503, 429]
+
+
+@pytest.mark.django_db(databases='__all__')
+def test_replica_reads_neither_fill_the_response_cache_nor_get_validators(client, settings, replicas, make_taxonomy):
+    make_taxonomy(2)
+
+    def get_skills():
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/skills/')
+        assert response.status_code == 200
+        return response, any('users_skill' in query['sql'] for query in queries.captured_queries)
+
+    from_replica, _ = get_skills()
+    assert not from_replica.has_header('ETag') and not from_replica.has_header('Last-Modified')
+
+    settings.DATABASE_REPLICAS = []
+    from_primary, read_skills = get_skills()
+    assert read_skills and from_primary.has_header('ETag')
+
+    settings.DATABASE_REPLICAS = replicas
+    cached, read_skills = get_skills()
+    assert not read_skills
+    assert cached['ETag'] == from_primary['ETag'] and cached.content == from_primary.content
+
+
+@pytest.mark.django_db(databases='__all__')
+def test_safe_requests_read_from_healthy_replicas_until_the_client_writes(client, settings, replicas, monkeypatch):
+    routed = []
+    original = ReplicaRouter.db_for_read
+
+    def db_for_read(*args, **kwargs):
+        routed.append(original(*args, **kwargs))
+        return routed[-1]
+
+    monkeypatch.setattr(ReplicaRouter, 'db_for_read', db_for_read)
+
+    client.get('/api/user-skills/')
+    assert routed and set(routed) <= set(replicas)
+
+    client.post('/api/auth/register/', {'username': "writer"}, content_type='application/json')
+    routed.clear()
+    client.get('/api/user-skills/')
+    assert set(routed) == {None}
+
+    client.cookies.clear()
+    replica_health.reset()
+    settings.REPLICA_MAX_LAG_SECONDS = -1  # every replica lags too much
+    routed.clear()
+    client.get('/api/user-skills/')
+    assert set(routed) == {None}
+
+
+@pytest.mark.django_db
+def test_async_viewsets_match_sync_ones(client, make_user_relations):
+    make_user_relations(3)
+    skill = Skill.objects.first()
+
+    for path in ('user-skills/?page_size=2', 'professions/', f'skills/{skill.pk}/', 'skills/0/'):
+        sync, native = client.get(f'/api/{path}'), client.get(f'/api/async/{path}')
+        assert native.status_code == sync.status_code
+        assert native.json() == {
+            key: value.replace('/api/', '/api/async/') if key in ('next', 'previous') and value else value
+            for key, value in sync.json().items()
+        }
+
+
+@pytest.mark.django_db
+def test_conditional_get_answers_304_without_queries(client, make_user_relations, django_assert_num_queries):
+    make_user_relations(2)
+    # Last-Modified is only sent once the second of the last write is over.
+    for viewset in (SkillViewSet, UserSkillViewSet):
+        for model in get_serializer_models(viewset.OutputSerializer):
+            get_shared_cache().set(modified_key(model), time.time() - 2, timeout=None)
+    first = client.get('/api/skills/')
+    relations = client.get('/api/user-skills/')
+
+    with django_assert_num_queries(0):
+        assert client.get('/api/skills/', HTTP_IF_NONE_MATCH=first['ETag']).status_code == 304
+        assert client.get('/api/skills/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code == 304
+        assert client.get('/api/user-skills/', HTTP_IF_NONE_MATCH=relations['ETag']).status_code == 304
+
+    Skill.objects.create(name="Fresh", skill_type=Skill.objects.first().skill_type)
+    changed = client.get('/api/skills/', HTTP_IF_NONE_MATCH=first['ETag'])
+    assert changed.status_code == 200
+    assert changed['ETag'] != first['ETag']
+
+    UserSkill.objects.first().delete()
+    assert client.get('/api/user-skills/', HTTP_IF_NONE_MATCH=relations['ETag']).status_code == 200
+
+
+@pytest.mark.django_db
+def test_write_in_the_second_of_a_fetch_moves_last_modified(client, make_taxonomy, monkeypatch):
+    skill_type = make_taxonomy(1)[0][0].skill_type
+    second = math.floor(time.time()) + 10
+    clock = [second + 0.1]
+    monkeypatch.setattr(time, 'time', lambda: clock[0])
+
+    def write_at(moment):
+        clock[0] = moment
+        Skill.objects.create(name=f"written at {moment}", skill_type=skill_type)
+
+    def get_at(moment, **headers):
+        clock[0] = moment
+        return client.get('/api/skills/', **headers)
+
+    write_at(second + 0.1)
+    # A write at second + 0.7 would not move a Last-Modified of `second`.
+    assert not get_at(second + 0.2).has_header('Last-Modified')
+
+    fetched = get_at(second + 1.2)
+    assert fetched['Last-Modified'] == http_date(second + 1)
+    assert get_at(second + 1.3, HTTP_IF_MODIFIED_SINCE=fetched['Last-Modified']).status_code == 304
+    write_at(second + 1.4)
+    assert get_at(second + 2.5, HTTP_IF_MODIFIED_SINCE=fetched['Last-Modified']).status_code == 200
+
+
+@pytest.mark.django_db
+def test_popular_skills_are_ordered_by_holder_count(client, make_user_relations):
+    make_user_relations(3)
+    user = UserSkill.objects.first().user
+    popular = Skill.objects.order_by('id').last()
+    UserSkill.objects.create(user=user, skill=popular)
+
+    response = client.get('/api/skills/popular/', {'limit': 2})
+
+    assert response.status_code == 200
+    assert [row["id"] for row in response.json()["results"]][0] == popular.id
+    assert response.json()["results"][0]["holder_count"] == 2
+    assert len(response.json()["results"]) == 2
+
+
+@pytest.mark.django_db
+def test_avatar_upload_is_deduplicated_and_served_as_variants(client, settings, tmp_path, monkeypatch, make_user_relations):
+    settings.MEDIA_ROOT = tmp_path
+    monkeypatch.setattr('api.views.user.schedule_variants', render_variants)  # inline instead of the pool
+    make_user_relations(1)
+    user = UserSkill.objects.first().user
+    auth = {'HTTP_AUTHORIZATION': f"Bearer {LoginSerializer.get_token(user).access_token}"}
+
+    def upload(content):
+        body = encode_multipart(BOUNDARY, {'avatar': SimpleUploadedFile("me.png", content)})
+        return client.put('/api/users/me/avatar/', body, content_type=MULTIPART_CONTENT, **auth)
+
+    image = BytesIO()
+    Image.new('RGB', (800, 600), 'teal').save(image, 'PNG')
+    assert upload(image.getvalue()).status_code == 202
+    response = upload(image.getvalue())
+    assert response.status_code == 202 and response.json()["pending"] is False
+    originals = [path for path in tmp_path.rglob('*.png')]
+    assert len(originals) == 1
+    assert len(list(tmp_path.rglob('*.webp'))) == len(settings.AVATAR_SIZES)
+
+    avatar = client.get('/api/user-skills/').json()["results"][0]["user"]["avatar"]
+    assert avatar["64"]["webp"].endswith(f"{originals[0].stem}-64.webp")
+
+    assert upload(b"not an image").status_code == 400
+    assert client.put('/api/users/me/avatar/', **auth).status_code == 400
+    assert client.put('/api/users/me/avatar/', {}, content_type=MULTIPART_CONTENT, **auth).status_code == 400
+    assert client.put('/api/users/me/avatar/', {'avatar': 1}, content_type='application/json', **auth).status_code == 415
+
+    monkeypatch.setattr('api.views.user.schedule_variants', lambda name: None)
+    other = BytesIO()
+    Image.new('RGB', (80, 60), 'navy').save(other, 'PNG')
+    assert upload(other.getvalue()).json()["pending"] is True
+    settings.AVATAR_MAX_BYTES = 1024
+    assert upload(image.getvalue()).status_code == 413
+
+
+def read_stream(response):
+    if not response.is_async:
+        return b''.join(response.streaming_content)
+
+    async def collect():
+        return b''.join([part async for part in response.streaming_content])
+    return async_to_sync(collect)()
+
+
+@pytest.mark.django_db
+def test_streamed_list_matches_the_paginated_pages(client, make_user_relations):
+    make_user_relations(5)
+
+    for path in ('user-skills/', 'professions/', 'async/user-skills/'):
+        rows, url = [], f'/api/{path}?page_size=2'
+        while url:
+            page = client.get(url).json()
+            rows.extend(page["results"])
+            url = page["next"]
+
+        response = client.get(f'/api/{path}?stream=true')
+        assert response.streaming
+        assert response["Content-Type"] == "application/json"
+        assert json.loads(read_stream(response)) == rows
+
+
+@pytest.mark.django_db
+def test_streams_of_sync_views_are_async_under_asgi(admin_user, make_user_relations):
+    make_user_relations(3)
+    profession = Profession.objects.first()
+    profession.required_skills.add(*Skill.objects.all())
+    headers = {'Authorization': f"Bearer {LoginSerializer.get_token(admin_user).access_token}"}
+
+    for path in (
+        '/api/users/export/?output=csv',
+        f'/api/professions/{profession.pk}/skill-gaps/?detail=users&output=ndjson',
+        '/api/user-skills/?stream=true',
+    ):
+        response = async_to_sync(AsyncClient().get)(path, headers=headers)
+        assert response.status_code == 200 and response.is_async
+        expected = Client().get(path, headers=headers)
+        assert not expected.is_async
+        assert read_stream(response) == read_stream(expected)
+
+
+def test_fast_json_renderer_matches_drf_bytes():
+    data = {
+        "name": "café   line", "when": datetime.datetime(2024, 5, 1, 12, 30, 15, 120000, tzinfo=datetime.timezone.utc),
+        "day": datetime.date(2024, 5, 1), "amount": Decimal("1.50"), "id": uuid.UUID(int=7), "tags": ("a", None, 1.5),
+    }
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+    assert b''.join(FastJSONRenderer().render_items([[data], [], [data, data]])) == JSONRenderer().render([data] * 3)
+    assert b''.join(FastJSONRenderer().render_items([])) == b'[]'
+
+
+@pytest.mark.parametrize("data", [
+    {1: "int key", True: "bool key", None: "null key", "nested": {2: [3]}},
+    {"big": 2 ** 64, "negative": -2 ** 70},
+    [0.1, -0.0, 1.5, 123456789.123, 1e15, 0.0001, 5e-324],
+])
+def test_fast_json_renderer_matches_drf_bytes_for_awkward_values(data):
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+    assert b''.join(FastJSONRenderer().render_items([[data]])) == JSONRenderer().render([data])
+
+
+def test_fast_json_renderer_differs_from_drf_only_in_float_formatting():
+    with pytest.raises(TypeError):
+        FastJSONRenderer().render({uuid.UUID(int=7): 1})
+    data = [1e16, 1e-5, 1e-7]
+    assert json.loads(FastJSONRenderer().render(data)) == json.loads(JSONRenderer().render(data)) == data
+    assert FastJSONRenderer().render(data) == b'[1e16,0.00001,1e-7]'
+    with pytest.raises(ValueError):
+        JSONRenderer().render([float("nan")])
+    assert FastJSONRenderer().render([float("nan"), float("inf")]) == b'[null,null]'
+
+
+@pytest.mark.django_db
+def test_streamed_list_memory_does_not_grow_with_the_row_count(api_factory, monkeypatch):
+    skill_type = SkillType.objects.create(name="streamed")
+    monkeypatch.setattr(SkillViewSet, 'stream_chunk_size', 200)
+    view = SkillViewSet.as_view({'get': 'list'})
+
+    def stream_peak(count):
+        Skill.objects.bulk_create(
+            Skill(name=f"streamed skill {Skill.objects.count() + number}", skill_type=skill_type, description="x" * 100)
+            for number in range(count)
+        )
+        tracemalloc.start()
+        try:
+            size = sum(len(part) for part in view(api_factory.get('/?stream=true')).streaming_content)
+            return size, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    small_size, small_peak = stream_peak(1000)
+    large_size, large_peak = stream_peak(3000)
+    assert large_size > 3 * small_size
+    assert large_peak < 2 * small_peak
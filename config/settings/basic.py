@@ -27,6 +27,7 @@ BASE_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 
 LOCAL_APPS = []
@@ -41,6 +42,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.replicas.ReplicaPinningMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -79,6 +81,30 @@ DATABASES = {
     }
 }
 
+# Read replicas as "host:port" entries, e.g. DB_REPLICAS=10.0.0.2:5432,10.0.0.3:5432.
+# Safe API requests read from a healthy one (see core.replicas); in tests they
+# mirror the default database.
+DATABASE_REPLICAS = []
+for number, address in enumerate(env.list('DB_REPLICAS', default=[]), start=1):
+    host, _, port = address.partition(':')
+    DATABASES[f"replica_{number}"] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f"replica_{number}")
+
+DATABASE_ROUTERS = ["core.replicas.ReplicaRouter"]
+# Clients stay on the primary this long after a write, to read their own writes.
+REPLICA_PIN_SECONDS = 10
+REPLICA_MAX_LAG_SECONDS = 5
+REPLICA_HEALTH_CHECK_INTERVAL = 5
+
+# The async login view authenticates through aauthenticate(); this backend
+# verifies passwords in the hashing pool there (see PASSWORD_HASHING_*).
+AUTHENTICATION_BACKENDS = ["users.backends.PooledModelBackend"]
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -129,3 +155,65 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = '86e9a6002@smtp-brevo.com'
 EMAIL_HOST_PASSWORD = 'YEMfj2I1XrBh8Wtn'
 DEFAULT_FROM_EMAIL = 'mirshohid1214@gmail.com'
+
+# Model versions, token claims versions, throttle counters and replica pins live
+# in this cache, so every worker must see the same one: Redis (redis://host:6379/0)
+# or Memcached (pymemcache://host:11211). The system check api.E001 rejects a
+# per-process backend outside DEBUG.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# API response cache: a per-process LRU in front of the shared cache backend
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = 60 * 60
+API_CACHE_LOCAL_SIZE = 512
+API_REPORT_CACHE_TIMEOUT = 60 * 10
+
+# In-process autocomplete indexes are patched from signals in the worker that
+# made the change; the other workers rebuild theirs after this many seconds.
+AUTOCOMPLETE_MAX_AGE = 60 * 5
+
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "api.authentication.ClaimsJWTAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    # Proxies in front of the app that append to X-Forwarded-For. Throttles key on
+    # REMOTE_ADDR with 0, and on the address the outermost proxy saw otherwise;
+    # unset, DRF would trust a client-supplied X-Forwarded-For.
+    "NUM_PROXIES": env.int("NUM_PROXIES", default=0),
+}
+
+# Revoked access tokens are checked against a per-worker Bloom filter; only
+# filter hits query the blacklist. New revocations reach the other workers
+# within TOKEN_REVOCATION_SYNC_INTERVAL seconds. Each sync reads the last
+# TOKEN_REVOCATION_SYNC_OVERLAP blacklist ids again, for rows that committed late.
+TOKEN_REVOCATION_SYNC_INTERVAL = 1
+TOKEN_REVOCATION_SYNC_OVERLAP = 1000
+TOKEN_REVOCATION_REBUILD_INTERVAL = 60 * 30
+TOKEN_REVOCATION_ERROR_RATE = 0.001
+
+# Password hashing for the auth views runs in a process pool (None: one worker
+# per CPU). Beyond MAX_PENDING concurrent hashes they answer 503 with Retry-After.
+PASSWORD_HASHING_WORKERS = None
+PASSWORD_HASHING_MAX_PENDING = 32
+PASSWORD_HASHING_RETRY_AFTER = 1
+
+# Sliding-window limits for the auth endpoints, counted in the shared cache per
+# client IP and per targeted username/email. Shed requests never reach hashing.
+AUTH_THROTTLE_RATES = {
+    "login": {"ip": "30/min", "username": "10/min"},
+    "register": {"ip": "10/hour", "email": "5/hour"},
+}
+
+# Avatars are stored under their content hash and served only as square
+# variants, rendered in a process pool after upload.
+AVATAR_MAX_BYTES = 5 * 1024 * 1024
+AVATAR_MAX_PIXELS = 25_000_000
+AVATAR_SIZES = (64, 128, 512)
+AVATAR_QUALITY = 85
+AVATAR_WORKERS = 2